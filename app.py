@@ -1,29 +1,69 @@
 import streamlit as st
+import functools
+import html
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import json
-from services.dag_debug import call_execute_dag
-from services.hero import get_heroPids_batch
+import time
+import uuid
+import debug.debug_pb2 as debug_pb2
+from google.protobuf.json_format import MessageToDict
+from services import cassette, compression, metrics, offload, sharing, validation
+from services.analytics import (
+    FIELD_PRICE,
+    FIELD_SSCAT,
+    ExecutionAnalytics,
+    duplicate_stats,
+    overlap_stats,
+    price_histogram,
+    price_stats,
+    sscat_distribution,
+)
+from services.dag_debug import DagResponse, call_execute_dag_routed
+from services.endpoints import get_registry, iop_service, pdp_feed_service
+from services.export import FORMAT_ARROW_STREAM, FORMAT_PARQUET, export_execution
+from services.hero import get_hero_cache, get_heroPids_batch
 from services.product import fetch_product_details
 from services.pricing import get_pricing_features
-from typing import List, Optional
+from services.pdp_feed import (
+    MAX_FANOUT,
+    dag_result_key,
+    fetch_pdp_feeds,
+    overlap_report,
+    result_key as pdp_result_key,
+    results_map as pdp_results_map,
+)
+from services.pagination import DEFAULT_MAX_ITEMS, DEFAULT_MAX_PAGES, paginate
+from services.prefetch import EnrichmentPrefetch
+from services.regression import DEFAULT_STORE_PATH, DEFAULT_SUITE_PATH, RegressionStore, append_case, case_from_execution
+from services.search import SORTS, CandidateIndex
+from services.thumbnails import thumbnail_server
+from services.trace import DagTrace, dag_dot, node_timing_table, parse_dag_edges, parse_node_timings
+from services.metrics import metrics_server
+from services.memory import ExecutionProfile, SessionResultStore, deep_sizeof, profile_execution, result_size_report
+from services.resilience import DEGRADED, PAGE_BUDGET, BackendUnavailable, Deadline, PartialFailure
+from services.transport import GRPC_TRANSPORTS, TRANSPORT_GRPC
+from typing import Any, List, Optional
 
 PRICING_FEATURES = [
     "serving_price",
 ]
 
-# Host mapping configuration
-HOST_MAPPING = {
-    "prod": {
-        "for_you": "fy-iop-grpc-web.prd.meesho.int:80",
-        "catalog_recommendation": "pdp-iop-grpc-service-web.prd.meesho.int:80",
-        "catalog_listing_page": "clp-col-iop-web.prd.meesho.int",
-        "recently_viewed_catalog_recommendation": "rv-iop-web.prd.meesho.int"
-    },
-    "pre-prod": {
-        "for_you": "fy-iop-grpc-web.int.meesho.int:80",
-        "catalog_recommendation": "pdp-iop-grpc-service-web.int.meesho.int:80",
-        "catalog_listing_page": "clp-col-iop-web.int.meesho.int",
-        "recently_viewed_catalog_recommendation": "rv-iop-web.prd.meesho.int"  # Using prod for RV as pre-prod not specified
-    }
+# Result cards rendered (and enriched) per result key
+MAX_DISPLAY = 100
+# Concurrent enrichment pipelines per session
+PREFETCH_WORKERS = 8
+# Recent run times kept per scope (full script run or fragment) for the sidebar
+RUN_TIME_SAMPLES = 50
+
+# Share of the remaining page budget each stage may spend
+STAGE_BUDGET_SHARES = {
+    "iop": 0.6,
+    "hero": 0.3,
+    "taxonomy": 0.5,
+    "pricing": 1.0,
 }
 
 FEED_TYPES: List[str] = [
@@ -59,16 +99,35 @@ FEED_CONTEXTS = [
     "wishlist",
 ]
 
-@st.cache_data(show_spinner=False)
-def _cached_get_hero_pid_map(catalog_ids: List[int]):
-    """Batch-fetch hero PIDs for a list of catalog IDs (cached)."""
-    return get_heroPids_batch(catalog_ids)
+# Deadlines are underscore-prefixed so st.cache_data leaves them out of the cache key.
+# Failures raise BackendUnavailable and are therefore never cached.
 
+@metrics.track_cache("hero_pid_map")
+def _cached_get_hero_pid_map(catalog_ids: List[int], _deadline: Optional[Deadline] = None):
+    """Batch-fetch hero PIDs for a list of catalog IDs (cached per ID; "N/A" answers only briefly)."""
+    cache = get_hero_cache()
+    hero_pid_map, missing = cache.get(catalog_ids)
+    if missing:
+        metrics.record_cache_miss("hero_pid_map")
+        try:
+            fetched = get_heroPids_batch(missing, deadline=_deadline)
+        except PartialFailure as e:
+            cache.put(e.result)
+            hero_pid_map.update(e.result)
+            e.result = hero_pid_map
+            raise
+        cache.put(fetched)
+        hero_pid_map.update(fetched)
+    return hero_pid_map
+
+@metrics.track_cache("product_details")
 @st.cache_data(show_spinner=False)
-def _cached_fetch_product_details(hero_pids: List[str]):
+def _cached_fetch_product_details(hero_pids: List[str], _deadline: Optional[Deadline] = None):
     """Fetch product details for the hero PIDs (cached)."""
-    return fetch_product_details(hero_pids)
+    metrics.record_cache_miss("product_details")
+    return fetch_product_details(hero_pids, deadline=_deadline)
 
+@metrics.track_cache("pricing_features")
 @st.cache_data(show_spinner=False)
 def _cached_pricing_features(
     *,
@@ -77,8 +136,10 @@ def _cached_pricing_features(
     client_id: str = "ios",
     user_pincode: str = "122001",
     app_version_code: str = "685",
+    _deadline: Optional[Deadline] = None,
 ):
     """Retrieve pricing features for a batch of products (cached)."""
+    metrics.record_cache_miss("pricing_features")
     return get_pricing_features(
         user_id=user_id,
         pdp_data=pdp_data,
@@ -86,17 +147,47 @@ def _cached_pricing_features(
         user_pincode=user_pincode,
         app_version_code=app_version_code,
         pricing_features=PRICING_FEATURES,
+        deadline=_deadline,
     )
 
+def record_run_time(scope: str, seconds: float) -> None:
+    """Record how long a full script run ("app") or one fragment run took."""
+    metrics.SCRIPT_RUN_SECONDS.labels(scope).observe(seconds)
+    run_times = st.session_state.setdefault("run_times", {})
+    run_times.setdefault(scope, deque(maxlen=RUN_TIME_SAMPLES)).append(seconds)
+
+def timed_fragment(scope: str):
+    """st.fragment timed under `scope`: widgets inside it rerun only the fragment, not the whole script."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_run_time(scope, time.perf_counter() - start)
+        return st.fragment(wrapper)
+    return decorator
+
+run_started = time.perf_counter()
 st.title("Execute DAG Debugger")
 
+# Prometheus scrape endpoint for the deployment, shared by every session of this process
+metrics_server.ensure_started()
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+metrics.touch_session(st.session_state["session_id"])
+
 user_id = st.text_input("User ID", value="123456")
 environment = st.selectbox("Environment", ["pre-prod", "prod"], index=0)
 feed_type = st.selectbox("Feed Type", FEED_TYPES, index=0)
 
-# Automatically set IOP host based on feed type and environment
-iop_host = HOST_MAPPING[environment][feed_type]
-st.info(f"Using IOP Host: {iop_host}")
+# IOP endpoints for the feed type and environment come from the endpoint registry
+endpoint_registry = get_registry()
+iop_pool = endpoint_registry.pool(iop_service(environment, feed_type))
+st.info(f"Using IOP endpoints ({iop_pool.policy}): {', '.join(iop_pool.addresses)}")
+if iop_pool.note:
+    st.warning(iop_pool.note)
 
 # Show relevant ID input based on feed type
 collection_id_str = None
@@ -123,6 +214,10 @@ entity_type = st.text_input("Entity Type", value="catalog")
 limit_str = st.text_input("Limit (for catalog_validator)")
 
 cursor = st.text_input("Cursor")
+auto_paginate = st.checkbox("Auto-paginate (follow result cursors)")
+if auto_paginate:
+    max_pages = int(st.number_input("Max pages", min_value=1, max_value=100, value=DEFAULT_MAX_PAGES))
+    max_items = int(st.number_input("Item budget", min_value=1, max_value=1000000, value=DEFAULT_MAX_ITEMS))
 catalog_scheduling_statuses = st.text_area("Catalog Scheduling Statuses (comma-separated)")
 
 config_source_type = st.radio("Config Source Type", ("RawConfigJson", "Selector"))
@@ -137,8 +232,16 @@ selector_variant_name = ""
 
 selector = None
 
+# Problems found before dispatch; the Execute buttons stay disabled while there are any
+input_errors: List[str] = []
+
 if config_source_type == "RawConfigJson":
     raw_config_json = st.text_area("Raw Config JSON", value="")
+    # The same check the transport runs before sending, so the button and the dispatch agree
+    input_errors.extend(validation.request_errors({"RawConfigJson": raw_config_json}))
+    if raw_config_json:
+        for warning in validation.check_config(raw_config_json).warnings:
+            st.warning(warning)
 else:
     selector_feed_type = st.selectbox("Selector Feed Type", FEED_TYPES, index=0)
     selector_tenant_ctx = st.selectbox("Selector TenantCtx", ["organic", "ad", "ct"], index=0)
@@ -151,6 +254,469 @@ else:
 config_kind = st.text_input("Config Kind", value="FeedWrite")
 st.caption("💡 Examples: GenerateFeedOnTheFly, FeedWrite, FeedRead")
 feed_metadata_json = st.text_area("Feed MetaData (JSON)")
+if feed_metadata_json:
+    input_errors.extend(f"FeedMetaData: {error}" for error in validation.check_feed_metadata(feed_metadata_json).errors)
+if input_errors:
+    st.error("Fix the request before executing:\n\n" + "\n".join(f"- {error}" for error in input_errors))
+profile_memory = st.sidebar.checkbox("Profile memory (tracemalloc)", value=False)
+# Process-wide settings: changing them from one session would change every other session's backend calls,
+# so they are startup settings (environment variables) shown read-only here
+st.sidebar.caption(
+    f"Backend cassette: {cassette.current_mode()} (`DAG_DEBUGGER_CASSETTE`, `DAG_DEBUGGER_CASSETTE_PATH`)"
+)
+if cassette.current_store() is not None:
+    st.sidebar.dataframe(cassette.current_store().summary())
+grpc_transport = st.sidebar.selectbox(
+    "gRPC transport",
+    GRPC_TRANSPORTS,
+    index=GRPC_TRANSPORTS.index(TRANSPORT_GRPC),
+    help="Transport for the gRPC feed types; catalog_listing_page and recently_viewed always use HTTP/JSON.",
+)
+keep_raw_candidates = st.sidebar.checkbox(
+    "Keep raw candidate JSON",
+    value=True,
+    help="Needed for the JSON details tab; turn off to keep only id, score and source per candidate.",
+)
+st.sidebar.caption(f"Parse worker processes: {offload.current_workers()} (`DAG_DEBUGGER_OFFLOAD_WORKERS`)")
+with st.sidebar.expander("Compression"):
+    st.caption(
+        "Startup settings: `DAG_DEBUGGER_COMPRESSION` (or `_HTTP`, `_GRPC`, `_PRICING` per target) and "
+        "`DAG_DEBUGGER_COMPRESSION_MIN_BYTES`. Responses are compressed by servers that support it; "
+        "see benchmarks/bench_compression.py."
+    )
+    st.json({
+        "min_request_bytes": compression.current_min_bytes(),
+        **{target: compression.current_algorithm(target) for target in compression.TARGETS},
+    })
+
+def _execution_store() -> SessionResultStore:
+    """Per-session store of past executions, bounded by SESSION_MEMORY_BUDGET."""
+    if "executions" not in st.session_state:
+        st.session_state["executions"] = SessionResultStore()
+    return st.session_state["executions"]
+
+def save_execution(execution: dict) -> str:
+    """Add an execution to the session store, select it and return its ID."""
+    execution_id = f"{time.strftime('%H:%M:%S')} {execution['feed_type']} ({uuid.uuid4().hex[:6]})"
+    execution["id"] = execution_id
+    store = _execution_store()
+    evicted = store.add(
+        execution_id,
+        execution,
+        deep_sizeof(execution["response"]) + deep_sizeof(execution["tables"]),
+    )
+    st.session_state["selected_execution"] = execution_id
+    if execution.get("share_id") and "shared_at" not in execution and execution["response"].Success:
+        # Content-addressed: re-running an identical request replaces the shared copy
+        sharing.get_shared_store().put(execution["share_id"], execution)
+    if evicted:
+        st.caption(f"Evicted {len(evicted)} older execution(s) to stay within the session memory budget.")
+    return execution_id
+
+def charge_execution(execution: dict, part: str, cache: Any, version: Any = None) -> None:
+    """Charge a cache built on a stored execution to the session budget; re-measured only when `version` changes."""
+    charged = execution.setdefault("charged", {})
+    if part in charged and charged[part] == version:
+        return
+    charged[part] = version
+    # The response and tables are already counted by save_execution; caches that share them are not charged again
+    shared = (execution["response"], execution["tables"], *execution["tables"].values())
+    evicted = _execution_store().charge(execution["id"], part, deep_sizeof(cache, exclude=shared))
+    if evicted:
+        st.caption(f"Evicted {len(evicted)} older execution(s) to stay within the session memory budget.")
+
+def render_memory_profile(execution: dict, store: SessionResultStore):
+    """Show result sizes, the tracemalloc profile and the session memory budget."""
+    with st.expander("Memory profile"):
+        profile = execution["profile"]
+        st.write(profile.as_dict())
+        if execution["size_report"]:
+            st.markdown("**Result sizes by key**")
+            st.dataframe(execution["size_report"])
+        if profile.top_allocations:
+            st.markdown("**Top allocation sites (tracemalloc)**")
+            st.dataframe(
+                [{"site": site, "bytes": size} for site, size in profile.top_allocations],
+            )
+        st.caption(
+            f"Session store: {len(store)} executions, "
+            f"{store.total_bytes / 1024 / 1024:.1f} MiB of {store.budget_bytes / 1024 / 1024:.0f} MiB budget"
+        )
+
+def _prefetch_executor() -> ThreadPoolExecutor:
+    """Per-session executor running enrichment prefetches."""
+    if "prefetch_executor" not in st.session_state:
+        st.session_state["prefetch_executor"] = ThreadPoolExecutor(
+            max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch"
+        )
+    return st.session_state["prefetch_executor"]
+
+def stage_deadline(stage: str) -> Deadline:
+    """Budget of one enrichment stage, carved from this render's page deadline."""
+    return page_deadline.child(STAGE_BUDGET_SHARES[stage])
+
+def start_prefetch(user_id: str, enrichment: Optional[dict] = None) -> EnrichmentPrefetch:
+    """Background hero -> product -> pricing enrichment for a new execution, or a shared one's snapshot."""
+    fetch_hero_pids, fetch_products, fetch_pricing = sharing.seeded_fetchers(
+        enrichment or {},
+        lambda ids, deadline: _cached_get_hero_pid_map(ids, _deadline=deadline),
+        lambda pids, deadline: _cached_fetch_product_details(pids, _deadline=deadline),
+        lambda uid, pdp_data, deadline: _cached_pricing_features(user_id=uid, pdp_data=pdp_data, _deadline=deadline),
+    )
+    return EnrichmentPrefetch(
+        _prefetch_executor(),
+        user_id,
+        fetch_hero_pids=fetch_hero_pids,
+        fetch_products=fetch_products,
+        fetch_pricing=fetch_pricing,
+        stage_deadline=stage_deadline,
+        max_per_key=MAX_DISPLAY,
+    )
+
+def load_shared_execution(share_id: str) -> Optional[str]:
+    """Open a shared execution in this session without calling IOP; None if it is unknown or expired."""
+    stored = sharing.get_shared_store().get(share_id)
+    if stored is None:
+        return None
+    fields, enrichment = stored
+    success, results, error = fields.pop("response")
+    execution = dict(
+        fields,
+        response=DagResponse(success, results=results, error=error),
+        enrichment={},
+        prefetch=start_prefetch(fields["user_id"], enrichment),
+        profile=ExecutionProfile(),
+        share_id=share_id,
+        enrichment_shared=bool(enrichment),
+    )
+    execution.setdefault("pages", [])
+    execution.setdefault("size_report", [])
+    execution["prefetch"].add(execution["tables"].values())
+    return save_execution(execution)
+
+@timed_fragment("result_table")
+def render_result_table(execution_id: str, key: str, max_display: int = MAX_DISPLAY):
+    """Render one result key: hero PID lookup, product cards and pricing.
+
+    A fragment reading the execution from the session store, so retrying its
+    enrichment reruns only this key. The enriched products are recorded in the
+    execution's `enrichment[key]` by catalog ID for export.
+    """
+    execution = _execution_store().get(execution_id)
+    if execution is None:
+        return
+    table = execution["tables"][key]
+    prefetch = execution["prefetch"]
+    enrichment = execution["enrichment"]
+    retry_key = f"retry_enrichment_{execution_id}_{key}"
+    if st.session_state.get(retry_key):
+        # Fragment reruns keep the page deadline of the last full run, so retries get a fresh budget
+        retry_deadline = Deadline(PAGE_BUDGET)
+        prefetch.retry_degraded(lambda stage: retry_deadline.child(STAGE_BUDGET_SHARES[stage]))
+    total_results = len(table)
+    # Show expander with product count (total), but mention max 200 shown
+    expander_label = f"Result for: {key} ({total_results} results)"
+    thumbnails_ready = thumbnail_server.ensure_started()
+    with st.expander(expander_label):
+        if total_results > max_display:
+            st.write(f"Showing only the first {max_display} items out of {total_results} for performance reasons.")
+        with st.spinner("Fetching hero PIDs, product details and pricing..."):
+            product_details, degraded = prefetch.window(table, max_display)
+        snapshot = prefetch.snapshot()
+        charge_execution(execution, "prefetch", snapshot, version=tuple(len(values) for values in snapshot.values()))
+        for e in degraded:
+            st.warning(f"Degraded result – {e}")
+        if degraded:
+            st.button("Retry enrichment", key=retry_key)
+        if product_details:
+            st.subheader("Hero Product Details")
+            num_cols = 3
+            enrichment[key] = {prod.get("catalog_id"): prod for prod in product_details}
+            charge_execution(execution, f"enrichment:{key}", enrichment[key], version=len(product_details))
+            for i in range(0, len(product_details), num_cols):
+                cols = st.columns(num_cols)
+                for j, product in enumerate(product_details[i:i+num_cols]):
+                    with cols[j]:
+                        st.markdown(f"**{product.get('catalog_name', 'N/A')}**")
+                        st.markdown(f"SSCat: {product.get('sscat_name', 'N/A')}")
+                        images = product.get('product_images', [])
+                        if images and thumbnails_ready and thumbnail_server.serves(images[0]):
+                            # Downsized once by the thumbnail server; the browser loads it when scrolled into view
+                            st.markdown(
+                                f'<img src="{html.escape(thumbnail_server.url(images[0]))}" width="150" loading="lazy">',
+                                unsafe_allow_html=True,
+                            )
+                        elif images:
+                            st.image(images[0], width=150)
+                        # Create tabs for product view
+                        tab1, tab2 = st.tabs(["📋 Summary", "🔧 JSON Details"])
+                        
+                        with tab1:
+                            st.markdown(f"Product ID: `{product.get('product_id', 'N/A')}`")
+                            st.markdown(f"Catalog ID: `{product.get('catalog_id', 'N/A')}`")
+                            serving_price = product.get('pricing', {}).get('serving_price')
+                            if serving_price == DEGRADED:
+                                st.markdown("**Serving Price:** _unavailable (pricing degraded)_")
+                            elif serving_price:
+                                st.markdown(f"**Serving Price:** ₹{serving_price}")
+                        
+                        with tab2:
+                            # Show original candidate details instead of enriched product
+                            row = table.row_of(product.get("catalog_id"))
+                            st.json(table.candidate(row) if row is not None else product)
+                        st.markdown("---")
+        elif not degraded:
+            st.info("No product details found for hero_pids.")
+
+@timed_fragment("trace")
+def render_trace(execution_id: str):
+    """Candidate trace: candidate-set changes per node and per-candidate provenance."""
+    execution = _execution_store().get(execution_id)
+    if execution is None:
+        return
+    with st.expander("Candidate trace"):
+        if execution.get("trace") is None:
+            execution["trace"] = DagTrace(execution["tables"], execution.get("dag_edges"))
+        trace = execution["trace"]
+        charge_execution(execution, "trace", trace)
+        if trace.inferred:
+            st.caption("No dag_config in debug_config; result keys are traced as a chain in response order.")
+        st.dataframe(trace.summary())
+        ids_str = st.text_input(
+            "Candidate IDs to trace (comma separated)",
+            key=f"trace_ids_{execution['id']}",
+        )
+        candidate_ids = [cid for cid in map(trace.resolve_id, ids_str.split(",")) if cid is not None]
+        if len(candidate_ids) == 1:
+            st.dataframe(trace.trace(candidate_ids[0]))
+        elif candidate_ids:
+            st.dataframe(trace.provenance(candidate_ids))
+
+@timed_fragment("search")
+def render_search(execution_id: str):
+    """Filter, search and sort the candidates of every result key; enriched ones also by name, SSCat and price."""
+    execution = _execution_store().get(execution_id)
+    if execution is None:
+        return
+    with st.expander("Search candidates"):
+        if execution.get("search_index") is None:
+            execution["search_index"] = CandidateIndex(execution["tables"])
+        index = execution["search_index"]
+        # Only enrichment the prefetch already fetched is indexed, so searching never calls a backend
+        index.add_enrichment(**execution["prefetch"].snapshot())
+        charge_execution(execution, "search_index", index, version=len(index.names))
+        query = st.text_input("Catalog name, SSCat or catalog ID", key=f"search_query_{execution_id}")
+        keys = st.multiselect("Result keys", index.keys, default=index.keys, key=f"search_keys_{execution_id}")
+        col_min, col_max, col_sort, col_order = st.columns(4)
+        price_min = col_min.number_input("Min price", min_value=0.0, value=None, key=f"search_price_min_{execution_id}")
+        price_max = col_max.number_input("Max price", min_value=0.0, value=None, key=f"search_price_max_{execution_id}")
+        sort = col_sort.selectbox("Sort by", SORTS, key=f"search_sort_{execution_id}")
+        descending = col_order.checkbox("Descending", key=f"search_descending_{execution_id}")
+        result = index.search(query, keys, price_min, price_max, sort, descending)
+        st.caption(
+            f"{result.total} matching candidates in {result.elapsed * 1000:.1f} ms, first {len(result.rows)} shown. "
+            f"Names, SSCats and prices are known for the {len(index.names)} enriched of {len(index)} candidates."
+        )
+        st.dataframe(result.rows)
+
+def enrich_analytics(analytics: ExecutionAnalytics, field: str) -> None:
+    """Button callback: runs before the fragment reruns, so the rerun already shows the fetched field."""
+    enrich_deadline = Deadline(PAGE_BUDGET)
+    analytics.enrich(field, _prefetch_executor(), lambda stage: enrich_deadline.child(STAGE_BUDGET_SHARES[stage]))
+
+@timed_fragment("analytics")
+def render_analytics(execution_id: str):
+    """Duplicate, overlap, SSCat and serving price stats over every candidate of an execution."""
+    execution = _execution_store().get(execution_id)
+    if execution is None:
+        return
+    with st.expander("Analytics"):
+        prefetch = execution["prefetch"]
+        if execution.get("analytics") is None:
+            execution["analytics"] = ExecutionAnalytics(
+                execution["tables"],
+                prefetch.user_id,
+                fetch_hero_pids=prefetch.fetch_hero_pids,
+                fetch_products=prefetch.fetch_products,
+                fetch_pricing=prefetch.fetch_pricing,
+            )
+        analytics = execution["analytics"]
+        # Enrichment the prefetch already fetched is never fetched again
+        analytics.seed(**prefetch.snapshot())
+        charge_execution(execution, "analytics", analytics,
+                         version=tuple(len(values) for values in (analytics.hero_pids, *analytics.values.values())))
+        st.caption(f"Computed over all {len(analytics)} candidates of {len(execution['tables'])} result keys.")
+        st.markdown("**Duplicates**")
+        st.dataframe(duplicate_stats(analytics.columns))
+        if len(execution["tables"]) > 1:
+            st.markdown("**Overlap between result keys**")
+            st.dataframe(overlap_stats(analytics.columns))
+
+        for field, title in ((FIELD_SSCAT, "SSCat distribution"), (FIELD_PRICE, "Serving price")):
+            st.markdown(f"**{title}**")
+            missing = analytics.missing(field)
+            if missing:
+                st.button(f"Fetch for {len(missing)} more catalog IDs", key=f"analytics_enrich_{field}_{execution_id}",
+                          on_click=enrich_analytics, args=(analytics, field))
+            for e in analytics.degraded[field]:
+                st.warning(f"Partly fetched, fetch again for the rest: {e}")
+            if field == FIELD_SSCAT:
+                columns = analytics.with_sscats()
+                known = len(columns) - columns["sscat_id"].null_count
+                st.caption(f"SSCat known for {known} of {len(columns)} candidates.")
+                if known:
+                    st.bar_chart(sscat_distribution(columns), x="sscat", y="candidates", color="key")
+            else:
+                columns = analytics.with_prices()
+                known = len(columns) - columns["price"].null_count
+                st.caption(f"Serving price known for {known} of {len(columns)} candidates.")
+                if known:
+                    st.dataframe(price_stats(columns))
+                    st.bar_chart(price_histogram(columns), x="price_from", y="candidates", color="key")
+
+@timed_fragment("export")
+def render_export(execution_id: str):
+    """Offer the execution as a Parquet file or Arrow IPC stream download."""
+    execution = _execution_store().get(execution_id)
+    if execution is None or not execution["tables"]:
+        return
+    with st.expander("Export"):
+        st.caption(
+            "One row per candidate with request parameters, hero PID, product fields and pricing. "
+            f"Product and pricing columns are only filled for the first {MAX_DISPLAY} candidates per result key "
+            "(the enriched display window); `enriched` is false for the other rows. For exports larger than "
+            "memory, stream to a file with `services.export.export_execution`."
+        )
+        fmt = st.radio(
+            "Format", [FORMAT_PARQUET, FORMAT_ARROW_STREAM], horizontal=True, key=f"export_format_{execution_id}"
+        )
+        extension = "parquet" if fmt == FORMAT_PARQUET else "arrows"
+        rows = sum(len(table) for table in execution["tables"].values())
+
+        def _export() -> io.BytesIO:
+            # Built only when the button is clicked, off the script thread. Streamlit serves downloads
+            # in one piece, so the file is held in memory while it is served
+            buffer = io.BytesIO()
+            export_execution(buffer, execution, PRICING_FEATURES, fmt=fmt)
+            return buffer
+
+        st.download_button(
+            f"Download {rows} rows",
+            data=_export,
+            file_name=f"dag_execution_{execution['id'].split('(')[-1].rstrip(')')}.{extension}",
+            mime="application/octet-stream",
+            key=f"export_download_{execution_id}",
+        )
+
+@timed_fragment("regression_case")
+def render_regression_case(execution_id: str):
+    """Save a DAG execution's request as a case of the scheduled regression suite."""
+    execution = _execution_store().get(execution_id)
+    if execution is None or "config_source_type" not in execution:
+        return
+    with st.expander("Regression suite"):
+        st.caption(f"Cases in {DEFAULT_SUITE_PATH} are replayed by `python -m services.regression`.")
+        name = st.text_input("Case name", value=f"{execution['feed_type']}:{execution['user_id']}",
+                             key=f"regression_case_{execution['id']}")
+        if st.button("Add to regression suite", key=f"regression_add_{execution['id']}"):
+            append_case(case_from_execution(execution, name.strip()))
+            st.success(f"Saved case {name.strip()}")
+
+def render_execution(execution: dict):
+    """Render a stored execution: errors, DAG graph and enriched result cards."""
+    response = execution["response"]
+    prefetch = execution["prefetch"]
+    # Enrichment that degraded during an earlier render gets one retry per render
+    prefetch.retry_degraded(stage_deadline)
+
+    # Check for errors more comprehensively
+    has_error = False
+    error_message = ""
+    
+    if hasattr(response, 'Success') and not response.Success:
+        has_error = True
+        error_message = getattr(response, 'Error', 'Unknown error occurred')
+    elif hasattr(response, 'Error') and response.Error:
+        has_error = True
+        error_message = response.Error
+    elif not execution["result_keys"]:
+        has_error = True
+        error_message = "No results returned from DAG execution"
+    
+    if has_error:
+        st.error(f"Error executing DAG: {error_message}")
+        # Optionally show the full response for debugging
+        with st.expander("Full Response (for debugging)"):
+            st.write(response)
+    else:
+        st.success("DAG executed successfully!")
+        for anchor, error in execution.get("partial_errors", {}).items():
+            st.warning(f"Anchor {anchor} failed: {error}")
+        if execution.get("comparison"):
+            st.subheader("PDP feed vs catalog_recommendation DAG")
+            st.dataframe(execution["comparison"])
+        if execution.get("calls"):
+            calls = execution["calls"]
+            with st.expander(f"Transport: {calls[0]['transport']}, {len(calls)} call(s)"):
+                st.caption("Search IOP logs and traces for a call's trace_id to follow it server-side.")
+                st.dataframe(calls)
+        if execution["pages"]:
+            pages = execution["pages"]
+            total = sum(page["new_candidates"] for page in pages)
+            with st.expander(f"Pagination: {len(pages)} pages, {total} unique candidates"):
+                st.dataframe(pages)
+        # st.write(response)
+        # Render debug_config DAG if present
+        debug_cfg_raw = response.Results.get("debug_config") if isinstance(response.Results, dict) else None
+        tables = execution["tables"]
+        dag_cfg = {}
+        node_timings, timing_key = (
+            parse_node_timings(response.Results, tables) if isinstance(response.Results, dict) else ({}, None)
+        )
+        if debug_cfg_raw:
+            try:
+                dag_cfg = parse_dag_edges(debug_cfg_raw)
+                if dag_cfg:
+                    st.subheader("DAG Graph (debug_config)")
+                    st.graphviz_chart(dag_dot(dag_cfg, tables, node_timings))
+            except Exception as e:
+                st.error(f"Failed to render debug_config DAG: {e}")
+        if node_timings:
+            st.subheader("Node timings")
+            st.caption(
+                f"As reported by IOP, {sum(node_timings.values()):.1f} ms in total. The slowest node is outlined "
+                "in red on the graph; critical_path marks the slowest chain of nodes, which sets the DAG's latency."
+            )
+            st.dataframe(node_timing_table(node_timings, dag_cfg, tables))
+        if len(tables) > 1:
+            execution["dag_edges"] = dag_cfg
+            render_trace(execution["id"])
+        if tables:
+            render_search(execution["id"])
+            render_analytics(execution["id"])
+
+        for key in execution["result_keys"]:
+            # Skip debug_config and the result key the node timings came from since already handled above
+            if key in ("debug_config", timing_key):
+                continue
+            table = tables.get(key)
+            if table is not None:
+                render_result_table(execution["id"], key)
+                continue
+            value = response.Results.get(key)
+            try:
+                json.loads(value)
+                # Handle non-list or non-dict items
+                with st.expander(f"Result for: {key}"):
+                    st.info("null")
+            except Exception as e:
+                with st.expander(f"Result for: {key}"):
+                    st.error(f"Could not parse result for {key}: {e}")
+                    st.text(value)
+        if execution.get("share_id") and not execution.get("enrichment_shared") and not prefetch.pending():
+            # Sessions opening the share link get hero PIDs, products and pricing without backend calls
+            sharing.get_shared_store().put_enrichment(execution["share_id"], prefetch.snapshot())
+            execution["enrichment_shared"] = True
 
 def parse_int(val):
     try:
@@ -164,13 +730,20 @@ clp_id = parse_int(clp_id_str)
 ss_cat_id = parse_int(ss_cat_id_str)
 limit = parse_int(limit_str)
 
-if st.button("Execute DAG"):
-    import debug.debug_pb2 as debug_pb2
+# One time budget for the whole render, split across DAG -> hero -> product -> pricing
+page_deadline = Deadline(PAGE_BUDGET)
+
+def build_request_kwargs(
+    feed_type_override: Optional[str] = None,
+    catalog_id_override: Optional[int] = None,
+) -> dict:
+    """Build ExecuteDAGRequest kwargs from the form, optionally for another feed type or anchor catalog."""
     feed_id_kwargs = {}
     if collection_id is not None:
         feed_id_kwargs["CollectionId"] = collection_id
-    if catalog_id is not None:
-        feed_id_kwargs["CatalogId"] = catalog_id
+    anchor_catalog_id = catalog_id if catalog_id_override is None else catalog_id_override
+    if anchor_catalog_id is not None:
+        feed_id_kwargs["CatalogId"] = anchor_catalog_id
     if clp_id is not None:
         feed_id_kwargs["ClpId"] = clp_id
     if ss_cat_id is not None:
@@ -180,8 +753,9 @@ if st.button("Execute DAG"):
     data_kwargs = {}
     if user_id:
         data_kwargs["UserId"] = user_id
-    if feed_type:
-        data_kwargs["FeedType"] = feed_type
+    request_feed_type = feed_type_override or feed_type
+    if request_feed_type:
+        data_kwargs["FeedType"] = request_feed_type
     if feed_id:
         data_kwargs["FeedId"] = feed_id
     if feed_context:
@@ -199,12 +773,11 @@ if st.button("Execute DAG"):
     if catalog_scheduling_statuses:
         data_kwargs["CatalogSchedulingStatuses"] = catalog_scheduling_statuses.split(',')
     if feed_metadata_json:
-        try:
+        metadata_check = validation.check_feed_metadata(feed_metadata_json)
+        if metadata_check.ok:
             feed_metadata = debug_pb2.google_dot_protobuf_dot_struct__pb2.Struct()
-            feed_metadata.update(json.loads(feed_metadata_json))
+            feed_metadata.update(metadata_check.parsed)
             data_kwargs["FeedMetaData"] = feed_metadata
-        except Exception as e:
-            st.error(f"Invalid FeedMetaData JSON: {e}")
     data = debug_pb2.DebugExecutionRequestData(**data_kwargs) if data_kwargs else None
 
     selector = None
@@ -236,143 +809,273 @@ if st.button("Execute DAG"):
         request_kwargs["ConfigKind"] = config_kind
     if data:
         request_kwargs["Data"] = data
+    return request_kwargs
 
-    # Pass raw request_kwargs and config_source_type to the executor
-    with st.spinner("Executing DAG..."):
-        response = call_execute_dag(
-            request_kwargs,
+with st.expander("PdpFeedHandler.FetchPdpFeed (PDP feed aggregator)"):
+    pdp_pool = endpoint_registry.pool(pdp_feed_service(environment))
+    pdp_host = st.text_input(
+        "PDP feed host override",
+        help=f"Leave empty to use the registry endpoints: {', '.join(pdp_pool.addresses)}",
+    )
+    if pdp_pool.note:
+        st.caption(pdp_pool.note)
+    pdp_anchor_ids_str = st.text_area("Anchor catalog IDs (comma or newline separated)")
+    pdp_limit = int(st.number_input("PDP feed limit", min_value=0, max_value=10000, value=0))
+    pdp_compare = st.checkbox(
+        "Also run the catalog_recommendation DAG per anchor and compare",
+        help="Uses the config source and request fields of the DAG form above with each anchor as Catalog ID.",
+    )
+    if st.button("Fetch PDP feed", disabled=pdp_compare and bool(input_errors)):
+        anchor_ids = [
+            anchor for anchor in (parse_int(part.strip()) for part in pdp_anchor_ids_str.replace("\n", ",").split(","))
+            if anchor is not None
+        ]
+        if not anchor_ids:
+            st.error("Enter at least one anchor catalog ID.")
+        else:
+            with st.spinner(f"Fetching PDP feed for {len(anchor_ids)} anchors..."):
+                with profile_execution(trace=profile_memory) as profile:
+                    responses = fetch_pdp_feeds(
+                        anchor_ids,
+                        pdp_host.strip() or pdp_pool,
+                        user_id,
+                        user_context,
+                        feed_context=feed_context,
+                        limit=pdp_limit,
+                        deadline=page_deadline.child(STAGE_BUDGET_SHARES["iop"]),
+                    )
+                    results = pdp_results_map(responses)
+                    failed = {anchor: str(e) for anchor, e in responses.items() if isinstance(e, BackendUnavailable)}
+                    calls = []
+                    if pdp_compare:
+                        dag_pool = endpoint_registry.pool(iop_service(environment, "catalog_recommendation"))
+                        with ThreadPoolExecutor(max_workers=MAX_FANOUT) as executor:
+                            dag_responses = dict(zip(anchor_ids, executor.map(
+                                lambda anchor: call_execute_dag_routed(
+                                    build_request_kwargs("catalog_recommendation", anchor),
+                                    config_source_type,
+                                    user_id,
+                                    user_context,
+                                    "catalog_recommendation",
+                                    dag_pool,
+                                    deadline=page_deadline.child(STAGE_BUDGET_SHARES["iop"]),
+                                    grpc_transport=grpc_transport,
+                                ),
+                                anchor_ids,
+                            )))
+                        calls = [dag_response.call_stats() for dag_response in dag_responses.values()]
+                        for anchor, dag_response in dag_responses.items():
+                            if not dag_response.Success:
+                                failed[anchor] = f"DAG: {dag_response.Error}"
+                                continue
+                            for key, value in dag_response.Results.items():
+                                if key != "debug_config":
+                                    results[dag_result_key(anchor, key)] = value
+                    tables, rest = offload.parse_results(results, keep_raw=keep_raw_candidates)
+                    prefetch = start_prefetch(user_id)
+                    prefetch.add(tables.values())
+            comparison = []
+            pdp_request = {"anchors": anchor_ids, "host": pdp_host.strip() or pdp_pool.service, "feed_context": feed_context, "limit": pdp_limit}
+            dag_request_body = b""
+            if pdp_compare:
+                dag_request_body = debug_pb2.ExecuteDAGRequest(
+                    **build_request_kwargs("catalog_recommendation", 0)
+                ).SerializeToString(deterministic=True)
+                pdp_ids = {
+                    anchor: tables[pdp_result_key(anchor)].id_list()
+                    for anchor in anchor_ids if pdp_result_key(anchor) in tables
+                }
+                dag_ids = {
+                    anchor: {
+                        key.split(":", 2)[2]: table.id_list()
+                        for key, table in tables.items() if key.startswith(dag_result_key(anchor, ""))
+                    }
+                    for anchor in anchor_ids
+                }
+                comparison = overlap_report(pdp_ids, dag_ids)
+            save_execution(
+                {
+                    "feed_type": "pdp_feed",
+                    "environment": environment,
+                    "user_id": user_id,
+                    "response": DagResponse(
+                        bool(results),
+                        results=rest,
+                        error="" if results else "; ".join(f"{anchor}: {error}" for anchor, error in failed.items()),
+                    ),
+                    "request": pdp_request,
+                    "result_keys": list(results),
+                    "tables": tables,
+                    "enrichment": {},
+                    "prefetch": prefetch,
+                    "pages": [],
+                    "comparison": comparison,
+                    "calls": calls,
+                    "partial_errors": failed,
+                    "profile": profile,
+                    "size_report": result_size_report(results),
+                    "share_id": sharing.share_id(
+                        json.dumps(pdp_request, sort_keys=True).encode() + dag_request_body,
+                        environment,
+                        f"{user_id}|{user_context}|pdp_feed",
+                    ),
+                }
+            )
+
+def dag_share_id(request_kwargs: dict) -> str:
+    """Content address of a DAG execution of the form: request, environment, user headers and pagination."""
+    variant = f"{user_id}|{user_context}"
+    if auto_paginate:
+        variant += f"|pages={max_pages}|items={max_items}"
+    body = debug_pb2.ExecuteDAGRequest(**request_kwargs).SerializeToString(deterministic=True)
+    return sharing.share_id(body, environment, variant)
+
+reuse_shared = st.checkbox(
+    "Reuse a shared result of an identical request",
+    help=f"Open the stored execution of the same request, environment and user instead of calling IOP, "
+         f"if one was run in the last {sharing.TTL // 3600} hours.",
+)
+execute_dag = st.button("Execute DAG", disabled=bool(input_errors))
+reused = execute_dag and reuse_shared and load_shared_execution(dag_share_id(build_request_kwargs())) is not None
+if reused:
+    st.caption("Loaded the shared result of an identical request; IOP was not called.")
+if execute_dag and not reused:
+    request_kwargs = build_request_kwargs()
+    calls = []
+
+    def _fetch_page(page_cursor: Optional[str], deadline: Optional[Deadline] = None):
+        """Execute the DAG for one page; paginated runs call this on the prefetch thread."""
+        page_kwargs = dict(request_kwargs)
+        if page_cursor:
+            page_data = debug_pb2.DebugExecutionRequestData()
+            if "Data" in request_kwargs:
+                page_data.CopyFrom(request_kwargs["Data"])
+            page_data.Cursor = page_cursor
+            page_kwargs["Data"] = page_data
+        response = call_execute_dag_routed(
+            page_kwargs,
             config_source_type,
             user_id,
             user_context,
             feed_type,
-            iop_host,
+            iop_pool,
+            # Every page of a paginated run gets its own DAG budget
+            deadline=deadline or Deadline(PAGE_BUDGET).child(STAGE_BUDGET_SHARES["iop"]),
+            grpc_transport=grpc_transport,
         )
+        calls.append(response.call_stats())
+        return response
 
-    # Check for errors more comprehensively
-    has_error = False
-    error_message = ""
-    
-    if hasattr(response, 'Success') and not response.Success:
-        has_error = True
-        error_message = getattr(response, 'Error', 'Unknown error occurred')
-    elif hasattr(response, 'Error') and response.Error:
-        has_error = True
-        error_message = response.Error
-    elif not hasattr(response, 'Results') or not response.Results:
-        has_error = True
-        error_message = "No results returned from DAG execution"
-    
-    if has_error:
-        st.error(f"Error executing DAG: {error_message}")
-        # Optionally show the full response for debugging
-        with st.expander("Full Response (for debugging)"):
-            st.write(response)
-    else:
-        st.success("DAG executed successfully!")
-        # st.write(response)
-        # Render debug_config DAG if present
-        debug_cfg_raw = response.Results.get("debug_config") if isinstance(response.Results, dict) else None
-        if debug_cfg_raw:
-            try:
-                debug_cfg_json = (
-                    debug_cfg_raw
-                    if isinstance(debug_cfg_raw, dict)
-                    else json.loads(debug_cfg_raw)
-                )
-                dag_cfg = (
-                    debug_cfg_json.get("dag_config")
-                    or debug_cfg_json.get("config", {}).get("dag_config")
-                )
-                if dag_cfg:
-                    dot_lines = ["digraph DAG {"]
-                    for src, dst_list in dag_cfg.items():
-                        for dst in dst_list:
-                            dot_lines.append(f'  "{src}" -> "{dst}";')
-                    dot_lines.append("}")
-                    st.subheader("DAG Graph (debug_config)")
-                    st.graphviz_chart("\n".join(dot_lines))
-            except Exception as e:
-                st.error(f"Failed to render debug_config DAG: {e}")
+    pages = []
+    prefetch = start_prefetch(user_id)
+    # Pass raw request_kwargs and config_source_type to the executor
+    with st.spinner("Executing DAG..."):
+        with profile_execution(trace=profile_memory) as profile:
+            if auto_paginate:
+                progress = st.empty()
+                for run, _ in paginate(_fetch_page, cursor or None, max_pages, max_items, keep_raw_candidates):
+                    pages = [page.as_dict() for page in run.pages]
+                    progress.dataframe(pages)
+                    # Enrich display windows that are already complete while the next page is in flight
+                    prefetch.add(table for table in run.tables.values() if len(table) >= MAX_DISPLAY)
+                progress.empty()
+                first_page = run.pages[0]
+                tables, rest, result_keys = run.tables, run.rest, run.result_keys
+                prefetch.add(tables.values())
+                stored_response = DagResponse(not first_page.error, results=rest, error=first_page.error)
+                size_report = []
+            else:
+                response = _fetch_page(None, page_deadline.child(STAGE_BUDGET_SHARES["iop"]))
+                results = response.Results if isinstance(getattr(response, "Results", None), dict) else {}
+                # Keep candidates in compact tables; only the non-candidate values stay as raw strings
+                tables, rest = offload.parse_results(results, keep_raw=keep_raw_candidates)
+                # Enrichment of every key starts now, in the background, before anything renders
+                prefetch.add(tables.values())
+                size_report = result_size_report(results)
+                result_keys = list(results)
+                stored_response = DagResponse(response.Success, results=rest, error=response.Error)
 
-        for key, value in response.Results.items():
-            # Skip debug_config here since already handled above
-            if key == "debug_config":
-                continue
-            try:
-                parsed = json.loads(value)
-                if isinstance(parsed, list) and all(isinstance(item, dict) for item in parsed):
-                    total_results = len(parsed)
-                    max_display = 100
-                    display_items = parsed[:max_display]
-                    # Show expander with product count (total), but mention max 200 shown
-                    expander_label = f"Result for: {key} ({total_results} results)"
-                    with st.expander(expander_label):
-                        if total_results > max_display:
-                            st.write(f"Showing only the first {max_display} items out of {total_results} for performance reasons.")
-                        with st.spinner("Fetching hero PIDs in batch..."):
-                            catalog_ids = [item.get("id") for item in display_items if item.get("id") is not None]
-                            hero_pid_map = _cached_get_hero_pid_map(catalog_ids)
-                            for item in display_items:
-                                cid = item.get("id")
-                                item["hero_pid"] = hero_pid_map.get(cid, "N/A")
-                        hero_pids = [pid for pid in hero_pid_map.values() if pid != "N/A"]
-                        with st.spinner("Fetching product details for hero PIDs..."):
-                            product_details = _cached_fetch_product_details(hero_pids)
-                        if product_details:
-                            st.subheader("Hero Product Details")
-                            num_cols = 3
-                            pdp_data = [(prod["product_id"], "source", "") for prod in product_details if prod.get("product_id")]
-                            pricing_data = _cached_pricing_features(
-                                user_id=user_id,
-                                pdp_data=pdp_data,
-                            )
-                            # Debug: show raw pricing gRPC response (no nested expander)
-                            _, raw_pricing_resp = get_pricing_features(
-                                user_id=user_id,
-                                pdp_data=pdp_data,
-                                client_id="ios",
-                                user_pincode="122001",
-                                app_version_code="685",
-                                pricing_features=PRICING_FEATURES,
-                                return_raw=True,
-                            )
-                            for prod in product_details:
-                                pid = str(prod.get("product_id"))
-                                prod["pricing"] = pricing_data.get(pid, {})
-                            for i in range(0, len(product_details), num_cols):
-                                cols = st.columns(num_cols)
-                                for j, product in enumerate(product_details[i:i+num_cols]):
-                                    with cols[j]:
-                                        st.markdown(f"**{product.get('catalog_name', 'N/A')}**")
-                                        st.markdown(f"SSCat: {product.get('sscat_name', 'N/A')}")
-                                        images = product.get('product_images', [])
-                                        if images:
-                                            st.image(images[0], width=150)
-                                        # Create tabs for product view
-                                        tab1, tab2 = st.tabs(["📋 Summary", "🔧 JSON Details"])
-                                        
-                                        with tab1:
-                                            st.markdown(f"Product ID: `{product.get('product_id', 'N/A')}`")
-                                            st.markdown(f"Catalog ID: `{product.get('catalog_id', 'N/A')}`")
-                                            serving_price = product.get('pricing', {}).get('serving_price')
-                                            if serving_price:
-                                                st.markdown(f"**Serving Price:** ₹{serving_price}")
-                                        
-                                        with tab2:
-                                            # Show original candidate details instead of enriched product
-                                            candidate = next(
-                                                (c for c in parsed if c.get("id") == product.get("catalog_id")),
-                                                product,
-                                            )
-                                            st.json(candidate)
-                                        st.markdown("---")
-                        else:
-                            st.info("No product details found for hero_pids.")
-                else:
-                    # Handle non-list or non-dict items
-                    with st.expander(f"Result for: {key}"):
-                        st.info("null")
-            except Exception as e:
-                with st.expander(f"Result for: {key}"):
-                    st.error(f"Could not parse result for {key}: {e}")
-                    st.text(value)
+    save_execution(
+        {
+            "feed_type": feed_type,
+            "environment": environment,
+            "user_id": user_id,
+            "user_context": user_context,
+            "config_source_type": config_source_type,
+            "grpc_transport": grpc_transport,
+            "response": stored_response,
+            "request": MessageToDict(debug_pb2.ExecuteDAGRequest(**request_kwargs)),
+            "result_keys": result_keys,
+            "tables": tables,
+            "enrichment": {},
+            "prefetch": prefetch,
+            "pages": pages,
+            "calls": calls,
+            "profile": profile,
+            "size_report": size_report,
+            "share_id": dag_share_id(request_kwargs),
+        }
+    )
+
+shared_id = st.query_params.get("share")
+if shared_id and shared_id != st.session_state.get("opened_share"):
+    st.session_state["opened_share"] = shared_id
+    if load_shared_execution(shared_id) is None:
+        st.warning(f"Shared execution {shared_id} is unknown or has expired.")
+
+store = _execution_store()
+if len(store):
+    execution_ids = store.ids()
+    if st.session_state.get("selected_execution") not in execution_ids:
+        st.session_state["selected_execution"] = execution_ids[0]
+    selected = st.selectbox("Execution", execution_ids, key="selected_execution")
+    execution = store.get(selected)
+    if execution.get("share_id") and execution["response"].Success:
+        # The address bar becomes the share link of the execution on screen
+        st.query_params["share"] = st.session_state["opened_share"] = execution["share_id"]
+        st.caption(f"Share this execution: `?share={execution['share_id']}` (the current address), "
+                   f"for {sharing.TTL // 3600} hours.")
+    render_execution(execution)
+    render_export(selected)
+    render_regression_case(selected)
+    render_memory_profile(execution, store)
+
+
+if thumbnail_server.service is not None:
+    with st.sidebar.expander("Thumbnails"):
+        st.caption(f"Cache: {thumbnail_server.service.cache.directory}")
+        st.json(thumbnail_server.service.cache.stats())
+elif thumbnail_server.error:
+    st.sidebar.caption(f"Thumbnail server unavailable ({thumbnail_server.error}); cards load full-size images.")
+
+with st.sidebar.expander("Shared executions"):
+    st.caption(f"Store: {sharing.get_shared_store().path}")
+    st.json(sharing.get_shared_store().stats())
+
+with st.sidebar.expander("Endpoints"):
+    st.caption(f"Routing table: {endpoint_registry.path}")
+    st.dataframe(endpoint_registry.status())
+    hedge_status = endpoint_registry.hedge_status()
+    if hedge_status:
+        st.caption("Hedged requests (p99 without hedging is estimated from first attempts)")
+        st.dataframe(hedge_status)
+
+if os.path.exists(DEFAULT_STORE_PATH):
+    with st.sidebar.expander("Regression runs"):
+        regression_store = RegressionStore(DEFAULT_STORE_PATH)
+        regressions = regression_store.regressions()
+        if regressions:
+            st.warning(f"{len(regressions)} recent regression(s)")
+            st.dataframe(regressions)
+        st.dataframe(regression_store.history())
+        regression_store.close()
+
+with st.sidebar.expander("Rerun latency"):
+    st.caption("Full script runs (`app`) against fragment runs, which is all an interaction inside a fragment reruns.")
+    st.dataframe([
+        {"scope": scope, "runs": len(samples), "last_ms": round(samples[-1] * 1000, 1),
+         "median_ms": round(sorted(samples)[len(samples) // 2] * 1000, 1)}
+        for scope, samples in st.session_state.get("run_times", {}).items()
+    ])
+
+record_run_time("app", time.perf_counter() - run_started)
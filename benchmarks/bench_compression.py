@@ -0,0 +1,114 @@
+"""
+Where compressing request and response bodies pays off.
+
+For JSON DAG results of growing size, measures gzip and deflate compression
+and decompression time and ratio, then reports the smallest payload at which
+the time saved on the wire exceeds the CPU spent at each link bandwidth. That
+size is what `DAG_DEBUGGER_COMPRESSION_MIN_BYTES` should be set to for the
+slowest link the debugger is used over. `--e2e` also times HTTP ExecuteDAG
+calls against the fake backends with and without response compression
+(loopback, so this shows the CPU cost only).
+
+Usage:
+    python -m benchmarks.bench_compression [--bandwidth-mbps 10 100 1000] [--repeat 5] [--e2e]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import debug.debug_pb2 as debug_pb2
+from benchmarks.synthetic import make_candidates
+from fakes.backends import FakeBackends
+from services import compression
+from services.transport import TRANSPORT_HTTP, get_transport
+
+# Approximate JSON size of one synthetic candidate
+CANDIDATE_BYTES = 205
+SIZES = [256 << (2 * i) for i in range(9)]  # 256 B .. 16 MB
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _payload(size: int) -> bytes:
+    candidates = make_candidates(max(1, size // CANDIDATE_BYTES))
+    body = json.dumps({"success": True, "results": {"node_0": candidates}}).encode()
+    return body[:size] if len(body) > size else body
+
+
+def measure(algorithm: str, repeat: int) -> List[Dict[str, float]]:
+    rows = []
+    for size in SIZES:
+        payload = _payload(size)
+        compressed = compression.compress(payload, algorithm)
+        rows.append({
+            "bytes": len(payload),
+            "compressed": len(compressed),
+            "compress_s": _best(lambda: compression.compress(payload, algorithm), repeat),
+            "decompress_s": _best(lambda: compression.decompress(compressed, algorithm), repeat),
+        })
+    return rows
+
+
+def crossover(rows: List[Dict[str, float]], bandwidth_mbps: float) -> Optional[int]:
+    """Smallest payload from which compression saves time at every larger size; None if it never does."""
+    bytes_per_second = bandwidth_mbps * 1e6 / 8
+    result = None
+    for row in reversed(rows):
+        saved = (row["bytes"] - row["compressed"]) / bytes_per_second
+        if saved <= row["compress_s"] + row["decompress_s"]:
+            break
+        result = int(row["bytes"])
+    return result
+
+
+def end_to_end(repeat: int) -> None:
+    request_kwargs = {"RawConfigJson": "{}", "Data": debug_pb2.DebugExecutionRequestData(UserId="1")}
+    transport = get_transport(TRANSPORT_HTTP)
+    print("\nHTTP ExecuteDAG over loopback (best of repeats):")
+    for candidates in (100, 1000, 10000, 50000):
+        timings = {}
+        for algorithm in (compression.NONE, compression.GZIP):
+            with FakeBackends(candidates=candidates, response_compression=algorithm) as backends:
+                def _call():
+                    response = transport.execute(request_kwargs, "RawConfigJson", "1", "logged_in",
+                                                 backends.http_address)
+                    assert response.Success, response.Error
+                    timings[algorithm] = response
+                latency = _best(_call, repeat)
+            wire = timings[algorithm].wire
+            print(f"  {candidates:>6} candidates, {algorithm:<7}: {latency * 1000:8.1f} ms,"
+                  f" {wire.response_bytes:>10} bytes on the wire, {wire.decompress_time * 1000:.1f} ms decompressing")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bandwidth-mbps", type=float, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--e2e", action="store_true", help="Also time calls against the fake backends")
+    args = parser.parse_args()
+
+    for algorithm in (compression.GZIP, compression.DEFLATE):
+        rows = measure(algorithm, args.repeat)
+        print(f"{algorithm} (zlib level {compression.LEVEL}):")
+        print(f"  {'bytes':>10} {'ratio':>6} {'compress ms':>12} {'decompress ms':>14}")
+        for row in rows:
+            print(f"  {int(row['bytes']):>10} {row['bytes'] / row['compressed']:>6.1f}"
+                  f" {row['compress_s'] * 1000:>12.3f} {row['decompress_s'] * 1000:>14.3f}")
+        for bandwidth in args.bandwidth_mbps:
+            size = crossover(rows, bandwidth)
+            verdict = f"from {size} bytes" if size is not None else "never, up to 16 MB"
+            print(f"  pays off at {bandwidth:g} Mbit/s: {verdict}")
+    if args.e2e:
+        end_to_end(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Tail latency of ExecuteDAG with and without hedged requests.
+
+Runs the same sequence of DAG executions against the fake backends twice,
+through an endpoint pool without and with a hedge policy. A share of the fake
+IOP's responses is slowed down, like a slow pod. The pool lists the fake's gRPC
+port under two addresses, so hedges go to "another endpoint". Reports p50, p99
+and max latency, and the extra requests the hedges cost.
+
+Usage:
+    python -m benchmarks.bench_hedging [--calls 1000] [--slow-share 0.03] [--slow-ms 200] [--percentile 95]
+"""
+import argparse
+import statistics
+import time
+from typing import List
+
+import debug.debug_pb2 as debug_pb2
+from fakes.backends import FakeBackends
+from services.dag_debug import call_execute_dag_routed
+from services.endpoints import EndpointPool
+from services.hedging import HedgePolicy
+
+FEED_TYPE = "for_you"
+CANDIDATES = 200
+
+
+def _request_kwargs():
+    return {
+        "ConfigKind": "FeedRead",
+        "Selector": debug_pb2.ConfigSelector(FeedType=FEED_TYPE, TenantCtx="organic", UserCtx="logged_in"),
+        "Data": debug_pb2.DebugExecutionRequestData(UserId="1", FeedType=FEED_TYPE, Limit=CANDIDATES),
+    }
+
+
+def _run(pool: EndpointPool, calls: int) -> List[float]:
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = call_execute_dag_routed(_request_kwargs(), "Selector", "1", "logged_in", FEED_TYPE, pool)
+        latencies.append(time.perf_counter() - start)
+        if not response.Success:
+            raise SystemExit(response.Error)
+    return latencies
+
+
+def _quantile(latencies: List[float], q: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--slow-share", type=float, default=0.03, help="share of IOP responses slowed down")
+    parser.add_argument("--slow-ms", type=float, default=200.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="latency of every IOP response")
+    parser.add_argument("--percentile", type=float, default=95.0, help="hedge after this latency percentile")
+    parser.add_argument("--budget", type=float, default=0.1, help="hedges per call")
+    args = parser.parse_args()
+
+    with FakeBackends(candidates=CANDIDATES, latency=args.latency_ms / 1000) as backends:
+        backends.iop.slow_share = args.slow_share
+        backends.iop.slow_latency = args.slow_ms / 1000
+        port = backends.grpc_address.rsplit(":", 1)[1]
+        addresses = [f"127.0.0.1:{port}", f"localhost:{port}"]
+        policy = HedgePolicy(percentile=args.percentile, budget=args.budget)
+        pools = {
+            "unhedged": EndpointPool("iop:bench", addresses),
+            "hedged": EndpointPool("iop:bench", addresses, hedge=policy),
+        }
+        print(f"{'':<10}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'requests':>10}")
+        for name, pool in pools.items():
+            before = backends.iop.requests
+            latencies = _run(pool, args.calls)
+            requests = backends.iop.requests - before
+            print(f"{name:<10}{statistics.median(latencies) * 1000:>9.1f}{_quantile(latencies, 0.99):>9.1f}"
+                  f"{max(latencies) * 1000:>9.1f}{requests:>10}")
+        print(f"hedge policy: {policy.status()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Replay large synthetic DAG responses through the memory instrumentation.
+
+Usage:
+    python -m benchmarks.bench_memory [--keys 8] [--candidates 20000] [--runs 5]
+"""
+import argparse
+import json
+
+from benchmarks.synthetic import make_results
+from services.candidates import tables_from_results
+from services.memory import SessionResultStore, deep_sizeof, profile_execution, result_size_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=8)
+    parser.add_argument("--candidates", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    store = SessionResultStore(budget_bytes=args.budget_mb * 1024 * 1024)
+    for run in range(args.runs):
+        results = make_results(args.keys, args.candidates, seed=run)
+        with profile_execution(trace=True) as profile:
+            parsed = {key: json.loads(value) for key, value in results.items()}
+            report = result_size_report(results)
+        serialized = sum(row["serialized_bytes"] for row in report)
+        parsed_bytes = sum(row["parsed_bytes"] for row in report)
+        evicted = store.add(f"run-{run}", (results, parsed), deep_sizeof(results) + deep_sizeof(parsed))
+        print(
+            f"run {run}: serialized={serialized / 1e6:.1f} MB parsed={parsed_bytes / 1e6:.1f} MB "
+            f"traced_peak={profile.traced_peak / 1e6:.1f} MB "
+            f"rss_after={(profile.rss_after or 0) / 1e6:.1f} MB time={profile.duration:.2f}s "
+            f"store={store.total_bytes / 1e6:.1f} MB evicted={evicted}"
+        )
+    tables, _ = tables_from_results(results)
+    slim_tables, _ = tables_from_results(results, keep_raw=False)
+    print(
+        f"last run footprint: dicts={deep_sizeof(parsed) / 1e6:.1f} MB "
+        f"compact={deep_sizeof(tables) / 1e6:.1f} MB compact_no_raw={deep_sizeof(slim_tables) / 1e6:.1f} MB"
+    )
+    print("Top allocation sites of the last run:")
+    for site, size in profile.top_allocations:
+        print(f"  {size / 1e6:8.2f} MB  {site}")
+
+
+if __name__ == "__main__":
+    main()
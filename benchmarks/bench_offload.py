@@ -0,0 +1,70 @@
+"""
+Parsing a large `Results` map on the page thread vs in worker processes.
+
+Measures `tables_from_results` against `offload.parse_results` and the HTTP body
+decode inline against `offload.call_bytes`. Worker start-up is measured
+separately, as the pool is created once per process. Speedup needs at least as
+many cores as result keys; on a single core the offloaded path is slower.
+
+Usage:
+    python -m benchmarks.bench_offload [--mb 50] [--keys 8] [--workers N] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import time
+
+from benchmarks.synthetic import make_results
+from services import offload
+from services.candidates import tables_from_results
+from services.transport import decode_http_body
+
+# Approximate JSON size of one synthetic candidate
+CANDIDATE_BYTES = 205
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=50)
+    parser.add_argument("--keys", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    per_key = int(args.mb * (1 << 20) / CANDIDATE_BYTES / args.keys)
+    results = make_results(args.keys, per_key)
+    size = sum(len(value) for value in results.values())
+    body = json.dumps({"success": True, "results": {key: json.loads(value) for key, value in results.items()}}).encode()
+    print(f"{args.keys} keys x {per_key} candidates = {size / (1 << 20):.1f} MB results,"
+          f" {len(body) / (1 << 20):.1f} MB HTTP body; {os.cpu_count()} cores, {args.workers} workers")
+
+    inline_parse = _best(lambda: tables_from_results(results, keep_raw=False), args.repeat)
+    inline_decode = _best(lambda: decode_http_body(body), args.repeat)
+
+    offload.configure(args.workers)
+    start = time.perf_counter()
+    # First job starts the workers; parse a small map to time just that
+    offload._get_pool().submit(int).result()
+    startup = time.perf_counter() - start
+    offload_parse = _best(lambda: offload.parse_results(results, keep_raw=False), args.repeat)
+    offload_decode = _best(lambda: offload.call_bytes(decode_http_body, body), args.repeat)
+    offload.configure(0)
+
+    print(f"worker start-up: {startup * 1000:.0f} ms (once per process)")
+    print(f"parse results:  inline {inline_parse * 1000:.0f} ms, offloaded {offload_parse * 1000:.0f} ms"
+          f" ({inline_parse / offload_parse:.2f}x)")
+    print(f"HTTP decode:    inline {inline_decode * 1000:.0f} ms, offloaded {offload_decode * 1000:.0f} ms"
+          f" ({inline_decode / offload_decode:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Time to first full render: per-key sequential enrichment vs background prefetch.
+
+Backends are simulated with fixed per-call latencies, so the numbers show the
+scheduling difference only.
+
+Usage:
+    python -m benchmarks.bench_prefetch [--keys 6] [--candidates 300] [--hero-ms 80] [--taxonomy-ms 120] [--pricing-ms 60]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic import make_results
+from services.candidates import tables_from_results
+from services.prefetch import EnrichmentPrefetch
+from services.resilience import Deadline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=6)
+    parser.add_argument("--candidates", type=int, default=300)
+    parser.add_argument("--max-display", type=int, default=100)
+    parser.add_argument("--hero-ms", type=float, default=80)
+    parser.add_argument("--taxonomy-ms", type=float, default=120)
+    parser.add_argument("--pricing-ms", type=float, default=60)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    def hero(ids, deadline=None):
+        time.sleep(args.hero_ms / 1000)
+        return {cid: str(cid * 10) for cid in ids}
+
+    def products(pids, deadline=None):
+        time.sleep(args.taxonomy_ms / 1000)
+        return [{"product_id": pid, "catalog_id": int(pid) // 10} for pid in pids]
+
+    def pricing(user_id, pdp_data, deadline=None):
+        time.sleep(args.pricing_ms / 1000)
+        return {pid: {"serving_price": "199"} for pid, _, _ in pdp_data}
+
+    results = make_results(args.keys, args.candidates)
+    # Overlapping keys, as DAG nodes usually share candidates
+    results = {key: json.dumps(json.loads(value)[: args.max_display] + json.loads(results["node_0"])[:20])
+               for key, value in results.items()}
+
+    tables, _ = tables_from_results(results)
+    start = time.perf_counter()
+    for table in tables.values():
+        ids = [item.id for item in table.records(0, args.max_display)]
+        pids = list(hero(ids).values())
+        details = products(pids)
+        pricing("1", [(d["product_id"], "source", "") for d in details])
+    sequential = time.perf_counter() - start
+
+    tables, _ = tables_from_results(results)
+    deadline = Deadline(60)
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        start = time.perf_counter()
+        prefetch = EnrichmentPrefetch(
+            executor, "1", hero, products, pricing,
+            stage_deadline=lambda stage: deadline, max_per_key=args.max_display,
+        )
+        prefetch.add(tables.values())
+        for table in tables.values():
+            prefetch.window(table)
+        prefetched = time.perf_counter() - start
+
+    print(f"keys={args.keys} display window={args.max_display}")
+    print(f"sequential per key: {sequential * 1000:8.1f} ms")
+    print(f"prefetch:           {prefetched * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
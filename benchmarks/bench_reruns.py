@@ -0,0 +1,76 @@
+"""
+Rerun latency of UI interactions with and without fragment-scoped reruns.
+
+Executes a DAG against the fake backends in a headless app session, then
+repeats interactions inside the result view (tracing a candidate, switching
+the export format). Each interaction is timed as a full script rerun, which
+is what every interaction cost before the result view was split into
+fragments, and as the run of the fragment it happens in, which is all a
+browser session reruns now. Fragment times come from the app's own
+`run_times` session state, the data behind the sidebar "Rerun latency" panel
+and the `script_run_seconds` metric.
+
+Usage:
+    python -m benchmarks.bench_reruns [--candidates 1000] [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+# The endpoint registry path is read on import; the fakes' addresses are written there once they are up
+WORK_DIR = tempfile.mkdtemp(prefix="bench_reruns_")
+ENDPOINTS_PATH = os.environ["DAG_DEBUGGER_ENDPOINTS"] = os.path.join(WORK_DIR, "endpoints.json")
+os.environ["DAG_DEBUGGER_SHARED_STORE"] = os.path.join(WORK_DIR, "shared.sqlite")
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from fakes.backends import FakeBackends  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+TRACE_LABEL = "Candidate IDs to trace (comma separated)"
+EXPORT_LABEL = "Format"
+
+
+def _widget(widgets, label: str):
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000, help="candidates per DAG node")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with FakeBackends(candidates=args.candidates) as backends:
+        backends.write_endpoints(ENDPOINTS_PATH)
+        app = AppTest.from_file(APP_PATH, default_timeout=300).run()
+        _widget(app.button, "Execute DAG").click().run()
+        if app.exception:
+            raise SystemExit(app.exception[0].value)
+
+        interactions = {
+            "trace": lambda i: _widget(app.text_input, TRACE_LABEL).input(str(100000 + i)),
+            "export": lambda i: _widget(app.radio, EXPORT_LABEL).set_value(
+                _widget(app.radio, EXPORT_LABEL).options[i % 2]
+            ),
+        }
+        print(f"{'interaction':<12}{'full rerun ms':>15}{'fragment ms':>13}{'speedup':>9}")
+        for scope, interact in interactions.items():
+            full = []
+            for i in range(args.repeat):
+                interact(i)
+                start = time.perf_counter()
+                app.run()
+                full.append(time.perf_counter() - start)
+            fragment = list(app.session_state["run_times"][scope])[-args.repeat:]
+            full_ms = statistics.median(full) * 1000
+            fragment_ms = statistics.median(fragment) * 1000
+            print(f"{scope:<12}{full_ms:>15.1f}{fragment_ms:>13.1f}{full_ms / max(fragment_ms, 0.001):>8.0f}x")
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
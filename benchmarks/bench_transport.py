@@ -0,0 +1,96 @@
+"""
+Serialization overhead of each ExecuteDAG transport for large FeedMetaData structs.
+
+Measures request encoding and response decoding only (no network), plus the
+previous HTTP encoding path (MessageToDict + regex key conversion) for reference.
+
+Usage:
+    python -m benchmarks.bench_transport [--entries 5000] [--candidates 5000] [--runs 5]
+"""
+import argparse
+import json
+import re
+import time
+
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.struct_pb2 import Struct
+
+import debug.debug_pb2 as debug_pb2
+from benchmarks.synthetic import make_feed_metadata, make_results
+from services.conversions import ALIAS_MAPPING, convert_floats_to_ints
+from services.transport import TRANSPORTS, get_transport
+
+
+def _legacy_camel_to_snake(name):
+    s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
+    s2 = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1)
+    return s2.lower()
+
+
+def _legacy_convert_keys_snake(obj):
+    if isinstance(obj, dict):
+        return {ALIAS_MAPPING.get(_legacy_camel_to_snake(k), _legacy_camel_to_snake(k)): _legacy_convert_keys_snake(v)
+                for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_legacy_convert_keys_snake(item) for item in obj]
+    return obj
+
+
+def _legacy_http_encode(request_kwargs):
+    data_dict = MessageToDict(request_kwargs["Data"], preserving_proto_field_name=True)
+    payload = {
+        "Data": _legacy_convert_keys_snake(convert_floats_to_ints(data_dict)),
+        "Path": _legacy_convert_keys_snake(MessageToDict(request_kwargs["Selector"], preserving_proto_field_name=True)),
+        "Meta": {"IsLoggingEnabled": True},
+    }
+    return json.dumps(payload, sort_keys=True).encode()
+
+
+def _best(fn, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5000, help="top-level FeedMetaData entries")
+    parser.add_argument("--keys", type=int, default=4)
+    parser.add_argument("--candidates", type=int, default=5000, help="candidates per result key")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    metadata = Struct()
+    metadata.update(make_feed_metadata(args.entries))
+    request_kwargs = {
+        "ConfigKind": "FeedRead",
+        "Selector": debug_pb2.ConfigSelector(FeedType="for_you", TenantCtx="organic", UserCtx="logged_in"),
+        "Data": debug_pb2.DebugExecutionRequestData(
+            UserId="1", FeedType="for_you", FeedMetaData=metadata, Limit=500
+        ),
+    }
+    results = make_results(args.keys, args.candidates)
+    bodies = {
+        "http": json.dumps({"results": {k: json.loads(v) for k, v in results.items()}}).encode(),
+        "grpc": debug_pb2.ExecuteDAGResponse(success=True, results=results).SerializeToString(),
+    }
+
+    legacy_time, legacy_body = _best(lambda: _legacy_http_encode(request_kwargs), args.runs)
+    print(f"{'transport':<16}{'encode ms':>12}{'request MB':>12}{'decode ms':>12}{'response MB':>13}")
+    print(f"{'http (legacy)':<16}{legacy_time * 1000:>12.1f}{len(legacy_body) / 1e6:>12.2f}{'':>12}{'':>13}")
+    for name in TRANSPORTS:
+        transport = get_transport(name)
+        encode_time, body = _best(lambda: transport.encode(request_kwargs, "Selector"), args.runs)
+        response_body = bodies["http" if name == "http" else "grpc"]
+        decode_time, _ = _best(lambda: transport.decode(response_body), args.runs)
+        print(
+            f"{name:<16}{encode_time * 1000:>12.1f}{len(body) / 1e6:>12.2f}"
+            f"{decode_time * 1000:>12.1f}{len(response_body) / 1e6:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
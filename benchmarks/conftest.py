@@ -0,0 +1,109 @@
+"""
+Fixtures of the pytest-benchmark suite: synthetic payloads and fake backends.
+
+Usage:
+    python -m pytest benchmarks --benchmark-compare=0001 --benchmark-compare-fail=median:25%
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.synthetic import (
+    PRICING_FEATURES,
+    make_feed_metadata,
+    make_pricing_payload,
+    make_results,
+    make_taxonomy_response,
+)
+from fakes.backends import FakeBackends, FakeEnrichment, hero_pid
+from services.candidates import CandidateTable, tables_from_results
+from services.endpoints import EndpointRegistry
+from services.prefetch import EnrichmentPrefetch
+from services.resilience import Deadline
+
+# Constants
+# Total candidates of a DAG response, spread over RESULT_KEYS nodes
+CANDIDATE_COUNTS = [10000, 50000]
+RESULT_KEYS = 5
+# Taxonomy is called in batches of 100 products; pricing with the display window of every key
+TAXONOMY_PRODUCTS = [100, 1000]
+PRICING_PRODUCTS = [100, 1000]
+FEED_METADATA_ENTRIES = 5000
+MAX_DISPLAY = 100
+E2E_CANDIDATES = 10000
+# Anchored to this directory, so baselines land in benchmarks/baselines from any working directory
+BASELINES = Path(__file__).resolve().parent / "baselines"
+DEFAULT_STORAGE = "file://./.benchmarks"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """Use BASELINES as the benchmark storage unless `--benchmark-storage` is given."""
+    if config.getoption("benchmark_storage", None) == DEFAULT_STORAGE:
+        config.option.benchmark_storage = f"file://{BASELINES}"
+
+
+@pytest.fixture(scope="session", params=CANDIDATE_COUNTS, ids=lambda count: f"{count // 1000}k")
+def results(request) -> Dict[str, str]:
+    return make_results(keys=RESULT_KEYS, candidates_per_key=request.param // RESULT_KEYS)
+
+
+@pytest.fixture(scope="session")
+def tables(results) -> Dict[str, CandidateTable]:
+    return tables_from_results(results, keep_raw=False)[0]
+
+
+@pytest.fixture(scope="session")
+def feed_metadata() -> Dict[str, Any]:
+    return make_feed_metadata(FEED_METADATA_ENTRIES)
+
+
+@pytest.fixture(scope="session", params=TAXONOMY_PRODUCTS, ids=lambda count: f"{count}p")
+def taxonomy_response(request) -> Dict[str, Any]:
+    return make_taxonomy_response(request.param)
+
+
+@pytest.fixture(scope="session", params=PRICING_PRODUCTS, ids=lambda count: f"{count}p")
+def pricing_payload(request):
+    return make_pricing_payload(request.param, PRICING_FEATURES)
+
+
+@pytest.fixture(scope="session")
+def executor():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        yield pool
+
+
+def in_memory_prefetch(executor, enrichment: FakeEnrichment) -> EnrichmentPrefetch:
+    """Prefetch whose backends answer from memory, so only its own bookkeeping is measured."""
+    def _products(pids: List[str], deadline: Deadline) -> List[Dict[str, Any]]:
+        taxonomy = enrichment.taxonomy(pids)
+        return [
+            {"catalog_id": catalog["id"], "catalog_name": catalog["name"], "product_id": str(catalog["id"] * 10 + 1),
+             "product_images": [catalog["image"]]}
+            for catalog in taxonomy["catalogs"]
+        ]
+
+    return EnrichmentPrefetch(
+        executor,
+        "1000001",
+        fetch_hero_pids=lambda ids, deadline: {cid: hero_pid(cid) for cid in ids},
+        fetch_products=_products,
+        fetch_pricing=lambda uid, pdp_data, deadline: {
+            pid: {"serving_price": price} for pid, price in enrichment.prices([pid for pid, _, _ in pdp_data]).items()
+        },
+        stage_deadline=lambda stage: Deadline(30),
+        max_per_key=MAX_DISPLAY,
+    )
+
+
+@pytest.fixture(scope="session")
+def backends():
+    """Fake backends, with the hero, taxonomy and pricing clients routed to them."""
+    with FakeBackends(candidates=E2E_CANDIDATES) as fakes, pytest.MonkeyPatch.context() as patch:
+        registry = EndpointRegistry(fakes.endpoints_config(), "fake backends")
+        for module in ("services.hero", "services.product", "services.pricing"):
+            patch.setattr(f"{module}.get_registry", lambda: registry)
+        yield fakes
@@ -0,0 +1,92 @@
+"""Synthetic payload generators shaped like production DAG, taxonomy and pricing responses."""
+import json
+import random
+from typing import Any, Dict, List
+
+from pricing import pricing_service_pb2
+
+SOURCES = ["ctr_model", "similar_catalogs", "trending", "personalised", "fallback"]
+PRICING_FEATURES = ["serving_price", "mrp", "discount_percent", "shipping_charges"]
+
+
+def make_candidates(count: int, seed: int = 0, id_offset: int = 100000) -> List[Dict[str, Any]]:
+    """Candidate dicts as returned in a `Results` value of a FeedRead DAG."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": id_offset + i,
+            "score": round(rng.random(), 6),
+            "source": rng.choice(SOURCES),
+            "sscat_id": rng.randint(1000, 1400),
+            "features": {
+                "ctr": round(rng.random(), 4),
+                "cvr": round(rng.random(), 4),
+                "price_bucket": rng.randint(1, 10),
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def make_results(keys: int = 8, candidates_per_key: int = 5000, seed: int = 0) -> Dict[str, str]:
+    """A `Results` map of JSON-encoded candidate lists, one per DAG node."""
+    return {
+        f"node_{k}": json.dumps(make_candidates(candidates_per_key, seed=seed + k, id_offset=100000 + k * 997))
+        for k in range(keys)
+    }
+
+
+def make_feed_metadata(entries: int = 5000, seed: int = 0) -> Dict[str, Any]:
+    """A camelCase `FeedMetaData` struct with nested objects and integral floats."""
+    rng = random.Random(seed)
+    return {
+        f"filterGroup{i}": {
+            "sscatId": float(rng.randint(1000, 1400)),
+            "priceRange": [float(rng.randint(100, 500)), float(rng.randint(500, 5000))],
+            "boostWeight": round(rng.random(), 4),
+            "catalogIds": [float(rng.randint(10 ** 6, 10 ** 8)) for _ in range(5)],
+            "isActive": rng.random() > 0.5,
+        }
+        for i in range(entries)
+    }
+
+
+def make_taxonomy_response(products: int = 100, seed: int = 0) -> Dict[str, Any]:
+    """A taxonomy aggregation response body with one catalog and one product per product ID."""
+    rng = random.Random(seed)
+    catalogs, items = [], []
+    for i in range(products):
+        cid = 100000 + i
+        sscat = rng.randint(1000, 1400)
+        catalogs.append({
+            "id": cid,
+            "name": f"Catalog {cid}",
+            "old_category": {"sub_sub_category_id": sscat, "sub_sub_category_name": f"SSCat {sscat}"},
+            "image": f"https://images.example.com/catalog_{cid}.jpg",
+        })
+        items.append({
+            "id": str(cid * 10 + 1),
+            "catalog_id": cid,
+            "images": [f"https://images.example.com/product_{cid * 10 + 1}_{k}.jpg" for k in range(3)],
+        })
+    rng.shuffle(items)
+    return {"catalogs": catalogs, "products": items}
+
+
+def make_pricing_payload(
+    products: int = 100,
+    features: List[str] = PRICING_FEATURES,
+    seed: int = 0,
+) -> pricing_service_pb2.EntityPayload:
+    """A pricing `EntityPayload`: a header row, then one row of feature values per product."""
+    rng = random.Random(seed)
+    header = ["user_id", "product_id"] + [f"real_time_product_pricing:{feature}" for feature in features]
+    rows = [
+        ["1000001", str((100000 + i) * 10 + 1)] + [str(rng.randint(99, 4999)) for _ in features]
+        for i in range(products)
+    ]
+    return pricing_service_pb2.EntityPayload(
+        entityLabel="user_product",
+        data=[pricing_service_pb2.EntityPayload.Data(features=row) for row in [header] + rows],
+        keySize=2,
+    )
@@ -0,0 +1,87 @@
+"""
+End-to-end benchmarks against the fake backends on local ports: DAG execution
+over every transport, hero, taxonomy and pricing calls, and a full
+execute -> parse -> enrich pipeline.
+
+Usage:
+    python -m pytest benchmarks/test_end_to_end.py
+"""
+import pytest
+
+import debug.debug_pb2 as debug_pb2
+from benchmarks.conftest import E2E_CANDIDATES, MAX_DISPLAY
+from benchmarks.synthetic import PRICING_FEATURES
+from fakes.backends import hero_pid
+from services.candidates import tables_from_results
+from services.hero import get_heroPids_batch
+from services.pricing import get_pricing_features
+from services.product import fetch_product_details
+from services.prefetch import EnrichmentPrefetch
+from services.resilience import Deadline
+from services.transport import TRANSPORT_GRPC, TRANSPORT_GRPC_AIO, TRANSPORT_HTTP, get_transport
+
+# Constants
+ENRICHMENT_BATCH = 100
+CATALOG_IDS = [100000 + i for i in range(ENRICHMENT_BATCH)]
+
+
+def _request_kwargs(feed_type: str):
+    return {
+        "ConfigKind": "FeedRead",
+        "Selector": debug_pb2.ConfigSelector(FeedType=feed_type, TenantCtx="organic", UserCtx="logged_in"),
+        "Data": debug_pb2.DebugExecutionRequestData(UserId="1", FeedType=feed_type, Limit=E2E_CANDIDATES),
+    }
+
+
+def _execute(transport_name: str, backends):
+    address = backends.http_address if transport_name == TRANSPORT_HTTP else backends.grpc_address
+    feed_type = "catalog_listing_page" if transport_name == TRANSPORT_HTTP else "for_you"
+    response = get_transport(transport_name).execute(
+        _request_kwargs(feed_type), "Selector", "1", "logged_in", address
+    )
+    assert response.Success, response.Error
+    return response
+
+
+@pytest.mark.parametrize("transport_name", [TRANSPORT_HTTP, TRANSPORT_GRPC, TRANSPORT_GRPC_AIO])
+def test_execute_dag(benchmark, backends, transport_name):
+    response = benchmark(_execute, transport_name, backends)
+    assert response.Results
+
+
+def test_hero_pids(benchmark, backends):
+    hero_pids = benchmark(get_heroPids_batch, CATALOG_IDS)
+    assert hero_pids[CATALOG_IDS[0]] == hero_pid(CATALOG_IDS[0])
+
+
+def test_product_details(benchmark, backends):
+    products = benchmark(fetch_product_details, [hero_pid(cid) for cid in CATALOG_IDS])
+    assert len(products) == ENRICHMENT_BATCH
+
+
+def test_pricing_features(benchmark, backends):
+    pdp_data = [(hero_pid(cid), "source", "") for cid in CATALOG_IDS]
+    pricing = benchmark(get_pricing_features, "1", pdp_data, "android", "110001", "500", PRICING_FEATURES)
+    assert len(pricing) == ENRICHMENT_BATCH
+
+
+def test_execute_and_enrich(benchmark, backends, executor):
+    def _pipeline():
+        response = _execute(TRANSPORT_GRPC, backends)
+        tables, _ = tables_from_results(response.Results, keep_raw=False)
+        prefetch = EnrichmentPrefetch(
+            executor,
+            "1",
+            fetch_hero_pids=get_heroPids_batch,
+            fetch_products=fetch_product_details,
+            fetch_pricing=lambda uid, pdp_data, deadline: get_pricing_features(
+                uid, pdp_data, "android", "110001", "500", PRICING_FEATURES, deadline=deadline
+            ),
+            stage_deadline=lambda stage: Deadline(30),
+            max_per_key=MAX_DISPLAY,
+        )
+        prefetch.add(tables.values())
+        return [prefetch.window(table) for table in tables.values()]
+
+    windows = benchmark.pedantic(_pipeline, rounds=5)
+    assert windows and all(products and not degraded for products, degraded in windows)
@@ -0,0 +1,140 @@
+"""
+Offline benchmarks of the CPU-bound hot paths: conversions, taxonomy and pricing
+response processing, and the data preparation behind result rendering.
+
+Usage:
+    python -m pytest benchmarks/test_hot_paths.py
+"""
+import copy
+import json
+
+import debug.debug_pb2 as debug_pb2
+from benchmarks.conftest import MAX_DISPLAY, in_memory_prefetch
+from benchmarks.synthetic import PRICING_FEATURES
+from fakes.backends import FakeEnrichment, hero_pid
+from services.analytics import candidate_columns, duplicate_stats, overlap_stats
+from services.candidates import tables_from_results
+from services.conversions import convert_floats_to_ints, convert_keys_snake
+from services.pricing import _build_entity_ids, _process_response
+from services.product import _enrich_with_product_data, _process_catalog_data
+from services.search import SORT_PRICE, CandidateIndex
+from services.trace import DagTrace, dag_dot
+from services.transport import TRANSPORT_GRPC, TRANSPORT_HTTP, get_transport
+
+
+def test_convert_keys_snake(benchmark, feed_metadata):
+    converted = benchmark(convert_keys_snake, feed_metadata)
+    assert "filter_group0" in converted
+
+
+def test_convert_floats_to_ints(benchmark, feed_metadata):
+    converted = benchmark(convert_floats_to_ints, feed_metadata)
+    assert isinstance(converted["filterGroup0"]["sscatId"], int)
+
+
+def test_process_catalog_data(benchmark, taxonomy_response):
+    catalogs = taxonomy_response["catalogs"]
+    results = benchmark(_process_catalog_data, catalogs)
+    assert len(results) == len(catalogs)
+
+
+def test_enrich_with_product_data(benchmark, taxonomy_response):
+    catalog_results = _process_catalog_data(taxonomy_response["catalogs"])
+    products = taxonomy_response["products"]
+
+    def _setup():
+        # Enrichment mutates the catalog results in place
+        return (copy.deepcopy(catalog_results), products), {}
+
+    results = benchmark.pedantic(_enrich_with_product_data, setup=_setup, rounds=20)
+    assert all(item["product_id"] == str(item["catalog_id"] * 10 + 1) for item in results)
+
+
+def test_process_pricing_response(benchmark, pricing_payload):
+    pdp_data = [(row.features[1], "source", "") for row in pricing_payload.data[1:]]
+    entity_ids = _build_entity_ids("1000001", pdp_data)
+    pricing = benchmark(_process_response, pricing_payload, entity_ids, PRICING_FEATURES)
+    assert len(pricing) == len(pdp_data)
+
+
+def test_decode_http_response(benchmark, results):
+    body = json.dumps({"success": True, "results": {k: json.loads(v) for k, v in results.items()}}).encode()
+    decoded = benchmark(get_transport(TRANSPORT_HTTP).decode, body)
+    assert set(decoded) == set(results)
+
+
+def test_decode_grpc_response(benchmark, results):
+    body = debug_pb2.ExecuteDAGResponse(success=True, results=results).SerializeToString()
+    decoded = benchmark(get_transport(TRANSPORT_GRPC).decode, body)
+    assert set(decoded) == set(results)
+
+
+def test_tables_from_results(benchmark, results):
+    tables, rest = benchmark(tables_from_results, results, False)
+    assert len(tables) == len(results) and not rest
+
+
+def test_dag_trace(benchmark, tables):
+    trace = benchmark(DagTrace, tables)
+    assert len(trace.summary()) == len(tables)
+
+
+def test_dag_dot(benchmark, tables):
+    keys = list(tables)
+    edges = {src: [dst] for src, dst in zip(keys, keys[1:])}
+    source = benchmark(dag_dot, edges, tables)
+    assert source.count("->") == len(keys) - 1
+
+
+def test_prefetch_window(benchmark, executor, tables):
+    enrichment = FakeEnrichment()
+
+    def _setup():
+        # A fresh prefetch per round, so every round enriches the whole display window
+        return (in_memory_prefetch(executor, enrichment),), {}
+
+    def _render(prefetch):
+        return [prefetch.window(table, MAX_DISPLAY) for table in tables.values()]
+
+    windows = benchmark.pedantic(_render, setup=_setup, rounds=10)
+    assert all(len(products) == MAX_DISPLAY and not degraded for products, degraded in windows)
+
+
+def _enriched_index(tables, enrichment: FakeEnrichment, per_key: int = MAX_DISPLAY) -> CandidateIndex:
+    index = CandidateIndex(tables)
+    hero_pids = {table.id_at(row): hero_pid(table.id_at(row)) for table in tables.values() for row in range(per_key)}
+    taxonomy = enrichment.taxonomy(list(hero_pids.values()))
+    products = {
+        str(catalog["id"] * 10 + 1): {"catalog_name": catalog["name"],
+                                       "sscat_name": catalog["old_category"]["sub_sub_category_name"]}
+        for catalog in taxonomy["catalogs"]
+    }
+    pricing = {pid: {"serving_price": price} for pid, price in enrichment.prices(list(products)).items()}
+    index.add_enrichment(hero_pids, products, pricing)
+    return index
+
+
+def test_build_search_index(benchmark, tables):
+    index = benchmark(CandidateIndex, tables)
+    assert len(index) == sum(len(table) for table in tables.values())
+
+
+def test_search(benchmark, tables):
+    index = _enriched_index(tables, FakeEnrichment())
+    result = benchmark(index.search, "sscat 1", None, 100.0, 800.0, SORT_PRICE, True)
+    assert result.total
+
+
+def test_candidate_columns(benchmark, tables):
+    columns = benchmark(candidate_columns, tables)
+    assert len(columns) == sum(len(table) for table in tables.values())
+
+
+def test_duplicate_and_overlap_stats(benchmark, tables):
+    columns = candidate_columns(tables)
+
+    def _stats():
+        return duplicate_stats(columns), overlap_stats(columns)
+
+    duplicates, overlap = benchmark(_stats)
+    assert len(duplicates) == len(tables) + 1 and len(overlap) == len(tables) * (len(tables) - 1) // 2
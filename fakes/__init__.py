@@ -0,0 +1 @@
+"""In-process fake IOP, hero, taxonomy, pricing and PDP feed backends for local runs."""
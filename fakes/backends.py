@@ -0,0 +1,400 @@
+"""
+Fake backends serving synthetic but deterministic responses.
+
+One gRPC server hosts DAGDebugService, PricingFeatureRetrievalService and
+PdpFeedHandler; one HTTP server answers the HTTP IOP, hero and taxonomy paths
+and serves full-size product images.
+The same request always gets the same candidates, so runs are comparable;
+`latency`, `jitter`, `slow_share`, `drift` and `error_rate` on `FakeBackends.iop` can be
+changed while the servers run to simulate regressions.
+
+Usage:
+    python -m fakes.backends [--output fakes/endpoints.json] [--latency-ms 20] [--compression gzip]
+    DAG_DEBUGGER_ENDPOINTS=fakes/endpoints.json streamlit run app.py
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import grpc
+from PIL import Image
+
+import debug.debug_pb2 as debug_pb2
+import debug.debug_pb2_grpc as debug_pb2_grpc
+from benchmarks.synthetic import make_candidates
+from pricing import pricing_service_pb2, pricing_service_pb2_grpc
+from services import compression, pdp_feed
+from services.product import TAXONOMY_API_PATH
+from services.hero import HERO_API_PATH
+from services.transport import HTTP_FEED_TYPES
+
+# Constants
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_CANDIDATES = 200
+IOP_HTTP_PATH = "/debug/dag/execute"
+IMAGE_PATH = "/images/"
+IMAGE_SIZE = 1200
+ENVIRONMENTS = ["pre-prod", "prod"]
+GRPC_FEED_TYPES = ["for_you", "catalog_recommendation"]
+# Node outputs of the fake DAG, in execution order
+DAG_NODES = ["candidate_generation", "filter", "ranking"]
+# Candidates scoring below this are dropped by the fake filter node
+FILTER_SCORE = 0.25
+# Share of a request's simulated latency reported as spent in each node
+NODE_LATENCY_SHARES = {"candidate_generation": 0.3, "filter": 0.1, "ranking": 0.6}
+SERVER_WORKERS = 16
+
+
+class FakeIop:
+    """Synthetic three-node DAG: candidate generation -> score filter -> ranking."""
+
+    def __init__(self, candidates: int = DEFAULT_CANDIDATES, latency: float = 0.0, pages: int = 1):
+        self.candidates = candidates
+        self.latency = latency
+        # Extra latency drawn uniformly from [0, jitter] per request
+        self.jitter = 0.0
+        # Share of requests delayed by another `slow_latency`, like a slow pod or a GC pause
+        self.slow_share = 0.0
+        self.slow_latency = 0.0
+        # Share of the ranking replaced by candidates the filter dropped
+        self.drift = 0.0
+        self.error_rate = 0.0
+        self.pages = pages
+        self.requests = 0
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+
+    def execute(self, identity: str, cursor: str = "", limit: int = 0) -> Tuple[Dict[str, Any], str]:
+        """
+        Node outputs for one request.
+
+        Args:
+            identity: Stable request identity (config, user, feed context); seeds the candidates
+            cursor: Page number as a string; empty for the first page
+            limit: Candidates per page; the configured default when 0
+
+        Returns:
+            (node -> candidate list plus a "cursor" entry when more pages follow,
+            debug_config JSON with the DAG and per-node timings)
+
+        Raises:
+            RuntimeError: For the share of requests picked by `error_rate`
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._rng.uniform(0.0, self.jitter)
+            if self._rng.random() < self.slow_share:
+                delay += self.slow_latency
+            failed = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise RuntimeError("fake IOP error")
+
+        seed = int(hashlib.sha1(identity.encode()).hexdigest()[:8], 16)
+        page = int(cursor or 0)
+        count = limit or self.candidates
+        # Per-node timings: the node's work here plus its share of the simulated latency
+        marks = [time.perf_counter()]
+        generated = make_candidates(count * 2, seed=seed + page, id_offset=100000 + page * count * 2)
+        marks.append(time.perf_counter())
+        kept = [c for c in generated if c["score"] >= FILTER_SCORE][:count]
+        dropped = [c for c in generated if c["score"] < FILTER_SCORE]
+        marks.append(time.perf_counter())
+        ranked = sorted(kept, key=lambda c: (-c["features"]["ctr"], c["id"]))
+        shifted = min(int(len(ranked) * self.drift), len(dropped))
+        if shifted:
+            ranked = dropped[:shifted] + ranked[:len(ranked) - shifted]
+        marks.append(time.perf_counter())
+
+        results: Dict[str, Any] = dict(zip(DAG_NODES, (generated, kept, ranked)))
+        if page + 1 < self.pages:
+            results["cursor"] = str(page + 1)
+        node_timings = {
+            node: {"duration_ms": round((end - start + delay * NODE_LATENCY_SHARES[node]) * 1000, 3)}
+            for node, start, end in zip(DAG_NODES, marks, marks[1:])
+        }
+        debug_config = json.dumps({
+            "dag_config": {src: [dst] for src, dst in zip(DAG_NODES, DAG_NODES[1:])},
+            "node_timings": node_timings,
+        })
+        return results, debug_config
+
+
+class FakeEnrichment:
+    """Hero PIDs, taxonomy products, images and prices derived from the IDs themselves."""
+
+    def __init__(self, latency: float = 0.0, image_base: str = "https://images.fake.local"):
+        self.latency = latency
+        self.image_base = image_base
+        # Catalog IDs that get every hero batch containing them rejected (422), like a malformed ID
+        self.failing_hero_ids: Set[Any] = set()
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def hero(self, catalog_ids: List[Any]) -> Dict[str, Any]:
+        """
+        Raises:
+            ValueError: If the batch contains one of `failing_hero_ids`
+        """
+        self._wait()
+        if self.failing_hero_ids.intersection(catalog_ids):
+            raise ValueError("fake hero rejected the batch")
+        return {"data": [{"catalog_id": cid, "hero_product": hero_pid(cid)} for cid in catalog_ids]}
+
+    def taxonomy(self, product_ids: List[str]) -> Dict[str, Any]:
+        self._wait()
+        catalogs, products = [], []
+        for pid in product_ids:
+            cid = int(pid) // 10
+            sscat = 1000 + cid % 400
+            catalogs.append({
+                "id": cid,
+                "name": f"Catalog {cid}",
+                "old_category": {"sub_sub_category_id": sscat, "sub_sub_category_name": f"SSCat {sscat}"},
+                "image": f"{self.image_base}{IMAGE_PATH}catalog_{cid}.jpg",
+            })
+            products.append({"id": pid, "catalog_id": cid, "images": [f"{self.image_base}{IMAGE_PATH}product_{pid}.jpg"]})
+        return {"catalogs": catalogs, "products": products}
+
+    def image(self, name: str) -> bytes:
+        """A full-size JPEG in a colour derived from `name`."""
+        digest = hashlib.sha1(name.encode()).digest()
+        out = io.BytesIO()
+        Image.new("RGB", (IMAGE_SIZE, IMAGE_SIZE), tuple(digest[:3])).save(out, format="JPEG", quality=95)
+        return out.getvalue()
+
+    def prices(self, product_ids: List[str]) -> Dict[str, str]:
+        self._wait()
+        return {pid: str(99 + int(pid) % 900) for pid in product_ids}
+
+
+def hero_pid(catalog_id: Any) -> str:
+    return str(int(catalog_id) * 10 + 1)
+
+
+class _DagService(debug_pb2_grpc.DAGDebugServiceServicer):
+    def __init__(self, iop: FakeIop):
+        self.iop = iop
+
+    def ExecuteDAG(self, request, context):
+        source = request.WhichOneof("ConfigSource")
+        config = request.RawConfigJson if source == "RawConfigJson" else str(request.Selector)
+        identity = "|".join([config, request.Data.UserId, request.Data.FeedContext])
+        try:
+            results, debug_config = self.iop.execute(identity, request.Data.Cursor, request.Data.Limit)
+        except RuntimeError as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        return debug_pb2.ExecuteDAGResponse(
+            success=True,
+            results={key: value if isinstance(value, str) else json.dumps(value) for key, value in results.items()},
+            debug_config=debug_config,
+        )
+
+
+class _PricingService(pricing_service_pb2_grpc.PricingFeatureRetrievalServiceServicer):
+    def __init__(self, enrichment: FakeEnrichment):
+        self.enrichment = enrichment
+
+    def retrieveFeatures(self, request, context):
+        keys = [{key.type: key.value for key in entity.keys} for entity in request.ids]
+        prices = self.enrichment.prices([key.get("product_id", "0") for key in keys])
+        header = ["user_id", "product_id", "real_time_product_pricing:serving_price"]
+        rows = [[key.get("user_id", ""), key.get("product_id", ""), prices[key.get("product_id", "0")]] for key in keys]
+        return pricing_service_pb2.EntityPayload(
+            entityLabel=request.label,
+            data=[pricing_service_pb2.EntityPayload.Data(features=row) for row in [header] + rows],
+            keySize=2,
+        )
+
+
+class _PdpFeedService(pdp_feed.api_pb2_grpc.PdpFeedHandlerServicer):
+    def __init__(self, iop: FakeIop):
+        self.iop = iop
+
+    def FetchPdpFeed(self, request, context):
+        identity = f"pdp|{request.catalog_id}|{request.feed_context}"
+        try:
+            results, _ = self.iop.execute(identity, request.cursor, request.limit)
+        except RuntimeError as e:
+            return pdp_feed.response_pb2.RecommendationResponse(error=str(e))
+        return pdp_feed.response_pb2.RecommendationResponse(catalogs=[
+            pdp_feed.response_pb2.CatalogDTO(id=c["id"], hero_pid=int(hero_pid(c["id"])), source=c["source"])
+            for c in results[DAG_NODES[-1]]
+        ])
+
+
+def _http_handler(iop: FakeIop, enrichment: FakeEnrichment, response_compression: str):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if not self.path.startswith(IMAGE_PATH):
+                self.send_error(404)
+                return
+            data = enrichment.image(self.path[len(IMAGE_PATH):])
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                body = compression.decompress(body, self.headers.get("Content-Encoding", ""))
+            except ValueError as e:
+                self.send_error(415, str(e))
+                return
+            payload = json.loads(body or b"{}")
+            if self.path == IOP_HTTP_PATH:
+                status, body = self._execute(payload)
+            elif self.path == HERO_API_PATH:
+                try:
+                    status, body = 200, enrichment.hero(payload.get("catalog_ids", []))
+                except ValueError as e:
+                    status, body = 422, {"error": str(e)}
+            elif self.path == TAXONOMY_API_PATH:
+                status, body = 200, enrichment.taxonomy(payload.get("product_ids", []))
+            else:
+                status, body = 404, {"error": f"unknown path {self.path}"}
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            accepted = {encoding.strip() for encoding in self.headers.get("Accept-Encoding", "").split(",")}
+            if response_compression != compression.NONE and response_compression in accepted:
+                data = compression.compress(data, response_compression)
+                self.send_header("Content-Encoding", response_compression)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _execute(self, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+            data = payload.get("Data", {})
+            config = payload.get("raw_config", payload.get("Path"))
+            identity = "|".join([json.dumps(config, sort_keys=True), str(data.get("user_id", "")),
+                                 str(data.get("feed_context", ""))])
+            try:
+                results, debug_config = iop.execute(identity, str(data.get("cursor", "")), int(data.get("limit", 0)))
+            except RuntimeError as e:
+                return 503, {"success": False, "error": str(e)}
+            return 200, {"success": True, "results": results, "debug_config": debug_config}
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class FakeBackends:
+    """
+    Every backend the debugger calls, on local ports.
+
+    Use as a context manager; `endpoints_config()` is a registry config routing
+    every service of both environments to the fakes.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, candidates: int = DEFAULT_CANDIDATES, latency: float = 0.0,
+                 response_compression: str = compression.NONE):
+        self.host = host
+        # Encoding of responses to clients that accept it, over both gRPC and HTTP
+        self.response_compression = response_compression
+        self.iop = FakeIop(candidates, latency)
+        self.enrichment = FakeEnrichment()
+        self.grpc_address = ""
+        self.http_address = ""
+        self._grpc_server: Optional[grpc.Server] = None
+        self._http_server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "FakeBackends":
+        server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=SERVER_WORKERS),
+            compression=compression.GRPC_COMPRESSION[self.response_compression],
+        )
+        debug_pb2_grpc.add_DAGDebugServiceServicer_to_server(_DagService(self.iop), server)
+        pricing_service_pb2_grpc.add_PricingFeatureRetrievalServiceServicer_to_server(
+            _PricingService(self.enrichment), server
+        )
+        pdp_feed.api_pb2_grpc.add_PdpFeedHandlerServicer_to_server(_PdpFeedService(self.iop), server)
+        port = server.add_insecure_port(f"{self.host}:0")
+        server.start()
+        self._grpc_server, self.grpc_address = server, f"{self.host}:{port}"
+
+        http_server = ThreadingHTTPServer(
+            (self.host, 0), _http_handler(self.iop, self.enrichment, self.response_compression)
+        )
+        http_server.daemon_threads = True
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        self._http_server, self.http_address = http_server, f"{self.host}:{http_server.server_address[1]}"
+        self.enrichment.image_base = f"http://{self.http_address}"
+        return self
+
+    def stop(self) -> None:
+        if self._grpc_server is not None:
+            self._grpc_server.stop(grace=None)
+            self._grpc_server = None
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+    def __enter__(self) -> "FakeBackends":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def endpoints_config(self) -> Dict[str, Any]:
+        services: Dict[str, Any] = {}
+        for environment in ENVIRONMENTS:
+            for feed_type in GRPC_FEED_TYPES:
+                services[f"iop:{environment}:{feed_type}"] = {"endpoints": [self.grpc_address]}
+            for feed_type in HTTP_FEED_TYPES:
+                services[f"iop:{environment}:{feed_type}"] = {"endpoints": [self.http_address]}
+            services[f"pdp_feed:{environment}"] = {"endpoints": [self.grpc_address]}
+        services["hero"] = {"endpoints": [f"http://{self.http_address}"]}
+        services["taxonomy"] = {"endpoints": [f"http://{self.http_address}"]}
+        services["pricing"] = {"endpoints": [self.grpc_address]}
+        return {"services": services}
+
+    def write_endpoints(self, path: str) -> str:
+        with open(path, "w") as f:
+            json.dump(self.endpoints_config(), f, indent=2)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--output", default="fakes/endpoints.json", help="Endpoints config to write")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--enrichment-latency-ms", type=float, default=0.0)
+    parser.add_argument("--compression", choices=compression.ALGORITHMS, default=compression.NONE,
+                        help="Compress responses to clients that accept it")
+    args = parser.parse_args()
+
+    backends = FakeBackends(args.host, args.candidates, args.latency_ms / 1000, args.compression)
+    backends.iop.pages = args.pages
+    backends.enrichment.latency = args.enrichment_latency_ms / 1000
+    with backends:
+        backends.write_endpoints(args.output)
+        print(f"gRPC backends on {backends.grpc_address}, HTTP backends on {backends.http_address}")
+        print(f"DAG_DEBUGGER_ENDPOINTS={args.output} streamlit run app.py")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+import io
+import math
+from array import array
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+
+from services.candidates import CandidateTable
+from services.resilience import BackendUnavailable, Deadline, PartialFailure
+
+# Constants
+FIELD_SSCAT = "sscat"
+FIELD_PRICE = "price"
+FIELDS = [FIELD_SSCAT, FIELD_PRICE]
+PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+HISTOGRAM_BINS = 20
+TOP_SSCATS = 20
+ALL_KEYS = "(all keys)"
+# Catalog IDs per lazy enrichment task, as in the display prefetch; tasks run concurrently on the executor
+CHUNK_SIZE = 100
+MISSING_HERO = "N/A"
+PRICE_FEATURE = "serving_price"
+# Only the SSCat of each candidate is parsed from its stored JSON; other fields are skipped unparsed
+_CANDIDATE_SSCAT = pa_json.ParseOptions(
+    explicit_schema=pa.schema([pa.field("sscat_id", pa.int64())]),
+    unexpected_field_behavior="ignore",
+)
+
+
+def _int_column(values: array, arrow_type: pa.DataType) -> pa.Array:
+    """Zero-copy Arrow view of a typed array."""
+    return pa.Array.from_buffers(arrow_type, len(values), [None, pa.py_buffer(values)])
+
+
+def _id_array(ids: List[Any], int_ids: bool) -> pa.Array:
+    if int_ids:
+        return pa.array(ids, pa.int64())
+    return pa.array([None if cid is None else str(cid) for cid in ids], pa.string())
+
+
+def candidate_columns(tables: Dict[str, CandidateTable]) -> pa.Table:
+    """
+    Every candidate of every result key as one Arrow table.
+
+    Columns are `key`, `rank`, `id` (int64, or string if any key has
+    non-integer IDs; null for candidates without one), `score` (null if
+    missing) and `sscat_id` as returned with the candidate (null unless the
+    DAG returns it and the raw candidates were kept).
+    """
+    int_ids = all(table.int_ids for table in tables.values())
+    chunks = []
+    for key, table in tables.items():
+        count = len(table)
+        if int_ids:
+            ids = _int_column(table.ids, pa.int64())
+            missing = pc.cast(_int_column(table.missing, pa.uint8()), pa.bool_())
+            ids = pc.if_else(missing, pa.scalar(None, pa.int64()), ids)
+        else:
+            ids = _id_array([table.id_at(row) for row in range(count)], int_ids)
+        scores = _int_column(table.scores, pa.float64())
+        chunks.append(pa.table({
+            "key": pa.repeat(pa.scalar(key, pa.string()), count),
+            "rank": pa.array(range(1, count + 1), pa.int32()),
+            "id": ids,
+            "score": pc.if_else(pc.is_nan(scores), pa.scalar(None, pa.float64()), scores),
+            "sscat_id": _candidate_sscats(table),
+        }))
+    if not chunks:
+        return pa.table({
+            "key": pa.array([], pa.string()), "rank": pa.array([], pa.int32()), "id": pa.array([], pa.int64()),
+            "score": pa.array([], pa.float64()), "sscat_id": pa.array([], pa.int64()),
+        })
+    return pa.concat_tables(chunks)
+
+
+def _candidate_sscats(table: CandidateTable) -> pa.Array:
+    """`sscat_id` of each candidate from its stored JSON; all null if unavailable or not an integer."""
+    raw = table.raw_json()
+    if raw:
+        try:
+            parsed = pa_json.read_json(io.BytesIO("\n".join(raw).encode()), parse_options=_CANDIDATE_SSCAT)
+            return parsed["sscat_id"].combine_chunks()
+        except pa.ArrowInvalid:
+            pass
+    return pa.nulls(len(table), pa.int64())
+
+
+def duplicate_stats(columns: pa.Table) -> pa.Table:
+    """
+    Candidates, distinct IDs and duplicate rate per result key, plus an ALL_KEYS row.
+
+    The duplicate rate is the share of candidates with an ID that repeat an
+    earlier candidate of the same key (of any key for the last row).
+    """
+    per_key = columns.group_by("key", use_threads=False).aggregate([
+        ("rank", "count"),
+        ("id", "count"),
+        ("id", "count_distinct"),
+    ])
+    totals = [len(columns), pc.count(columns["id"]).as_py(), pc.count_distinct(columns["id"]).as_py()]
+    candidates, with_id, distinct = (
+        pa.concat_arrays([per_key[name].combine_chunks(), pa.array([total], pa.int64())])
+        for name, total in zip(["rank_count", "id_count", "id_count_distinct"], totals)
+    )
+    duplicates = pc.subtract(with_id, distinct)
+    return pa.table({
+        "key": per_key["key"].to_pylist() + [ALL_KEYS],
+        "candidates": candidates,
+        "distinct_ids": distinct,
+        "duplicates": duplicates,
+        "duplicate_rate": _ratio(duplicates, with_id),
+    })
+
+
+def _ratio(numerator: pa.Array, denominator: pa.Array) -> pa.Array:
+    """Float division, null where the denominator is zero."""
+    denominator = pc.if_else(pc.equal(denominator, 0), pa.scalar(None, pa.float64()), pc.cast(denominator, pa.float64()))
+    return pc.round(pc.divide(pc.cast(numerator, pa.float64()), denominator), 4)
+
+
+def overlap_stats(columns: pa.Table) -> pa.Table:
+    """
+    Pairwise overlap of the distinct candidate IDs of every two result keys.
+
+    Returns:
+        One row per pair: `key_a`, `key_b`, `shared` IDs, `jaccard` and the
+        shared share of each key's distinct IDs
+    """
+    keys = pc.unique(columns["key"]).to_pylist()
+    distinct = {
+        key: pc.unique(pc.drop_null(pc.filter(columns["id"], pc.equal(columns["key"], key)))) for key in keys
+    }
+    rows: Dict[str, List[Any]] = {"key_a": [], "key_b": [], "shared": [], "distinct_a": [], "distinct_b": []}
+    for i, key_a in enumerate(keys):
+        for key_b in keys[i + 1:]:
+            rows["key_a"].append(key_a)
+            rows["key_b"].append(key_b)
+            rows["shared"].append(pc.sum(pc.is_in(distinct[key_a], value_set=distinct[key_b])).as_py() or 0)
+            rows["distinct_a"].append(len(distinct[key_a]))
+            rows["distinct_b"].append(len(distinct[key_b]))
+    table = pa.table({name: pa.array(values, pa.string() if name.startswith("key") else pa.int64())
+                      for name, values in rows.items()})
+    union = pc.subtract(pc.add(table["distinct_a"], table["distinct_b"]), table["shared"])
+    return table.append_column("jaccard", _ratio(table["shared"], union)) \
+        .append_column("share_of_a", _ratio(table["shared"], table["distinct_a"])) \
+        .append_column("share_of_b", _ratio(table["shared"], table["distinct_b"]))
+
+
+def sscat_distribution(columns: pa.Table, top: int = TOP_SSCATS) -> pa.Table:
+    """
+    Candidates per SSCat and result key, for the `top` SSCats with the most candidates overall.
+
+    Args:
+        columns: Candidate columns with `sscat_id` (and optionally `sscat_name`) filled
+
+    Returns:
+        Rows of `key`, `sscat_id`, `sscat` (label), `candidates`, sorted by SSCat total
+    """
+    known = columns.filter(pc.is_valid(columns["sscat_id"]))
+    totals = known.group_by("sscat_id").aggregate([("sscat_id", "count")]) \
+        .sort_by([("sscat_id_count", "descending"), ("sscat_id", "ascending")]).slice(0, top)
+    top_ids = totals["sscat_id"]
+    known = known.filter(pc.is_in(known["sscat_id"], value_set=top_ids.combine_chunks()))
+    group_keys = ["key", "sscat_id"] + (["sscat_name"] if "sscat_name" in known.column_names else [])
+    counts = known.group_by(group_keys, use_threads=False).aggregate([("rank", "count")]) \
+        .select(group_keys + ["rank_count"]).rename_columns(group_keys + ["candidates"])
+    rank = pa.table({"sscat_id": top_ids, "order": pa.array(range(len(top_ids)), pa.int64())})
+    counts = counts.join(rank, "sscat_id").sort_by([("order", "ascending"), ("key", "ascending")])
+    label = pc.cast(counts["sscat_id"], pa.string())
+    if "sscat_name" in counts.column_names:
+        label = pc.coalesce(counts["sscat_name"], label)
+    return counts.select(["key", "sscat_id", "candidates"]).append_column("sscat", label)
+
+
+def price_stats(columns: pa.Table, percentiles: List[float] = PERCENTILES) -> pa.Table:
+    """
+    Serving price percentiles per result key and across all keys.
+
+    Args:
+        columns: Candidate columns with `price` filled where known
+
+    Returns:
+        Rows of `key`, `priced` candidates, `mean` and one `pNN` column per percentile
+    """
+    keys = pc.unique(columns["key"]).to_pylist()
+    rows: Dict[str, List[Any]] = {"key": [], "priced": [], "mean": []}
+    names = [f"p{round(q * 100)}" for q in percentiles]
+    for name in names:
+        rows[name] = []
+    for key in keys + [ALL_KEYS]:
+        prices = columns["price"] if key == ALL_KEYS else pc.filter(columns["price"], pc.equal(columns["key"], key))
+        priced = pc.count(prices).as_py()
+        quantiles = pc.quantile(prices, q=percentiles).to_pylist() if priced else [None] * len(percentiles)
+        rows["key"].append(key)
+        rows["priced"].append(priced)
+        rows["mean"].append(pc.mean(prices).as_py())
+        for name, value in zip(names, quantiles):
+            rows[name].append(value)
+    return pa.table(rows)
+
+
+def price_histogram(columns: pa.Table, bins: int = HISTOGRAM_BINS) -> pa.Table:
+    """
+    Candidates per serving price bucket and result key; buckets split the overall price range evenly.
+
+    Returns:
+        Rows of `key`, `price_from` (bucket lower bound) and `candidates`
+    """
+    priced = columns.filter(pc.is_valid(columns["price"]))
+    if not len(priced):
+        return pa.table({"key": pa.array([], pa.string()), "price_from": pa.array([], pa.float64()),
+                         "candidates": pa.array([], pa.int64())})
+    low, high = pc.min_max(priced["price"]).values()
+    low, high = low.as_py(), high.as_py()
+    width = (high - low) / bins or 1.0
+    bucket = pc.min_element_wise(pc.floor(pc.divide(pc.subtract(priced["price"], low), width)), bins - 1)
+    bucketed = pa.table({"key": priced["key"], "bucket": pc.cast(bucket, pa.int64())})
+    counts = bucketed.group_by(["key", "bucket"], use_threads=False).aggregate([("bucket", "count")]) \
+        .sort_by([("bucket", "ascending"), ("key", "ascending")])
+    price_from = pc.round(pc.add(pc.multiply(pc.cast(counts["bucket"], pa.float64()), width), low), 2)
+    return pa.table({"key": counts["key"], "price_from": price_from, "candidates": counts["bucket_count"]})
+
+
+def _as_price(value: Any) -> Optional[float]:
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        # DEGRADED or missing pricing
+        return None
+    return None if math.isnan(price) else price
+
+
+class FieldChunk:
+    """Hero PIDs and one lazily enriched field of one chunk of catalog IDs."""
+
+    def __init__(self):
+        self.hero_pids: Dict[Any, str] = {}
+        self.values: Dict[Any, Any] = {}
+        self.sscat_names: Dict[int, str] = {}
+        # Catalog IDs the backends have no value for (no hero PID, product or price)
+        self.unavailable: Set[Any] = set()
+        self.degraded: List[BackendUnavailable] = []
+
+
+class ExecutionAnalytics:
+    """
+    Aggregate view of every candidate of an execution, not just the display window.
+
+    Duplicate and overlap stats need only the candidate IDs. SSCats and serving
+    prices are enriched lazily, each only for the candidates still missing it and
+    only through the lookups that field needs: SSCats from the candidate's own
+    `sscat_id` where the DAG returns one and otherwise through hero -> taxonomy,
+    prices through hero -> pricing without taxonomy. Whatever the display
+    prefetch already fetched is reused via `seed`.
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, CandidateTable],
+        user_id: str,
+        fetch_hero_pids: Callable[[List[Any], Deadline], Dict[Any, str]],
+        fetch_products: Callable[[List[str], Deadline], List[Dict[str, Any]]],
+        fetch_pricing: Callable[[str, List[Tuple[str, str, str]], Deadline], Dict[str, Dict[str, str]]],
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.columns = candidate_columns(tables)
+        self.int_ids = pa.types.is_integer(self.columns["id"].type)
+        self.user_id = user_id
+        self.fetch_hero_pids = fetch_hero_pids
+        self.fetch_products = fetch_products
+        self.fetch_pricing = fetch_pricing
+        self.chunk_size = chunk_size
+        self.hero_pids: Dict[Any, str] = {}
+        self.values: Dict[str, Dict[Any, Any]] = {field: {} for field in FIELDS}
+        self.unavailable: Dict[str, Set[Any]] = {field: set() for field in FIELDS}
+        self.sscat_names: Dict[int, str] = {}
+        # Stage errors of the last `enrich` call per field
+        self.degraded: Dict[str, List[BackendUnavailable]] = {field: [] for field in FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def seed(self, hero_pids: Dict[Any, str], products: Dict[str, Dict[str, Any]],
+             pricing: Dict[str, Dict[str, str]]) -> None:
+        """Take over hero PIDs, SSCats and prices already fetched, e.g. a prefetch snapshot."""
+        for cid, pid in hero_pids.items():
+            if pid == MISSING_HERO:
+                continue
+            self.hero_pids[cid] = pid
+            product = products.get(str(pid))
+            if product is not None and product.get("old_sub_sub_category_id") is not None:
+                self.values[FIELD_SSCAT][cid] = int(product["old_sub_sub_category_id"])
+                self.sscat_names[int(product["old_sub_sub_category_id"])] = product.get("sscat_name")
+            price = _as_price(pricing.get(str(pid), {}).get(PRICE_FEATURE))
+            if price is not None:
+                self.values[FIELD_PRICE][cid] = price
+
+    def _lookup(self, field: str, name: str, arrow_type: pa.DataType) -> pa.Table:
+        values = self.values[field]
+        return pa.table({"id": _id_array(list(values), self.int_ids), name: pa.array(list(values.values()), arrow_type)})
+
+    def with_sscats(self) -> pa.Table:
+        """Candidate columns with `sscat_id` from the candidates or enrichment, and `sscat_name` where known."""
+        enriched = self._lookup(FIELD_SSCAT, "enriched_sscat_id", pa.int64())
+        joined = self.columns.join(enriched, "id", join_type="left outer")
+        sscat_id = pc.coalesce(joined["sscat_id"], joined["enriched_sscat_id"])
+        names = pa.table({"sscat_id": pa.array(list(self.sscat_names), pa.int64()),
+                          "sscat_name": pa.array(list(self.sscat_names.values()), pa.string())})
+        joined = joined.drop_columns(["sscat_id", "enriched_sscat_id"]).append_column("sscat_id", sscat_id)
+        return joined.join(names, "sscat_id", join_type="left outer")
+
+    def with_prices(self) -> pa.Table:
+        """Candidate columns with the serving `price` where known."""
+        return self.columns.join(self._lookup(FIELD_PRICE, "price", pa.float64()), "id", join_type="left outer")
+
+    def missing(self, field: str) -> List[Any]:
+        """Distinct catalog IDs that still lack `field` and were not found to have none."""
+        ids = self.columns["id"]
+        if field == FIELD_SSCAT:
+            ids = pc.filter(ids, pc.is_null(self.columns["sscat_id"]))
+        distinct = pc.unique(pc.drop_null(ids))
+        done = _id_array(list(self.values[field]) + list(self.unavailable[field]), self.int_ids)
+        return pc.filter(distinct, pc.invert(pc.is_in(distinct, value_set=done))).to_pylist()
+
+    def enrich(self, field: str, executor: Executor, stage_deadline: Callable[[str], Deadline]) -> int:
+        """
+        Fetch `field` for every candidate still missing it, in concurrent chunks.
+
+        Chunks that degrade are left missing and fetched again on the next call.
+
+        Returns:
+            Number of catalog IDs the field was fetched for (including ones found to have none)
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        missing = self.missing(field)
+        chunks = [missing[start:start + self.chunk_size] for start in range(0, len(missing), self.chunk_size)]
+        futures = [executor.submit(self._run, field, chunk, stage_deadline) for chunk in chunks]
+        self.degraded[field] = []
+        seen_errors: Set[str] = set()
+        resolved = 0
+        for future in futures:
+            chunk = future.result()
+            self.hero_pids.update(chunk.hero_pids)
+            self.values[field].update(chunk.values)
+            self.unavailable[field].update(chunk.unavailable)
+            self.sscat_names.update(chunk.sscat_names)
+            resolved += len(chunk.values) + len(chunk.unavailable)
+            for e in chunk.degraded:
+                if str(e) not in seen_errors:
+                    seen_errors.add(str(e))
+                    self.degraded[field].append(e)
+        return resolved
+
+    def _run(self, field: str, catalog_ids: List[Any], stage_deadline: Callable[[str], Deadline]) -> FieldChunk:
+        result = FieldChunk()
+        lookup = [cid for cid in catalog_ids if cid not in self.hero_pids]
+        if lookup:
+            try:
+                result.hero_pids.update(self.fetch_hero_pids(lookup, stage_deadline("hero")))
+            except PartialFailure as e:
+                # The IDs of the failed batches stay missing and are fetched again on the next call
+                result.hero_pids.update(e.result)
+                result.degraded.append(e)
+            except BackendUnavailable as e:
+                result.degraded.append(e)
+                return result
+        hero_pids = {cid: result.hero_pids.get(cid, self.hero_pids.get(cid)) for cid in catalog_ids}
+        result.unavailable.update(cid for cid, pid in hero_pids.items() if pid == MISSING_HERO)
+        # IDs of a failed hero chunk are left out of the map and stay missing
+        hero_pids = {cid: pid for cid, pid in hero_pids.items() if pid is not None and pid != MISSING_HERO}
+        result.hero_pids = {cid: pid for cid, pid in result.hero_pids.items() if pid != MISSING_HERO}
+        if not hero_pids:
+            return result
+        pids = list(dict.fromkeys(hero_pids.values()))
+        if field == FIELD_SSCAT:
+            try:
+                products = self.fetch_products(pids, stage_deadline("taxonomy"))
+            except BackendUnavailable as e:
+                result.degraded.append(e)
+                return result
+            by_pid = {str(prod.get("product_id")): prod for prod in products}
+            for cid, pid in hero_pids.items():
+                sscat_id = by_pid.get(str(pid), {}).get("old_sub_sub_category_id")
+                if sscat_id is None:
+                    result.unavailable.add(cid)
+                    continue
+                result.values[cid] = int(sscat_id)
+                result.sscat_names[int(sscat_id)] = by_pid[str(pid)].get("sscat_name")
+        else:
+            try:
+                pricing = self.fetch_pricing(self.user_id, [(pid, "source", "") for pid in pids],
+                                             stage_deadline("pricing"))
+            except BackendUnavailable as e:
+                result.degraded.append(e)
+                return result
+            for cid, pid in hero_pids.items():
+                price = _as_price(pricing.get(str(pid), {}).get(PRICE_FEATURE))
+                if price is None:
+                    result.unavailable.add(cid)
+                else:
+                    result.values[cid] = price
+        return result
@@ -0,0 +1,205 @@
+import json
+import math
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from services.resilience import DEGRADED
+
+# Constants
+# Integer IDs outside this range can't be stored in the int64 column and switch the table to a list
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+COMPACT_SEPARATORS = (",", ":")
+
+
+class Candidate:
+    """Slotted view of one candidate row of a CandidateTable."""
+
+    __slots__ = ("rank", "id", "score", "source", "hero_pid")
+
+    def __init__(self, rank: int, id: Any, score: Optional[float], source: Optional[str], hero_pid: Optional[str]):
+        self.rank = rank
+        self.id = id
+        self.score = score
+        self.source = source
+        self.hero_pid = hero_pid
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CandidateTable:
+    """
+    Columnar storage for the candidates of one result key.
+
+    The common fields (id, score, source) live in typed arrays; the full candidate
+    is kept as a compact JSON string and only decoded on demand. Hero PIDs are
+    attached as a separate column instead of mutating the candidate dicts.
+
+    IDs are an int64 array with a parallel `missing` flag per row while every ID
+    is an integer that fits in int64 (or absent); otherwise they are a plain list
+    holding None for absent IDs, and `missing` is None.
+    """
+
+    __slots__ = ("key", "ids", "missing", "scores", "sources", "hero_pids", "_raw", "_row_by_id")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.ids: Any = array("q")
+        self.missing: Optional[array] = array("B")
+        self.scores = array("d")
+        self.sources: List[Optional[str]] = []
+        self.hero_pids: List[Optional[str]] = []
+        self._raw: Optional[List[str]] = []
+        self._row_by_id: Optional[Dict[Any, int]] = None
+
+    @classmethod
+    def from_items(cls, key: str, items: List[Dict[str, Any]], keep_raw: bool = True) -> "CandidateTable":
+        """Build a table from parsed candidate dicts; the dicts can be dropped afterwards."""
+        table = cls(key)
+        if not keep_raw:
+            table._raw = None
+        table.extend(items)
+        return table
+
+    def extend(self, items: List[Dict[str, Any]]) -> None:
+        """Append candidate dicts as new rows (e.g. the next page of a paginated read)."""
+        ids = [item.get("id") for item in items]
+        if self.int_ids and all(cid is None or _is_int64(cid) for cid in ids):
+            self.ids.extend(0 if cid is None else cid for cid in ids)
+            self.missing.extend(cid is None for cid in ids)
+        else:
+            if self.int_ids:
+                self.ids = self.id_list()
+                self.missing = None
+            self.ids.extend(ids)
+        self.scores.extend(_as_float(item.get("score")) for item in items)
+        # Sources repeat heavily, so intern them to share one string object per value
+        self.sources.extend(None if item.get("source") is None else sys.intern(str(item["source"])) for item in items)
+        # Some backends (e.g. the PDP feed aggregator) already return the hero PID
+        self.hero_pids.extend(None if not item.get("hero_pid") else str(item["hero_pid"]) for item in items)
+        if self._raw is not None:
+            self._raw.extend(json.dumps(item, separators=COMPACT_SEPARATORS) for item in items)
+        self._row_by_id = None
+
+    @classmethod
+    def from_json(cls, key: str, raw: str, keep_raw: bool = True) -> Optional["CandidateTable"]:
+        """Parse a `Results` value; returns None unless it is a list of candidate dicts."""
+        parsed = json.loads(raw)
+        if not isinstance(parsed, list) or not all(isinstance(item, dict) for item in parsed):
+            return None
+        return cls.from_items(key, parsed, keep_raw=keep_raw)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def int_ids(self) -> bool:
+        """True while the IDs are stored as an int64 array (see `missing`)."""
+        return self.missing is not None
+
+    def id_at(self, row: int) -> Any:
+        if self.missing is not None and self.missing[row]:
+            return None
+        return self.ids[row]
+
+    def id_list(self) -> List[Any]:
+        """Every candidate ID in row order, None where a candidate has none."""
+        if self.missing is None:
+            return list(self.ids)
+        return [None if absent else cid for cid, absent in zip(self.ids, self.missing)]
+
+    def record(self, row: int) -> Candidate:
+        score = self.scores[row]
+        return Candidate(
+            rank=row + 1,
+            id=self.id_at(row),
+            score=None if math.isnan(score) else score,
+            source=self.sources[row],
+            hero_pid=self.hero_pids[row],
+        )
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Candidate]:
+        stop = len(self) if stop is None else min(stop, len(self))
+        for row in range(start, stop):
+            yield self.record(row)
+
+    def to_json(self) -> str:
+        """The rows as a JSON list of candidate dicts, which `from_json` turns back into an equal table."""
+        return json.dumps([self.candidate(row) for row in range(len(self))], separators=COMPACT_SEPARATORS)
+
+    def candidate(self, row: int) -> Dict[str, Any]:
+        """Full candidate dict, decoded lazily from the stored JSON."""
+        if self._raw is None:
+            return self.record(row).as_dict()
+        item = json.loads(self._raw[row])
+        if self.hero_pids[row] is not None:
+            item["hero_pid"] = self.hero_pids[row]
+        return item
+
+    def raw_json(self) -> Optional[List[str]]:
+        """Compact JSON of every row, or None if the table was built without keeping it."""
+        return self._raw
+
+    def id_index(self) -> Dict[Any, int]:
+        """Candidate ID -> row of its first occurrence (built on first use)."""
+        if self._row_by_id is None:
+            self._row_by_id = {}
+            for row, cid in enumerate(self.id_list()):
+                if cid is not None:
+                    self._row_by_id.setdefault(cid, row)
+        return self._row_by_id
+
+    def row_of(self, candidate_id: Any) -> Optional[int]:
+        """Row of the first candidate with `candidate_id` (index built on first lookup)."""
+        return self.id_index().get(candidate_id)
+
+    def set_hero_pids(self, hero_pid_map: Dict[Any, str], stop: Optional[int] = None, missing: str = "N/A") -> None:
+        """Fill the hero PID column for the first `stop` rows from a catalog ID -> hero PID map.
+
+        Rows that already carry a hero PID from the backend keep it; "N/A" and
+        DEGRADED placeholders are replaced.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for row in range(stop):
+            if self.hero_pids[row] is None or self.hero_pids[row] in ("N/A", DEGRADED, missing):
+                self.hero_pids[row] = hero_pid_map.get(self.id_at(row), missing)
+
+
+def tables_from_results(
+    results: Dict[str, Any],
+    keep_raw: bool = True,
+) -> Tuple[Dict[str, CandidateTable], Dict[str, Any]]:
+    """
+    Split a `Results` map into candidate tables and everything else.
+
+    Returns:
+        (tables by key, remaining values by key) - the remainder holds debug_config,
+        non-list results and values that failed to parse, untouched
+    """
+    tables: Dict[str, CandidateTable] = {}
+    rest: Dict[str, Any] = {}
+    for key, value in results.items():
+        table = None
+        if key != "debug_config" and isinstance(value, str):
+            try:
+                table = CandidateTable.from_json(key, value, keep_raw=keep_raw)
+            except ValueError:
+                table = None
+        if table is not None:
+            tables[key] = table
+        else:
+            rest[key] = value
+    return tables, rest
+
+
+def _is_int64(value: Any) -> bool:
+    return isinstance(value, int) and INT64_MIN <= value <= INT64_MAX
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from services.resilience import BackendUnavailable
+
+# Constants
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODES = [MODE_OFF, MODE_RECORD, MODE_REPLAY]
+DEFAULT_PATH = os.environ.get("DAG_DEBUGGER_CASSETTE_PATH", "cassettes/default.sqlite")
+COMPRESSION_LEVEL = 6
+
+
+class CassetteMiss(BackendUnavailable):
+    """Raised in replay mode when no response was recorded for a request."""
+
+    def __init__(self, backend: str):
+        super().__init__(backend, "no recorded response (cassette replay mode)")
+
+
+class CassetteStore:
+    """
+    On-disk store of request/response pairs.
+
+    Pairs live in a single SQLite file indexed by (backend, request hash); request
+    and response bodies are stored zlib-compressed. gRPC calls store serialized
+    protobuf bytes, HTTP calls the raw response body.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS interactions ("
+            " backend TEXT NOT NULL,"
+            " request_hash TEXT NOT NULL,"
+            " request BLOB NOT NULL,"
+            " response BLOB NOT NULL,"
+            " response_size INTEGER NOT NULL,"
+            " recorded_at REAL NOT NULL,"
+            " PRIMARY KEY (backend, request_hash))"
+        )
+        self._conn.commit()
+
+    def get(self, backend: str, request_hash: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM interactions WHERE backend = ? AND request_hash = ?",
+                (backend, request_hash),
+            ).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def put(self, backend: str, request_hash: str, request: bytes, response: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO interactions VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    backend,
+                    request_hash,
+                    zlib.compress(request, COMPRESSION_LEVEL),
+                    zlib.compress(response, COMPRESSION_LEVEL),
+                    len(response),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def summary(self) -> List[Dict[str, object]]:
+        """Recorded interactions per backend with their uncompressed response bytes."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT backend, COUNT(*), SUM(response_size), SUM(LENGTH(response))"
+                " FROM interactions GROUP BY backend ORDER BY backend"
+            ).fetchall()
+        return [
+            {"backend": backend, "interactions": count, "response_bytes": size, "stored_bytes": stored}
+            for backend, count, size, stored in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_mode = os.environ.get("DAG_DEBUGGER_CASSETTE", MODE_OFF)
+_store: Optional[CassetteStore] = None
+_config_lock = threading.Lock()
+
+
+def configure(mode: str, path: str = DEFAULT_PATH) -> None:
+    """
+    Switch the process-wide cassette mode and store location.
+
+    The mode applies to every session, so the app takes it from the environment at
+    startup (`DAG_DEBUGGER_CASSETTE`, `DAG_DEBUGGER_CASSETTE_PATH`); scripts call this directly.
+    """
+    global _mode, _store
+    if mode not in MODES:
+        raise ValueError(f"Unknown cassette mode: {mode}")
+    with _config_lock:
+        if _store is not None and (_store.path != path or mode == MODE_OFF):
+            _store.close()
+            _store = None
+        _mode = mode
+        if mode != MODE_OFF and _store is None:
+            _store = CassetteStore(path)
+
+
+def current_mode() -> str:
+    return _mode
+
+
+def current_store() -> Optional[CassetteStore]:
+    return _store
+
+
+def request_hash(backend: str, request: bytes, context: str = "") -> str:
+    """Stable key of a request: the backend, call context (host, user) and body."""
+    digest = hashlib.sha256()
+    for part in (backend.encode(), context.encode(), request):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def intercept(backend: str, request: bytes, call: Callable[[], bytes], context: str = "") -> bytes:
+    """
+    Serve `call()` through the cassette.
+
+    Args:
+        backend: Backend name the pair is filed under
+        request: Serialized request (JSON body or protobuf bytes)
+        call: Performs the live request and returns the serialized response
+        context: Extra request identity not contained in `request` (host, user headers)
+
+    Returns:
+        The serialized response, live or replayed
+
+    Raises:
+        CassetteMiss: In replay mode, if the request was never recorded
+    """
+    mode = _mode
+    if mode == MODE_OFF:
+        return call()
+    if _store is None:
+        configure(mode, DEFAULT_PATH)
+    store = _store
+    key = request_hash(backend, request, context)
+    if mode == MODE_REPLAY:
+        response = store.get(backend, key)
+        if response is None:
+            raise CassetteMiss(backend)
+        return response
+    response = call()
+    store.put(backend, key, request, response)
+    return response
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Dict, Optional
+
+import grpc
+
+# Constants
+# DAG responses with tens of thousands of candidates exceed gRPC's default 4 MB receive limit
+MAX_RECEIVE_MESSAGE_BYTES = 256 * 1024 * 1024
+CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.max_receive_message_length", MAX_RECEIVE_MESSAGE_BYTES),
+]
+
+_channels: Dict[str, grpc.Channel] = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(host: str) -> grpc.Channel:
+    """Pooled channel per host; one HTTP/2 connection multiplexes every concurrent call."""
+    with _channels_lock:
+        channel = _channels.get(host)
+        if channel is None:
+            channel = _channels[host] = grpc.insecure_channel(host, options=CHANNEL_OPTIONS)
+        return channel
+
+
+class AioLoop:
+    """
+    Background event loop thread for grpc.aio.
+
+    aio channels are bound to the loop they were created on, so the loop (and the
+    channels pooled on it) live for the whole process. Synchronous callers submit
+    coroutines with `run()`; calls from many threads multiplex on one loop.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._channels: Dict[str, Any] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="grpc-aio", daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule `coro` on the loop thread; cancelling the future cancels the coroutine."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run `coro` on the loop thread and wait for its result."""
+        return self.submit(coro).result(timeout)
+
+    def channel(self, host: str) -> "grpc.aio.Channel":
+        """Pooled aio channel per host; only call from coroutines running on this loop."""
+        channel = self._channels.get(host)
+        if channel is None:
+            channel = self._channels[host] = grpc.aio.insecure_channel(host, options=CHANNEL_OPTIONS)
+        return channel
+
+
+aio_loop = AioLoop()
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import grpc
+
+from services import metrics
+
+# Constants
+NONE = "none"
+GZIP = "gzip"
+DEFLATE = "deflate"
+ALGORITHMS = [NONE, GZIP, DEFLATE]
+GRPC_COMPRESSION = {
+    NONE: grpc.Compression.NoCompression,
+    GZIP: grpc.Compression.Gzip,
+    DEFLATE: grpc.Compression.Deflate,
+}
+# Where compression is configured: the HTTP DAG transport, both gRPC DAG transports, pricing
+TARGET_HTTP = "http"
+TARGET_GRPC = "grpc"
+TARGET_PRICING = "pricing"
+TARGETS = [TARGET_HTTP, TARGET_GRPC, TARGET_PRICING]
+DEFAULT_ALGORITHM = os.environ.get("DAG_DEBUGGER_COMPRESSION", NONE)
+# Smaller request bodies go out uncompressed; benchmarks/bench_compression.py finds the
+# crossover, about 3 KB at 100 Mbit/s for JSON results
+MIN_BYTES = int(os.environ.get("DAG_DEBUGGER_COMPRESSION_MIN_BYTES", str(4 * 1024)))
+# zlib level 1 is 3x faster than the default level 6 on JSON results, for a 5:1 instead of 7:1 ratio
+LEVEL = 1
+# Response encodings the HTTP transport accepts, whatever it compresses requests with
+ACCEPT_ENCODING = "gzip, deflate"
+
+# Per-target overrides: DAG_DEBUGGER_COMPRESSION_HTTP, _GRPC and _PRICING
+_algorithms: Dict[str, str] = {
+    target: os.environ.get(f"DAG_DEBUGGER_COMPRESSION_{target.upper()}", DEFAULT_ALGORITHM) for target in TARGETS
+}
+_min_bytes = MIN_BYTES
+_lock = threading.Lock()
+
+
+class WireStats:
+    """Encodings and on-the-wire sizes of one call; sizes stay None where the wire is not visible."""
+
+    __slots__ = ("encoding", "response_encoding", "request_bytes", "response_bytes", "compress_time",
+                 "decompress_time")
+
+    def __init__(self):
+        self.encoding = NONE
+        self.response_encoding = NONE
+        self.request_bytes: Optional[int] = None
+        self.response_bytes: Optional[int] = None
+        self.compress_time = 0.0
+        self.decompress_time = 0.0
+
+
+def configure(target: str, algorithm: str, min_bytes: Optional[int] = None) -> None:
+    """
+    Compress request bodies of `target` with `algorithm` from now on, in every session of the process.
+
+    The app takes these from the environment at startup; scripts and benchmarks call this directly.
+
+    Raises:
+        ValueError: If the target or algorithm is unknown
+    """
+    global _min_bytes
+    if target not in TARGETS:
+        raise ValueError(f"Unknown compression target: {target}")
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown compression algorithm: {algorithm}")
+    with _lock:
+        _algorithms[target] = algorithm
+        if min_bytes is not None:
+            _min_bytes = min_bytes
+
+
+def current_algorithm(target: str) -> str:
+    return _algorithms[target]
+
+
+def current_min_bytes() -> int:
+    return _min_bytes
+
+
+def request_algorithm(target: str, size: int) -> str:
+    """Algorithm for a request body of `size` bytes to `target`; small bodies are not worth it."""
+    return NONE if size < _min_bytes else _algorithms[target]
+
+
+def compress(data: bytes, algorithm: str) -> bytes:
+    """`data` encoded for a `Content-Encoding: algorithm` body."""
+    if algorithm == NONE:
+        return data
+    start = time.perf_counter()
+    # gzip wraps the deflate stream in a gzip header; HTTP "deflate" means the zlib format
+    wbits = 16 + zlib.MAX_WBITS if algorithm == GZIP else zlib.MAX_WBITS
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, wbits)
+    compressed = compressor.compress(data) + compressor.flush()
+    metrics.COMPRESSION_SECONDS.labels(algorithm, "compress").observe(time.perf_counter() - start)
+    return compressed
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """
+    Body of a response with `Content-Encoding: encoding`.
+
+    Raises:
+        ValueError: If the encoding is not supported or the body is corrupt
+    """
+    encoding = encoding.strip().lower() or NONE
+    if encoding in (NONE, "identity"):
+        return data
+    if encoding not in (GZIP, DEFLATE):
+        raise ValueError(f"Unsupported content encoding: {encoding}")
+    start = time.perf_counter()
+    try:
+        if encoding == GZIP:
+            body = zlib.decompress(data, 16 + zlib.MAX_WBITS)
+        else:
+            try:
+                body = zlib.decompress(data)
+            except zlib.error:
+                # Some servers send raw deflate streams without the zlib header
+                body = zlib.decompress(data, -zlib.MAX_WBITS)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt {encoding} body: {e}") from e
+    metrics.COMPRESSION_SECONDS.labels(encoding, "decompress").observe(time.perf_counter() - start)
+    return body
+
+
+def record(backend: str, wire: WireStats, request_bytes: int, response_bytes: int) -> None:
+    """Count the message sizes of one call and, where known, its bytes on the wire."""
+    metrics.MESSAGE_BYTES.labels(backend, "sent").inc(request_bytes)
+    metrics.MESSAGE_BYTES.labels(backend, "received").inc(response_bytes)
+    if wire.request_bytes is not None:
+        metrics.WIRE_BYTES.labels(backend, "sent", wire.encoding).inc(wire.request_bytes)
+    if wire.response_bytes is not None:
+        metrics.WIRE_BYTES.labels(backend, "received", wire.response_encoding).inc(wire.response_bytes)
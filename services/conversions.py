@@ -0,0 +1,141 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict
+
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import Message
+
+import debug.debug_pb2 as debug_pb2
+
+# Constants
+ALIAS_MAPPING = {
+    "tenant_ctx": "tenant_context",
+    "user_ctx": "user_context",
+    "feed_ctx": "feed_context",
+}
+STRUCT_TYPES = {"google.protobuf.Struct", "google.protobuf.Value", "google.protobuf.ListValue"}
+# Upper bound on distinct free-form keys (FeedMetaData) whose conversion is memoized
+KEY_CACHE_SIZE = 65536
+
+_FIRST_CAP = re.compile(r"(.)([A-Z][a-z]+)")
+_ALL_CAP = re.compile(r"([a-z0-9])([A-Z])")
+
+
+def camel_to_snake(name: str) -> str:
+    """Convert CamelCase or camelCase to snake_case lowercase."""
+    s1 = _FIRST_CAP.sub(r"\1_\2", name)
+    s2 = _ALL_CAP.sub(r"\1_\2", s1)
+    return s2.lower()
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def snake_key(name: str) -> str:
+    """snake_case form of a key with the alias mapping applied (memoized)."""
+    snake = camel_to_snake(name)
+    return ALIAS_MAPPING.get(snake, snake)
+
+
+def _is_repeated(field: FieldDescriptor) -> bool:
+    is_repeated = getattr(field, "is_repeated", None)
+    if is_repeated is not None:
+        return is_repeated
+    return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+class FieldTable:
+    """Precomputed wire names of one message type's fields, built once per descriptor."""
+
+    __slots__ = ("names", "messages", "structs", "repeated")
+
+    def __init__(self, descriptor: Descriptor):
+        self.names: Dict[str, str] = {}
+        self.messages = set()
+        self.structs = set()
+        self.repeated = set()
+        for field in descriptor.fields:
+            self.names[field.name] = snake_key(field.name)
+            if _is_repeated(field):
+                self.repeated.add(field.name)
+            if field.message_type is None:
+                continue
+            if field.message_type.full_name in STRUCT_TYPES:
+                self.structs.add(field.name)
+            else:
+                self.messages.add(field.name)
+
+
+_field_tables: Dict[str, FieldTable] = {}
+
+
+def field_table(descriptor: Descriptor) -> FieldTable:
+    table = _field_tables.get(descriptor.full_name)
+    if table is None:
+        table = _field_tables[descriptor.full_name] = FieldTable(descriptor)
+    return table
+
+
+# Request messages are known up front; build their tables at import
+for _descriptor in debug_pb2.DESCRIPTOR.message_types_by_name.values():
+    field_table(_descriptor)
+
+
+def convert_keys_snake(obj: Any) -> Any:
+    """Recursively convert dict keys to snake_case and apply alias mapping."""
+    if isinstance(obj, dict):
+        return {snake_key(k): convert_keys_snake(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_keys_snake(item) for item in obj]
+    return obj
+
+
+def convert_floats_to_ints(obj: Any) -> Any:
+    """Recursively convert float values that are integers to int type."""
+    if isinstance(obj, dict):
+        return {k: convert_floats_to_ints(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_floats_to_ints(item) for item in obj]
+    elif isinstance(obj, float) and obj.is_integer():
+        return int(obj)
+    return obj
+
+
+def snake_json(obj: Any) -> Any:
+    """`convert_keys_snake(convert_floats_to_ints(obj))` in a single pass."""
+    if isinstance(obj, dict):
+        return {snake_key(k): snake_json(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [snake_json(item) for item in obj]
+    elif isinstance(obj, float) and obj.is_integer():
+        return int(obj)
+    return obj
+
+
+def message_to_snake_dict(message: Message) -> Dict[str, Any]:
+    """
+    Convert a request message to the snake_case dict the HTTP IOP endpoints expect.
+
+    Equivalent to `MessageToDict(preserving_proto_field_name=True)` followed by
+    `convert_floats_to_ints` and `convert_keys_snake`, but declared fields are
+    renamed through their precomputed `FieldTable` and only free-form Struct
+    contents (FeedMetaData) go through the memoized key conversion.
+    """
+    table = field_table(message.DESCRIPTOR)
+    out: Dict[str, Any] = {}
+    for field, value in message.ListFields():
+        name = field.name
+        if name in table.structs:
+            if name in table.repeated:
+                out[table.names[name]] = [snake_json(MessageToDict(item)) for item in value]
+            else:
+                out[table.names[name]] = snake_json(MessageToDict(value))
+        elif name in table.messages:
+            if name in table.repeated:
+                out[table.names[name]] = [message_to_snake_dict(item) for item in value]
+            else:
+                out[table.names[name]] = message_to_snake_dict(value)
+        elif name in table.repeated:
+            out[table.names[name]] = snake_json(list(value))
+        else:
+            out[table.names[name]] = snake_json(value)
+    return out
@@ -0,0 +1,355 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from services import hedging, metrics
+from services.hedging import HedgePolicy
+from services.resilience import BackendUnavailable, DeadlineExceeded, RequestRejected, get_breaker
+
+T = TypeVar("T")
+
+# Constants
+DEFAULT_CONFIG_PATH = os.environ.get(
+    "DAG_DEBUGGER_ENDPOINTS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "endpoints.json"),
+)
+POLICY_LATENCY = "latency"
+POLICY_LEAST_OUTSTANDING = "least_outstanding"
+POLICIES = [POLICY_LATENCY, POLICY_LEAST_OUTSTANDING]
+EWMA_ALPHA = 0.3
+# Latency assumed for endpoints without samples, so new endpoints get probed
+INITIAL_LATENCY = 0.05
+MIN_LATENCY = 0.001
+# Latency sample recorded for a failed call, so flaky endpoints lose weight
+FAILURE_PENALTY = 1.0
+
+
+class Endpoint:
+    """One address of a service with its in-flight count and latency estimate."""
+
+    def __init__(self, service: str, address: str):
+        self.service = service
+        self.address = address
+        # Breakers are per endpoint: "iop:<host>", "hero:<url>", ...
+        self.breaker_name = f"{service.split(':')[0]}:{address}"
+        self.inflight = 0
+        self.ewma_latency: Optional[float] = None
+        self.requests = 0
+        self.failures = 0
+        self.last_error = ""
+
+    def latency_estimate(self) -> float:
+        return self.ewma_latency if self.ewma_latency is not None else INITIAL_LATENCY
+
+    def rejecting(self) -> bool:
+        return get_breaker(self.breaker_name).rejecting
+
+    def as_dict(self) -> Dict[str, Any]:
+        breaker = get_breaker(self.breaker_name)
+        return {
+            "address": self.address,
+            "state": breaker.state,
+            "inflight": self.inflight,
+            "ewma_ms": round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error or breaker.last_error,
+        }
+
+
+class EndpointPool:
+    """
+    Endpoints of one service and the policy choosing between them.
+
+    `latency` picks at random, weighted by the inverse of each endpoint's EWMA
+    latency times its in-flight requests; `least_outstanding` picks the endpoint
+    with the fewest in-flight requests. Endpoints whose circuit is open are only
+    used once every other endpoint has been tried.
+
+    With a `hedge` policy, calls made with `hedge=True` send a duplicate request
+    (to another endpoint where there is one) once the first attempt is slower
+    than usual, take whichever answers first and cancel the other.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        addresses: List[str],
+        policy: str = POLICY_LATENCY,
+        note: str = "",
+        hedge: Optional[HedgePolicy] = None,
+    ):
+        if not addresses:
+            raise ValueError(f"No endpoints configured for {service}")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown endpoint policy for {service}: {policy}")
+        self.service = service
+        self.policy = policy
+        self.note = note
+        self.hedge = hedge
+        self.endpoints = [Endpoint(service, address) for address in dict.fromkeys(addresses)]
+        self._lock = threading.Lock()
+
+    @property
+    def addresses(self) -> List[str]:
+        return [endpoint.address for endpoint in self.endpoints]
+
+    def select(self, exclude: Iterable[str] = ()) -> Optional[Endpoint]:
+        """Next endpoint to use, skipping addresses in `exclude`; None once all were tried."""
+        exclude = set(exclude)
+        candidates = [endpoint for endpoint in self.endpoints if endpoint.address not in exclude]
+        if not candidates:
+            return None
+        candidates = [endpoint for endpoint in candidates if not endpoint.rejecting()] or candidates
+        with self._lock:
+            if self.policy == POLICY_LEAST_OUTSTANDING:
+                return min(candidates, key=lambda e: (e.inflight, e.latency_estimate()))
+            weights = [1.0 / (max(e.latency_estimate(), MIN_LATENCY) * (e.inflight + 1)) for e in candidates]
+            return random.choices(candidates, weights)[0]
+
+    def call(
+        self,
+        fn: Callable[[Endpoint], T],
+        is_failure: Optional[Callable[[T], bool]] = None,
+        hedge: bool = False,
+    ) -> T:
+        """
+        Call `fn` on selected endpoints, failing over until one succeeds.
+
+        Args:
+            fn: Performs the request against one endpoint
+            is_failure: Marks a returned value as a failure worth retrying elsewhere
+            hedge: The call is idempotent and its request can be cancelled (see
+                `hedging.cancellable`), so it is hedged if the service has a hedge policy
+
+        Returns:
+            The first successful result, or the last failed one if every endpoint failed
+
+        Raises:
+            BackendUnavailable: If every endpoint raised
+            DeadlineExceeded: As soon as the page budget is spent, without failing over
+            RequestRejected: As soon as an endpoint rejects the request, without failing over
+        """
+        policy = self.hedge if hedge and hedging.ENABLED else None
+        tried: List[str] = []
+        result: Optional[T] = None
+        error: Optional[BackendUnavailable] = None
+        while True:
+            endpoint = self.select(exclude=tried)
+            if endpoint is None:
+                break
+            tried.append(endpoint.address)
+            if policy is None:
+                result, error, failure = self._attempt(endpoint, fn, is_failure)
+            else:
+                result, error, failure = self._hedged(policy, endpoint, fn, is_failure, tried)
+            if not failure:
+                return result
+        if error is not None:
+            raise error
+        return result
+
+    def _attempt(
+        self,
+        endpoint: Endpoint,
+        fn: Callable[[Endpoint], T],
+        is_failure: Optional[Callable[[T], bool]],
+    ) -> Tuple[Optional[T], Optional[BackendUnavailable], str]:
+        """One request to `endpoint`; returns (result, error, failure reason or "")."""
+        with self._lock:
+            endpoint.inflight += 1
+            endpoint.requests += 1
+        start = time.perf_counter()
+        result: Optional[T] = None
+        error: Optional[BackendUnavailable] = None
+        failure = ""
+        try:
+            result = fn(endpoint)
+            if is_failure is not None and is_failure(result):
+                failure = str(getattr(result, "Error", "") or "failed")
+        except (DeadlineExceeded, RequestRejected):
+            raise
+        except BackendUnavailable as e:
+            error, failure = e, e.reason
+        finally:
+            with self._lock:
+                endpoint.inflight -= 1
+        self._record(endpoint, time.perf_counter() - start, failure)
+        return result, error, failure
+
+    def _hedged(
+        self,
+        policy: HedgePolicy,
+        endpoint: Endpoint,
+        fn: Callable[[Endpoint], T],
+        is_failure: Optional[Callable[[T], bool]],
+        tried: List[str],
+    ) -> Tuple[Optional[T], Optional[BackendUnavailable], str]:
+        """
+        `_attempt` on `endpoint`, plus one hedge if it has not answered within the policy's delay.
+
+        The first successful attempt wins and the other is cancelled. If both
+        fail, the last failure is returned. The hedge goes to an endpoint not
+        tried yet, or to the same one if there is none.
+        """
+        policy.start_call()
+        executor = hedging.get_executor()
+        start = time.perf_counter()
+        attempts: Dict[Future, Tuple[hedging.Attempt, float]] = {}
+
+        def _launch(target: Endpoint) -> Future:
+            attempt = hedging.Attempt()
+            future = executor.submit(hedging.run_attempt, attempt, self._attempt, target, fn, is_failure)
+            attempts[future] = (attempt, time.perf_counter())
+            return future
+
+        primary = _launch(endpoint)
+        pending: Set[Future] = {primary}
+        delay = policy.delay()
+        hedged = False
+        outcome: Tuple[Optional[T], Optional[BackendUnavailable], str] = (None, None, "")
+        try:
+            while pending:
+                timeout = None
+                if not hedged and delay is not None:
+                    timeout = max(0.0, start + delay - time.perf_counter())
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # At most one hedge per endpoint tried
+                    hedged = True
+                    if policy.acquire():
+                        target = self.select(exclude=tried) or endpoint
+                        if target.address not in tried:
+                            tried.append(target.address)
+                        pending.add(_launch(target))
+                        metrics.HEDGES.labels(self.service, "sent").inc()
+                    else:
+                        metrics.HEDGES.labels(self.service, "budget_exhausted").inc()
+                    continue
+                for future in done:
+                    outcome = future.result()
+                    policy.observe_attempt(time.perf_counter() - attempts[future][1])
+                    if future is primary:
+                        self._observe_unhedged(policy, start, 1, future)
+                    if outcome[2]:
+                        continue
+                    elapsed = time.perf_counter() - start
+                    hedge_won = future is not primary
+                    policy.observe_call(elapsed, hedge_won)
+                    metrics.HEDGED_CALL_SECONDS.labels(self.service, "call").observe(elapsed)
+                    if len(attempts) > 1:
+                        metrics.HEDGES.labels(self.service, "won" if hedge_won else "lost").inc()
+                    weight = policy.measure_weight() if hedge_won and primary in pending else 0
+                    if weight:
+                        # Left running to measure the latency without hedging
+                        pending.discard(primary)
+                        primary.add_done_callback(functools.partial(self._observe_unhedged, policy, start, weight))
+                    return outcome
+        finally:
+            # Losers, and every attempt if this call is abandoned (e.g. on DeadlineExceeded)
+            for future in pending:
+                attempt, started = attempts[future]
+                attempt.cancel()
+                if future is primary:
+                    # A lower bound of the slow attempt's latency, so the hedge delay is not taken only from
+                    # attempts fast enough to finish. A cancelled hedge started late and says little, so it is left out
+                    policy.observe_attempt(time.perf_counter() - started)
+        return outcome
+
+    def _observe_unhedged(self, policy: HedgePolicy, start: float, weight: int, future: Future) -> None:
+        """Record how long the first attempt of a hedged call took, unless it raised or failed."""
+        if future.exception() is not None or future.result()[2]:
+            return
+        seconds = time.perf_counter() - start
+        policy.observe_unhedged(seconds, weight)
+        metrics.HEDGED_CALL_SECONDS.labels(self.service, "unhedged").observe(seconds, weight)
+
+    def _record(self, endpoint: Endpoint, elapsed: float, failure: str) -> None:
+        with self._lock:
+            if failure:
+                endpoint.failures += 1
+                endpoint.last_error = failure
+                elapsed = max(elapsed, FAILURE_PENALTY)
+            else:
+                endpoint.last_error = ""
+            previous = endpoint.ewma_latency
+            endpoint.ewma_latency = elapsed if previous is None else EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * previous
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {"service": self.service, "policy": self.policy, **endpoint.as_dict(), "note": self.note}
+            for endpoint in self.endpoints
+        ]
+
+
+class EndpointRegistry:
+    """Endpoint pools of every backend, loaded from the endpoints config file."""
+
+    def __init__(self, config: Dict[str, Any], path: str = ""):
+        self.path = path
+        self.pools: Dict[str, EndpointPool] = {}
+        for service, spec in config.get("services", {}).items():
+            self.pools[service] = EndpointPool(
+                service,
+                spec.get("endpoints", []),
+                spec.get("policy", POLICY_LATENCY),
+                spec.get("note", ""),
+                HedgePolicy.from_config(spec["hedge"]) if spec.get("hedge") else None,
+            )
+
+    def pool(self, service: str) -> EndpointPool:
+        if service not in self.pools:
+            raise ValueError(f"No endpoints configured for {service} in {self.path or 'the endpoint registry'}")
+        return self.pools[service]
+
+    def adopt(self, previous: "EndpointRegistry") -> None:
+        """Carry latency and failure statistics over from a registry loaded earlier."""
+        for service, pool in self.pools.items():
+            old = previous.pools.get(service)
+            if old is None:
+                continue
+            known = {endpoint.address: endpoint for endpoint in old.endpoints}
+            pool.endpoints = [known.get(endpoint.address, endpoint) for endpoint in pool.endpoints]
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [row for pool in self.pools.values() for row in pool.status()]
+
+    def hedge_status(self) -> List[Dict[str, Any]]:
+        """Hedge counts, delay and p99 latencies of every service with a hedge policy."""
+        return [{"service": service, **pool.hedge.status()} for service, pool in self.pools.items() if pool.hedge]
+
+
+def load_registry(path: str = DEFAULT_CONFIG_PATH) -> EndpointRegistry:
+    with open(path) as f:
+        return EndpointRegistry(json.load(f), path)
+
+
+_registry: Optional[EndpointRegistry] = None
+_registry_mtime = 0.0
+_registry_lock = threading.Lock()
+
+
+def get_registry(path: str = DEFAULT_CONFIG_PATH) -> EndpointRegistry:
+    """Process-wide registry, reloaded when the config file changes."""
+    global _registry, _registry_mtime
+    mtime = os.path.getmtime(path)
+    with _registry_lock:
+        if _registry is None or _registry.path != path or mtime != _registry_mtime:
+            registry = load_registry(path)
+            if _registry is not None:
+                registry.adopt(_registry)
+            _registry, _registry_mtime = registry, mtime
+        return _registry
+
+
+def iop_service(environment: str, feed_type: str) -> str:
+    return f"iop:{environment}:{feed_type}"
+
+
+def pdp_feed_service(environment: str) -> str:
+    return f"pdp_feed:{environment}"
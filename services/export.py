@@ -0,0 +1,174 @@
+import json
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.candidates import CandidateTable
+
+# Constants
+BATCH_SIZE = 10000
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW_STREAM = "arrow"
+
+_BASE_FIELDS = [
+    pa.field("execution_id", pa.string()),
+    pa.field("environment", pa.string()),
+    pa.field("feed_type", pa.string()),
+    pa.field("user_id", pa.string()),
+    pa.field("request_json", pa.string()),
+    pa.field("result_key", pa.string()),
+    pa.field("rank", pa.int32()),
+    # int64, or string when a result key has non-integer candidate IDs (see `export_schema`)
+    pa.field("candidate_id", pa.int64()),
+    pa.field("score", pa.float64()),
+    pa.field("source", pa.string()),
+    pa.field("hero_pid", pa.string()),
+    pa.field("product_id", pa.string()),
+    pa.field("catalog_name", pa.string()),
+    pa.field("sscat_id", pa.int64()),
+    pa.field("sscat_name", pa.string()),
+    pa.field("image_url", pa.string()),
+    # False where the candidate was not enriched (outside the display window), so product and
+    # pricing columns are blank rather than missing upstream
+    pa.field("enriched", pa.bool_()),
+]
+
+
+def export_schema(pricing_features: List[str], int_ids: bool = True) -> pa.Schema:
+    """Flat schema of one exported row; pricing features become `pricing_<name>` columns."""
+    fields = [
+        field if field.name != "candidate_id" or int_ids else pa.field("candidate_id", pa.string())
+        for field in _BASE_FIELDS
+    ]
+    return pa.schema(fields + [pa.field(f"pricing_{name}", pa.string()) for name in pricing_features])
+
+
+def _int_ids(execution: Dict[str, Any]) -> bool:
+    """True unless a result key has non-integer (or out of int64 range) candidate IDs."""
+    return all(table.int_ids for table in execution.get("tables", {}).values())
+
+
+def iter_record_batches(
+    execution: Dict[str, Any],
+    pricing_features: List[str],
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yield record batches for an execution, one result key slice at a time.
+
+    Args:
+        execution: Stored execution with `tables`, request metadata and optional
+            `enrichment` (result key -> catalog ID -> product dict with `pricing`)
+        pricing_features: Pricing feature names to export as columns
+        batch_size: Maximum rows per batch
+
+    Yields:
+        RecordBatches following `export_schema(pricing_features, int_ids)`, with `int_ids`
+        False if any result key has non-integer candidate IDs
+    """
+    int_ids = _int_ids(execution)
+    schema = export_schema(pricing_features, int_ids)
+    request_json = json.dumps(execution.get("request", {}), sort_keys=True)
+    enrichment = execution.get("enrichment", {})
+    constants = {
+        "execution_id": execution.get("id"),
+        "environment": execution.get("environment"),
+        "feed_type": execution.get("feed_type"),
+        "user_id": execution.get("user_id"),
+        "request_json": request_json,
+    }
+    for key, table in execution.get("tables", {}).items():
+        products = enrichment.get(key, {})
+        for start in range(0, len(table), batch_size):
+            stop = min(start + batch_size, len(table))
+            columns = _table_columns(table, start, stop, products, pricing_features, int_ids)
+            length = stop - start
+            arrays = []
+            for field in schema:
+                if field.name in constants:
+                    arrays.append(pa.array([constants[field.name]] * length, type=field.type))
+                elif field.name == "result_key":
+                    arrays.append(pa.array([key] * length, type=field.type))
+                else:
+                    arrays.append(pa.array(columns[field.name], type=field.type))
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _table_columns(
+    table: CandidateTable,
+    start: int,
+    stop: int,
+    products: Dict[Any, Dict[str, Any]],
+    pricing_features: List[str],
+    int_ids: bool = True,
+) -> Dict[str, List[Any]]:
+    """Columns for rows [start, stop) of one candidate table joined with its enrichment."""
+    columns: Dict[str, List[Any]] = {name: [] for name in (
+        "rank", "candidate_id", "score", "source", "hero_pid", "product_id",
+        "catalog_name", "sscat_id", "sscat_name", "image_url", "enriched",
+    )}
+    for name in pricing_features:
+        columns[f"pricing_{name}"] = []
+    for candidate in table.records(start, stop):
+        product = products.get(candidate.id, {})
+        images = product.get("product_images") or []
+        pricing = product.get("pricing", {})
+        columns["rank"].append(candidate.rank)
+        columns["candidate_id"].append(candidate.id if int_ids else _as_str(candidate.id))
+        columns["score"].append(candidate.score)
+        columns["source"].append(candidate.source)
+        columns["hero_pid"].append(_as_str(candidate.hero_pid))
+        columns["product_id"].append(_as_str(product.get("product_id")))
+        columns["catalog_name"].append(product.get("catalog_name"))
+        columns["sscat_id"].append(_as_int(product.get("old_sub_sub_category_id")))
+        columns["sscat_name"].append(product.get("sscat_name"))
+        columns["image_url"].append(images[0] if images else None)
+        columns["enriched"].append(candidate.id in products)
+        for name in pricing_features:
+            columns[f"pricing_{name}"].append(_as_str(pricing.get(name)))
+    return columns
+
+
+def export_execution(
+    sink: Union[str, BinaryIO],
+    execution: Dict[str, Any],
+    pricing_features: List[str],
+    fmt: str = FORMAT_PARQUET,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Stream an execution to `sink` as Parquet or an Arrow IPC stream.
+
+    Batches are written as they are produced, so large runs never hold the whole
+    table in memory.
+
+    Returns:
+        Number of rows written
+    """
+    schema = export_schema(pricing_features, _int_ids(execution))
+    rows = 0
+    if fmt == FORMAT_PARQUET:
+        with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+            for batch in iter_record_batches(execution, pricing_features, batch_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == FORMAT_ARROW_STREAM:
+        with pa.ipc.new_stream(sink, schema) as writer:
+            for batch in iter_record_batches(execution, pricing_features, batch_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return rows
+
+
+def _as_str(value: Optional[Any]) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _as_int(value: Optional[Any]) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,234 @@
+import concurrent.futures
+import contextvars
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import grpc
+
+# Constants
+DEFAULT_PERCENTILE = 95.0
+# Hedges allowed per call; each call earns this many tokens and each hedge spends one
+DEFAULT_BUDGET = 0.05
+# Most hedges that may be sent back to back after a quiet period
+DEFAULT_BURST = 5.0
+# Never hedge sooner than this after the first attempt
+DEFAULT_MIN_DELAY = 0.01
+# Share of hedge-won calls whose first attempt is left to finish instead of being cancelled, to measure
+# the latency the call would have had without hedging
+DEFAULT_MEASURE_SHARE = 0.1
+# Latency samples the hedge delay is taken from; no hedges are sent before MIN_SAMPLES
+SAMPLES = 500
+MIN_SAMPLES = 20
+EXECUTOR_WORKERS = int(os.environ.get("DAG_DEBUGGER_HEDGE_WORKERS", "32"))
+# Set to 0 to turn hedging off for every service regardless of the endpoints config
+ENABLED = os.environ.get("DAG_DEBUGGER_HEDGING", "1") != "0"
+
+
+class HedgeCancelled(Exception):
+    """Raised in the losing attempt of a hedged call once the other attempt has won."""
+
+
+class Attempt:
+    """One attempt of a hedged call; transports register how to cancel their request on it."""
+
+    def __init__(self):
+        self.cancelled = False
+        self._cancel: Optional[Callable[[], Any]] = None
+        self._lock = threading.Lock()
+
+    def on_cancel(self, cancel: Callable[[], Any]) -> None:
+        with self._lock:
+            self._cancel = cancel
+            cancelled = self.cancelled
+        if cancelled:
+            cancel()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            cancel = self._cancel
+        if cancel is not None:
+            cancel()
+
+
+_current: "contextvars.ContextVar[Optional[Attempt]]" = contextvars.ContextVar("hedge_attempt", default=None)
+
+
+def run_attempt(attempt: Attempt, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run `fn(*args)` as `attempt`, so the request it makes can be cancelled."""
+    token = _current.set(attempt)
+    try:
+        return fn(*args)
+    finally:
+        _current.reset(token)
+
+
+def cancellable(future: Any) -> Any:
+    """
+    Wait for a gRPC call future (or a future of a coroutine on the aio loop).
+
+    Inside a hedged attempt, losing the race cancels the call.
+
+    Raises:
+        HedgeCancelled: If the call was cancelled because the other attempt won
+    """
+    attempt = _current.get()
+    if attempt is not None:
+        attempt.on_cancel(future.cancel)
+    try:
+        return future.result()
+    except (grpc.FutureCancelledError, concurrent.futures.CancelledError) as e:
+        raise HedgeCancelled() from e
+
+
+def _percentile(samples: List[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+
+def _weighted_percentile(samples: List[Tuple[float, int]], percentile: float) -> float:
+    ordered = sorted(samples)
+    target = sum(weight for _, weight in ordered) * percentile / 100
+    seen = 0
+    for value, weight in ordered:
+        seen += weight
+        if seen > target:
+            return value
+    return ordered[-1][0]
+
+
+class HedgePolicy:
+    """
+    When an endpoint pool sends a duplicate of a slow idempotent call, and how often it may.
+
+    A hedge goes out once the first attempt has taken longer than the
+    `percentile` of recent attempt latencies (at least `min_delay`). Hedges are
+    paid from a token bucket: every call adds `budget` tokens, up to `burst`,
+    and every hedge takes one, so at most about `budget` extra requests are
+    sent per call however slow the backend gets.
+
+    The policy also keeps the latency callers saw and an estimate of the
+    latency they would have seen without hedging, for comparing p99s. First
+    attempts that won give that latency directly. Of the first attempts a hedge
+    beat, a `measure_share` sample is left to finish rather than cancelled; each
+    counts for the 1 / `measure_share` others.
+    """
+
+    def __init__(
+        self,
+        percentile: float = DEFAULT_PERCENTILE,
+        budget: float = DEFAULT_BUDGET,
+        burst: float = DEFAULT_BURST,
+        min_delay: float = DEFAULT_MIN_DELAY,
+        measure_share: float = DEFAULT_MEASURE_SHARE,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError(f"Hedge percentile must be between 0 and 100: {percentile}")
+        if budget < 0:
+            raise ValueError(f"Hedge budget must not be negative: {budget}")
+        if not 0 <= measure_share <= 1:
+            raise ValueError(f"Hedge measure share must be between 0 and 1: {measure_share}")
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.min_delay = min_delay
+        self.measure_share = measure_share
+        self.tokens = burst
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        self._attempt_latencies: deque = deque(maxlen=SAMPLES)
+        self._call_latencies: deque = deque(maxlen=SAMPLES)
+        # (latency, weight) of first attempts that finished
+        self._unhedged_latencies: deque = deque(maxlen=SAMPLES)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, Any]) -> "HedgePolicy":
+        """Policy from a service's `hedge` entry in the endpoints config (`min_delay_ms` in milliseconds)."""
+        return cls(
+            percentile=float(spec.get("percentile", DEFAULT_PERCENTILE)),
+            budget=float(spec.get("budget", DEFAULT_BUDGET)),
+            burst=float(spec.get("burst", DEFAULT_BURST)),
+            min_delay=float(spec.get("min_delay_ms", DEFAULT_MIN_DELAY * 1000)) / 1000,
+            measure_share=float(spec.get("measure_share", DEFAULT_MEASURE_SHARE)),
+        )
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait for the first attempt before hedging; None until enough latencies were seen."""
+        with self._lock:
+            samples = list(self._attempt_latencies)
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return max(self.min_delay, _percentile(samples, self.percentile))
+
+    def start_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.tokens = min(self.burst, self.tokens + self.budget)
+
+    def acquire(self) -> bool:
+        """Take a hedge token; False (and counted as denied) if the budget is spent."""
+        with self._lock:
+            if self.tokens < 1:
+                self.denied += 1
+                return False
+            self.tokens -= 1
+            self.hedges += 1
+            return True
+
+    def observe_attempt(self, seconds: float) -> None:
+        """Latency of an attempt that completed, or how long a cancelled first attempt had run (a lower bound)."""
+        with self._lock:
+            self._attempt_latencies.append(seconds)
+
+    def observe_call(self, seconds: float, hedge_won: bool) -> None:
+        with self._lock:
+            self._call_latencies.append(seconds)
+            if hedge_won:
+                self.hedge_wins += 1
+
+    def measure_weight(self) -> int:
+        """Weight of a first attempt a hedge beat if it should be left to finish, else 0."""
+        if self.measure_share and random.random() < self.measure_share:
+            return round(1 / self.measure_share)
+        return 0
+
+    def observe_unhedged(self, seconds: float, weight: int = 1) -> None:
+        """Latency of a first attempt that finished, standing for `weight` calls."""
+        with self._lock:
+            self._unhedged_latencies.append((seconds, weight))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self._call_latencies)
+            unhedged = list(self._unhedged_latencies)
+            status = {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "budget_denied": self.denied,
+            }
+        delay = self.delay()
+        status["hedge_delay_ms"] = round(delay * 1000, 1) if delay is not None else None
+        status["p99_ms"] = round(_percentile(calls, 99) * 1000, 1) if calls else None
+        status["p99_unhedged_ms"] = round(_weighted_percentile(unhedged, 99) * 1000, 1) if unhedged else None
+        return status
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide executor running the attempts of hedged calls."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="hedge")
+        return _executor
@@ -0,0 +1,254 @@
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Constants
+SESSION_MEMORY_BUDGET = 256 * 1024 * 1024  # bytes kept per Streamlit session
+TOP_ALLOCATIONS = 10
+
+
+def deep_sizeof(obj: Any, exclude: Iterable[Any] = ()) -> int:
+    """Approximate in-memory footprint of `obj` and everything it references, except `exclude` (counted elsewhere)."""
+    seen = {id(other) for other in exclude}
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, (pa.Table, pa.RecordBatch, pa.ChunkedArray, pa.Array)):
+            size += current.nbytes
+            continue
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__slots__"):
+            stack.extend(getattr(current, s) for s in current.__slots__ if hasattr(current, s))
+        elif hasattr(current, "__dict__"):
+            stack.append(current.__dict__)
+    return size
+
+
+def result_size_report(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Report the serialized size and parsed footprint of each result key.
+
+    Args:
+        results: The `Results` map of a DAG response (key -> JSON string or dict)
+
+    Returns:
+        One row per key with serialized bytes, parsed bytes and item count
+    """
+    report = []
+    for key, value in results.items():
+        raw = value if isinstance(value, str) else json.dumps(value)
+        try:
+            parsed = json.loads(raw)
+        except (TypeError, ValueError):
+            parsed = None
+        report.append({
+            "key": key,
+            "serialized_bytes": len(raw.encode("utf-8")),
+            "parsed_bytes": deep_sizeof(parsed) if parsed is not None else 0,
+            "items": len(parsed) if isinstance(parsed, list) else None,
+        })
+    report.sort(key=lambda row: row["serialized_bytes"], reverse=True)
+    return report
+
+
+def _current_rss() -> Optional[int]:
+    """Current resident set size in bytes, if the platform exposes it."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * (resource.getpagesize() if resource else 4096)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss() -> Optional[int]:
+    """Process high-water-mark RSS in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ExecutionProfile:
+    """Memory profile of a single DAG execution, filled in by `profile_execution`."""
+
+    def __init__(self):
+        self.duration = 0.0
+        self.traced_current = 0
+        self.traced_peak = 0
+        self.rss_before: Optional[int] = None
+        self.rss_after: Optional[int] = None
+        self.process_peak_rss: Optional[int] = None
+        self.top_allocations: List[Tuple[str, int]] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "duration_s": round(self.duration, 3),
+            "traced_current_bytes": self.traced_current,
+            "traced_peak_bytes": self.traced_peak,
+            "rss_before_bytes": self.rss_before,
+            "rss_after_bytes": self.rss_after,
+            "process_peak_rss_bytes": self.process_peak_rss,
+        }
+
+
+# tracemalloc is interpreter-wide: profiles running at once (one per session) share it, and it is
+# stopped only when the last of them ends, and only if a profile started it
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+def _acquire_tracing() -> None:
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0:
+            _tracing_started = not tracemalloc.is_tracing()
+            if _tracing_started:
+                tracemalloc.start()
+            # Only reset while no other profile is measuring its peak
+            tracemalloc.reset_peak()
+        _tracing_users += 1
+
+
+def _release_tracing() -> None:
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+@contextmanager
+def profile_execution(trace: bool = True) -> Iterator[ExecutionProfile]:
+    """
+    Measure the Python allocations and RSS of the enclosed block.
+
+    tracemalloc slows allocation-heavy code down noticeably, so it only runs when
+    `trace` is set; RSS figures are always collected. Tracing is process-wide, so
+    the traced figures of profiles that overlap include each other's allocations.
+    """
+    profile = ExecutionProfile()
+    profile.rss_before = _current_rss()
+    if trace:
+        _acquire_tracing()
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.duration = time.perf_counter() - start
+        if trace:
+            try:
+                profile.traced_current, profile.traced_peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                ))
+                profile.top_allocations = [
+                    (str(stat.traceback[0]), stat.size)
+                    for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+                ]
+            finally:
+                _release_tracing()
+        profile.rss_after = _current_rss()
+        profile.process_peak_rss = _peak_rss()
+
+
+class SessionResultStore:
+    """
+    Size-bounded store of past executions for one session.
+
+    Entries are kept in insertion order; once the total size exceeds the budget the
+    oldest executions are evicted. The newest execution is always kept. Caches built
+    on an execution later (search index, analytics, enrichment) are charged to it
+    with `charge`.
+    """
+
+    def __init__(self, budget_bytes: int = SESSION_MEMORY_BUDGET):
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        # Execution ID -> part name -> bytes of the caches charged to it
+        self._parts: Dict[str, Dict[str, int]] = {}
+        self.total_bytes = 0
+
+    def add(self, execution_id: str, entry: Any, size_bytes: int) -> List[str]:
+        """Store an execution and return the IDs evicted to stay within budget."""
+        if execution_id in self._entries:
+            self._drop(execution_id)
+        self._entries[execution_id] = (entry, size_bytes)
+        self.total_bytes += size_bytes
+        return self._evict(execution_id)
+
+    def charge(self, execution_id: str, part: str, size_bytes: int) -> List[str]:
+        """
+        Set the size of `part`, a cache built on a stored execution, and evict to stay within budget.
+
+        Returns:
+            IDs evicted; never `execution_id` or the newest execution
+        """
+        if execution_id not in self._entries:
+            return []
+        parts = self._parts.setdefault(execution_id, {})
+        self.total_bytes += size_bytes - parts.get(part, 0)
+        parts[part] = size_bytes
+        return self._evict(execution_id)
+
+    def size(self, execution_id: str) -> int:
+        """Bytes of an execution and the caches charged to it; 0 if it is not stored."""
+        item = self._entries.get(execution_id)
+        return item[1] + sum(self._parts.get(execution_id, {}).values()) if item else 0
+
+    def _drop(self, execution_id: str) -> None:
+        self.total_bytes -= self.size(execution_id)
+        del self._entries[execution_id]
+        self._parts.pop(execution_id, None)
+
+    def _evict(self, keep: str) -> List[str]:
+        evicted = []
+        newest = next(reversed(self._entries))
+        for old_id in list(self._entries):
+            if self.total_bytes <= self.budget_bytes:
+                break
+            if old_id not in (keep, newest):
+                self._drop(old_id)
+                evicted.append(old_id)
+        return evicted
+
+    def get(self, execution_id: str) -> Optional[Any]:
+        item = self._entries.get(execution_id)
+        return item[0] if item else None
+
+    def latest(self) -> Optional[Any]:
+        if not self._entries:
+            return None
+        return next(reversed(self._entries.values()))[0]
+
+    def ids(self) -> List[str]:
+        """Execution IDs, newest first."""
+        return list(reversed(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
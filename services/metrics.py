@@ -0,0 +1,375 @@
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Constants
+# Local only by default: the exposition names backend hosts; set to 0.0.0.0 to let a remote Prometheus scrape
+SERVER_HOST = os.environ.get("DAG_DEBUGGER_METRICS_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("DAG_DEBUGGER_METRICS_PORT", "9464"))
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Sessions without a rerun for this long no longer count as active
+SESSION_TTL = 30 * 60
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """A named metric with one value (or histogram) per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+
+    def _new_value(self) -> object:
+        raise NotImplementedError
+
+    def _child(self, values: Sequence[str]):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(values)}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._values.get(key)
+            if child is None:
+                child = self._values[key] = self._new_value()
+            return child
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(sample name, formatted labels, value) of every series."""
+        raise NotImplementedError
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples())
+        return lines
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self.lock:
+            self.value = value
+
+
+class Counter(Metric):
+    """Monotonic count; name it with a `_total` suffix."""
+
+    kind = "counter"
+
+    def _new_value(self) -> _Value:
+        return _Value()
+
+    def labels(self, *values: str) -> _Value:
+        return self._child(values)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._child(()).inc(amount)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for values, child in items:
+            yield self.name, _format_labels(self.labelnames, values), child.value
+
+
+class Gauge(Counter):
+    """Value that goes up and down, or is computed by a function at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        if self._function is not None:
+            yield self.name, "", self._function()
+            return
+        yield from super().samples()
+
+    @contextmanager
+    def track_inprogress(self, *values: str) -> Iterator[None]:
+        child = self.labels(*values)
+        child.inc()
+        try:
+            yield
+        finally:
+            child.dec()
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, weight: int = 1) -> None:
+        """Record `value`; a `weight` above 1 counts it as that many observations (e.g. of a sample)."""
+        with self.lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += weight
+            self.sum += value * weight
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def labels(self, *values: str) -> _HistogramValue:
+        return self._child(values)
+
+    def observe(self, value: float) -> None:
+        self._child(()).observe(value)
+
+    @contextmanager
+    def time(self, *values: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(*values).observe(time.perf_counter() - start)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        names = self.labelnames + ("le",)
+        for values, child in items:
+            with child.lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _format_labels(names, values + (_format_value(bound),)), cumulative
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def expose(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for metric in metrics for line in metric.expose()) + "\n"
+
+
+registry = Registry()
+
+DAG_EXECUTIONS = registry.register(Counter(
+    "dag_executions_total", "ExecuteDAG calls by feed type, IOP host, transport and outcome.",
+    ["feed_type", "host", "transport", "outcome"],
+))
+DAG_LATENCY = registry.register(Histogram(
+    "dag_execution_seconds", "ExecuteDAG latency by feed type and transport.", ["feed_type", "transport"],
+))
+DAG_INFLIGHT = registry.register(Gauge(
+    "dag_executions_in_flight", "ExecuteDAG calls in progress by feed type.", ["feed_type"],
+))
+BACKEND_REQUESTS = registry.register(Counter(
+    "backend_requests_total", "Backend calls by backend, endpoint and outcome.", ["backend", "endpoint", "outcome"],
+))
+BACKEND_LATENCY = registry.register(Histogram(
+    "backend_request_seconds", "Backend call latency (hero, taxonomy, pricing, PDP feed, ...).", ["backend"],
+))
+BACKEND_INFLIGHT = registry.register(Gauge(
+    "backend_requests_in_flight", "Backend calls in progress.", ["backend"],
+))
+CACHE_REQUESTS = registry.register(Counter(
+    "cache_requests_total", "Lookups of a result cache.", ["cache"],
+))
+CACHE_MISSES = registry.register(Counter(
+    "cache_misses_total", "Lookups of a result cache that had to call the backend.", ["cache"],
+))
+HEDGES = registry.register(Counter(
+    "hedges_total", "Hedged requests by service and outcome (sent, won, lost, budget_exhausted).",
+    ["service", "outcome"],
+))
+HEDGED_CALL_SECONDS = registry.register(Histogram(
+    "hedged_call_seconds",
+    "Latency of hedgeable calls as seen by the caller (\"call\") and as it would have been without hedging "
+    "(\"unhedged\", estimated from first attempts).",
+    ["service", "latency"],
+))
+HERO_BATCH_SPLITS = registry.register(Counter(
+    "hero_batch_splits_total", "Failed hero PID batches split in half to isolate the catalog IDs they fail for.",
+))
+MESSAGE_BYTES = registry.register(Counter(
+    "message_bytes_total", "Request and response bodies before compression, by backend and direction.",
+    ["backend", "direction"],
+))
+WIRE_BYTES = registry.register(Counter(
+    "wire_bytes_total", "Bytes on the wire by backend, direction and content encoding (HTTP only).",
+    ["backend", "direction", "encoding"],
+))
+COMPRESSION_SECONDS = registry.register(Histogram(
+    "compression_seconds", "Time spent compressing request and decompressing response bodies.",
+    ["algorithm", "operation"], buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0),
+))
+SESSIONS = registry.register(Counter(
+    "sessions_total", "Browser sessions started.",
+))
+ACTIVE_SESSIONS = registry.register(Gauge(
+    "sessions_active", f"Sessions with a rerun in the last {SESSION_TTL // 60} minutes.",
+))
+RERUNS = registry.register(Counter(
+    "script_reruns_total", "Script runs across all sessions.",
+))
+SCRIPT_RUN_SECONDS = registry.register(Histogram(
+    "script_run_seconds", "Duration of full script runs (scope \"app\") and of fragment runs by fragment.", ["scope"],
+))
+
+_session_seen: Dict[str, float] = {}
+_session_lock = threading.Lock()
+
+
+def touch_session(session_id: str) -> None:
+    """Record a script run of `session_id`; the first run counts a new session."""
+    now = time.monotonic()
+    RERUNS.inc()
+    with _session_lock:
+        if session_id not in _session_seen:
+            SESSIONS.inc()
+        _session_seen[session_id] = now
+        for stale in [sid for sid, seen in _session_seen.items() if now - seen > SESSION_TTL]:
+            del _session_seen[stale]
+
+
+def _active_sessions() -> float:
+    now = time.monotonic()
+    with _session_lock:
+        return float(sum(1 for seen in _session_seen.values() if now - seen <= SESSION_TTL))
+
+
+ACTIVE_SESSIONS.set_function(_active_sessions)
+
+
+def track_cache(cache: str):
+    """Count lookups of a cached function; its body calls `record_cache_miss` on misses."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            CACHE_REQUESTS.labels(cache).inc()
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache_miss(cache: str) -> None:
+    CACHE_MISSES.labels(cache).inc()
+
+
+def _handler():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != METRICS_PATH:
+                self.send_error(404)
+                return
+            data = registry.expose().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class MetricsServer:
+    """Process-wide `/metrics` endpoint, started on first use."""
+
+    def __init__(self, host: str = SERVER_HOST, port: int = SERVER_PORT):
+        self.host = host
+        self.port = port
+        self.error = ""
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> bool:
+        """Start the server unless it runs already; False if it could not be started."""
+        with self._lock:
+            if self._server is not None:
+                return True
+            if self.error:
+                return False
+            try:
+                server = ThreadingHTTPServer((self.host, self.port), _handler())
+            except OSError as e:
+                self.error = str(e)
+                return False
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+            self._server = server
+            return True
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self._server.server_address[1]}" if self._server is not None else ""
+
+
+metrics_server = MetricsServer()
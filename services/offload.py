@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from services.candidates import CandidateTable, tables_from_results
+
+T = TypeVar("T")
+
+# Constants
+# Worker processes for parsing jobs; 0 keeps everything on the calling thread
+DEFAULT_WORKERS = int(os.environ.get("DAG_DEBUGGER_OFFLOAD_WORKERS", "0"))
+# Payloads below this are parsed inline, where they finish before a worker would get them
+MIN_OFFLOAD_BYTES = 1 << 20
+# Workers are spawned, not forked, so they never inherit gRPC or Streamlit threads
+START_METHOD = "spawn"
+
+
+class SharedPayload:
+    """
+    Byte strings copied once into a shared memory block for worker processes.
+
+    Workers receive only the block name and (offset, length) of their slice, so
+    large payloads are never pickled. The creating process unlinks the block on exit.
+    """
+
+    def __init__(self, parts: List[bytes]):
+        size = sum(len(part) for part in parts)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.name = self._shm.name
+        self.slices: List[Tuple[int, int]] = []
+        offset = 0
+        for part in parts:
+            self._shm.buf[offset:offset + len(part)] = part
+            self.slices.append((offset, len(part)))
+            offset += len(part)
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedPayload":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_shared(name: str, offset: int, length: int) -> bytes:
+    """
+    Copy one slice out of a shared memory block created by another process.
+
+    Pool workers share the creating process's resource tracker, so attaching
+    here does not take over ownership; the creator still unlinks the block.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[offset:offset + length])
+    finally:
+        shm.close()
+
+
+_workers = DEFAULT_WORKERS
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def configure(workers: int) -> None:
+    """
+    Set the number of worker processes (0 disables offloading) for the whole process.
+
+    A startup setting (`DAG_DEBUGGER_OFFLOAD_WORKERS`) for the app: the pool is shared by every session.
+    """
+    global _workers, _pool
+    if workers < 0:
+        raise ValueError(f"Invalid worker count: {workers}")
+    with _pool_lock:
+        if workers != _workers and _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        _workers = workers
+
+
+def current_workers() -> int:
+    return _workers
+
+
+def enabled() -> bool:
+    return _workers > 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(_workers, mp_context=multiprocessing.get_context(START_METHOD))
+        return _pool
+
+
+def should_offload(size: int) -> bool:
+    return enabled() and size >= MIN_OFFLOAD_BYTES
+
+
+def call_bytes(fn: Callable[[bytes], T], payload: bytes) -> T:
+    """
+    Run `fn(payload)` in a worker process when offloading pays off, else inline.
+
+    `fn` must be a module-level function; exceptions it raises are re-raised here.
+    """
+    if not should_offload(len(payload)):
+        return fn(payload)
+    with SharedPayload([payload]) as shared:
+        offset, length = shared.slices[0]
+        return _get_pool().submit(_call_shared, fn, shared.name, offset, length).result()
+
+
+def _call_shared(fn: Callable[[bytes], T], name: str, offset: int, length: int) -> T:
+    return fn(read_shared(name, offset, length))
+
+
+def parse_results(
+    results: Dict[str, Any],
+    keep_raw: bool = True,
+) -> Tuple[Dict[str, CandidateTable], Dict[str, Any]]:
+    """
+    `tables_from_results`, with large maps parsed one result key per worker process.
+
+    Candidate values are handed to the workers through one shared memory block;
+    only the finished compact tables travel back.
+    """
+    keys = [key for key, value in results.items() if key != "debug_config" and isinstance(value, str)]
+    if len(keys) < 2 or not should_offload(sum(len(results[key]) for key in keys)):
+        return tables_from_results(results, keep_raw=keep_raw)
+
+    pool = _get_pool()
+    with SharedPayload([results[key].encode() for key in keys]) as shared:
+        futures: Dict[str, Future] = {
+            key: pool.submit(_parse_table, shared.name, offset, length, key, keep_raw)
+            for key, (offset, length) in zip(keys, shared.slices)
+        }
+        parsed = {key: future.result() for key, future in futures.items()}
+    tables: Dict[str, CandidateTable] = {}
+    rest: Dict[str, Any] = {}
+    # Keep the response order of the keys, as tables_from_results does
+    for key, value in results.items():
+        table = parsed.get(key)
+        if table is not None:
+            tables[key] = table
+        else:
+            rest[key] = value
+    return tables, rest
+
+
+def _parse_table(name: str, offset: int, length: int, key: str, keep_raw: bool) -> Optional[CandidateTable]:
+    try:
+        return CandidateTable.from_json(key, read_shared(name, offset, length), keep_raw=keep_raw)
+    except ValueError:
+        return None
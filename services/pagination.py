@@ -0,0 +1,173 @@
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from services.candidates import CandidateTable
+
+# Constants
+DEFAULT_MAX_PAGES = 5
+DEFAULT_MAX_ITEMS = 5000
+CURSOR_KEYS = ("cursor", "next_cursor", "nextCursor", "Cursor", "NextCursor")
+
+
+def extract_cursor(results: Dict[str, Any]) -> Optional[str]:
+    """
+    Find the next-page cursor in a `Results` map.
+
+    Looks for a result key named like a cursor first, then for a cursor field in
+    JSON-object results (list results are candidates and never carry one).
+    """
+    for key in CURSOR_KEYS:
+        value = results.get(key)
+        if value:
+            try:
+                value = json.loads(value) if isinstance(value, str) else value
+            except ValueError:
+                pass
+            return str(value) if value else None
+    for key, value in results.items():
+        if key == "debug_config" or not isinstance(value, str) or not value.lstrip().startswith("{"):
+            continue
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            continue
+        for cursor_key in CURSOR_KEYS:
+            if parsed.get(cursor_key):
+                return str(parsed[cursor_key])
+    return None
+
+
+class PageStats:
+    """Latency and candidate counts of one fetched page."""
+
+    def __init__(self, page: int, cursor: Optional[str], latency: float):
+        self.page = page
+        self.cursor = cursor
+        self.latency = latency
+        self.next_cursor: Optional[str] = None
+        self.candidates = 0
+        self.duplicates = 0
+        self.error = ""
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "page": self.page,
+            "cursor": self.cursor or "",
+            "latency_ms": round(self.latency * 1000, 1),
+            "new_candidates": self.candidates,
+            "duplicates": self.duplicates,
+            "next_cursor": self.next_cursor or "",
+            "error": self.error,
+        }
+
+
+class PaginatedRun:
+    """Candidates of every page merged per result key, de-duplicated by candidate ID."""
+
+    def __init__(self, keep_raw: bool = True):
+        self.keep_raw = keep_raw
+        self.tables: Dict[str, CandidateTable] = {}
+        self.rest: Dict[str, Any] = {}
+        self.result_keys: List[str] = []
+        self.pages: List[PageStats] = []
+        self.items = 0
+        self._seen: Dict[str, Set[Any]] = {}
+
+    def add_page(self, stats: PageStats, response: Any) -> None:
+        """Merge one page's results, skipping candidates already seen under the same key."""
+        self.pages.append(stats)
+        if not getattr(response, "Success", False):
+            stats.error = getattr(response, "Error", "") or "Unknown error"
+            return
+        for key, value in response.Results.items():
+            if key not in self.result_keys:
+                self.result_keys.append(key)
+            items = _candidate_items(key, value)
+            if items is None:
+                self.rest[key] = value
+                continue
+            seen = self._seen.setdefault(key, set())
+            fresh = []
+            for item in items:
+                cid = item.get("id")
+                if cid is not None and cid in seen:
+                    stats.duplicates += 1
+                    continue
+                seen.add(cid)
+                fresh.append(item)
+            table = self.tables.get(key)
+            if table is None:
+                self.tables[key] = CandidateTable.from_items(key, fresh, keep_raw=self.keep_raw)
+            else:
+                table.extend(fresh)
+            stats.candidates += len(fresh)
+        self.items += stats.candidates
+
+
+def _candidate_items(key: str, value: Any) -> Optional[List[Dict[str, Any]]]:
+    if key == "debug_config" or not isinstance(value, str):
+        return None
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return None
+    if not isinstance(parsed, list) or not all(isinstance(item, dict) for item in parsed):
+        return None
+    return parsed
+
+
+def _timed_fetch(fetch_page: Callable[[Optional[str]], Any], cursor: Optional[str]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    response = fetch_page(cursor)
+    return response, time.perf_counter() - start
+
+
+def paginate(
+    fetch_page: Callable[[Optional[str]], Any],
+    first_cursor: Optional[str] = None,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    max_items: int = DEFAULT_MAX_ITEMS,
+    keep_raw: bool = True,
+) -> Iterator[Tuple[PaginatedRun, PageStats]]:
+    """
+    Follow result cursors page by page.
+
+    The request for page N+1 is issued as soon as page N arrives, so it is in flight
+    while the caller enriches and renders page N between iterations.
+
+    Args:
+        fetch_page: Executes the DAG for a cursor and returns its response
+        first_cursor: Cursor of the first page (None for the start of the feed)
+        max_pages: Stop after this many pages
+        max_items: Stop once this many unique candidates were collected
+        keep_raw: Keep per-candidate JSON in the merged tables
+
+    Yields:
+        (the run so far, stats of the page just merged)
+    """
+    run = PaginatedRun(keep_raw=keep_raw)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dag-page")
+    cursor = first_cursor
+    future: Optional[Future] = executor.submit(_timed_fetch, fetch_page, cursor)
+    seen_cursors = {cursor}
+    try:
+        for page in range(1, max_pages + 1):
+            response, latency = future.result()
+            stats = PageStats(page, cursor, latency)
+            next_cursor = extract_cursor(response.Results) if getattr(response, "Success", False) else None
+            stats.next_cursor = next_cursor
+            future = None
+            if next_cursor and next_cursor not in seen_cursors and page < max_pages:
+                seen_cursors.add(next_cursor)
+                future = executor.submit(_timed_fetch, fetch_page, next_cursor)
+            run.add_page(stats, response)
+            yield run, stats
+            if future is None or run.items >= max_items:
+                break
+            cursor = next_cursor
+    finally:
+        if future is not None:
+            future.cancel()
+        executor.shutdown(wait=False)
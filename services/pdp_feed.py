@@ -0,0 +1,173 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from google.protobuf.json_format import MessageToDict
+
+from pricing import request_pb2, response_pb2
+
+# The generated api_pb2_grpc module imports its messages as top-level modules
+sys.modules.setdefault("request_pb2", request_pb2)
+sys.modules.setdefault("response_pb2", response_pb2)
+
+from debug import api_pb2_grpc  # noqa: E402
+from services import cassette  # noqa: E402
+from services.channels import get_channel  # noqa: E402
+from services.endpoints import Endpoint, EndpointPool  # noqa: E402
+from services.resilience import BackendUnavailable, Deadline, guarded_call  # noqa: E402
+
+# Constants
+PDP_FEED_TYPE = "catalog_recommendation"
+REQUEST_TIMEOUT = 10
+MAX_FANOUT = 16
+RESULT_KEY_PREFIX = "pdp_feed"
+
+
+def fetch_pdp_feed(
+    catalog_id: int,
+    host: Union[str, EndpointPool],
+    user_id: str,
+    user_context: str,
+    feed_context: str = "default",
+    limit: int = 0,
+    cursor: str = "",
+    deadline: Optional[Deadline] = None,
+) -> response_pb2.RecommendationResponse:
+    """
+    Call PdpFeedHandler.FetchPdpFeed for one anchor catalog.
+
+    `host` is either one aggregator address or the registry pool of the
+    environment, in which case failed calls fail over to its other endpoints.
+
+    Raises:
+        BackendUnavailable: If the call fails, the circuit is open or the deadline is spent
+    """
+    request = request_pb2.RecommendationsRequest(
+        catalog_id=catalog_id,
+        feed_type=PDP_FEED_TYPE,
+        feed_context=feed_context,
+        limit=limit,
+        cursor=cursor,
+    )
+    metadata = [
+        ("meesho-user-id", user_id),
+        ("meesho-user-context", user_context),
+    ]
+
+    def _fetch(endpoint: Endpoint) -> bytes:
+        def _request(timeout: float) -> bytes:
+            stub = api_pb2_grpc.PdpFeedHandlerStub(get_channel(endpoint.address))
+            response = stub.FetchPdpFeed(request, metadata=metadata, timeout=timeout)
+            return response.SerializeToString()
+
+        return guarded_call(endpoint.breaker_name, _request, REQUEST_TIMEOUT, deadline)
+
+    if isinstance(host, EndpointPool):
+        backend = target = host.service
+        call = lambda: host.call(_fetch)  # noqa: E731
+    else:
+        backend, target = f"pdp_feed:{host}", host
+        call = lambda: _fetch(Endpoint("pdp_feed", host))  # noqa: E731
+    body = cassette.intercept(
+        "pdp_feed",
+        request.SerializeToString(deterministic=True),
+        call,
+        context=f"{target}|{user_id}|{user_context}",
+    )
+    response = response_pb2.RecommendationResponse.FromString(body)
+    if response.error:
+        raise BackendUnavailable(backend, response.error)
+    return response
+
+
+def fetch_pdp_feeds(
+    catalog_ids: List[int],
+    host: Union[str, EndpointPool],
+    user_id: str,
+    user_context: str,
+    feed_context: str = "default",
+    limit: int = 0,
+    deadline: Optional[Deadline] = None,
+    max_workers: int = MAX_FANOUT,
+) -> Dict[int, Union[response_pb2.RecommendationResponse, BackendUnavailable]]:
+    """
+    Fan FetchPdpFeed out over many anchor catalogs on the pooled channel.
+
+    Returns:
+        Anchor catalog ID -> response, or the BackendUnavailable error for that anchor
+    """
+    def _one(catalog_id: int):
+        try:
+            return fetch_pdp_feed(catalog_id, host, user_id, user_context, feed_context, limit, deadline=deadline)
+        except BackendUnavailable as e:
+            return e
+
+    unique_ids = list(dict.fromkeys(catalog_ids))
+    with ThreadPoolExecutor(max_workers=min(max_workers, max(1, len(unique_ids)))) as executor:
+        return dict(zip(unique_ids, executor.map(_one, unique_ids)))
+
+
+def catalog_candidates(response: response_pb2.RecommendationResponse) -> List[Dict[str, Any]]:
+    """CatalogDTOs as candidate dicts shaped like DAG results (`id`, `hero_pid`, `source`, ...)."""
+    return [
+        MessageToDict(dto, preserving_proto_field_name=True)
+        for dto in response.catalogs
+    ]
+
+
+def result_key(catalog_id: int) -> str:
+    return f"{RESULT_KEY_PREFIX}:{catalog_id}"
+
+
+def dag_result_key(catalog_id: int, key: str) -> str:
+    return f"dag:{catalog_id}:{key}"
+
+
+def overlap_report(
+    pdp_ids: Dict[int, List[Any]],
+    dag_ids: Dict[int, Dict[str, List[Any]]],
+    top_k: int = 50,
+) -> List[Dict[str, Any]]:
+    """
+    Compare the aggregator's output with the catalog_recommendation DAG per anchor.
+
+    Args:
+        pdp_ids: Anchor -> ranked catalog IDs from FetchPdpFeed
+        dag_ids: Anchor -> DAG result key -> ranked catalog IDs
+        top_k: Depth for the overlap@K column
+
+    Returns:
+        One row per anchor against the DAG result key that overlaps it most
+    """
+    rows = []
+    for anchor, feed in pdp_ids.items():
+        feed_set = set(feed)
+        feed_top = set(feed[:top_k])
+        best: Dict[str, Any] = {"anchor": anchor, "pdp_feed": len(feed), "dag_key": None, "dag": 0,
+                                "jaccard": 0.0, f"overlap@{top_k}": 0.0}
+        for key, ranked in dag_ids.get(anchor, {}).items():
+            dag_set = set(ranked)
+            union = feed_set | dag_set
+            jaccard = len(feed_set & dag_set) / len(union) if union else 0.0
+            if best["dag_key"] is None or jaccard > best["jaccard"]:
+                top = set(ranked[:top_k])
+                best.update({
+                    "dag_key": key,
+                    "dag": len(ranked),
+                    "jaccard": round(jaccard, 4),
+                    f"overlap@{top_k}": round(len(feed_top & top) / top_k, 4),
+                })
+        rows.append(best)
+    return rows
+
+
+def results_map(
+    responses: Dict[int, Union[response_pb2.RecommendationResponse, BackendUnavailable]],
+) -> Dict[str, str]:
+    """Results map (result key -> JSON list) for the shared rendering and enrichment pipeline."""
+    return {
+        result_key(catalog_id): json.dumps(catalog_candidates(response))
+        for catalog_id, response in responses.items()
+        if not isinstance(response, BackendUnavailable)
+    }
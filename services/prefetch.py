@@ -0,0 +1,226 @@
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.candidates import CandidateTable
+from services.resilience import DEGRADED, BackendUnavailable, Deadline, PartialFailure
+
+# Constants
+# Catalog IDs per hero -> product -> pricing pipeline; chunks run concurrently
+CHUNK_SIZE = 100
+MISSING_HERO = "N/A"
+
+
+class ChunkResult:
+    """Hero PIDs, products and pricing of one chunk of catalog IDs."""
+
+    def __init__(self):
+        self.hero_pids: Dict[Any, str] = {}
+        self.products: Dict[str, Dict[str, Any]] = {}
+        self.pricing: Dict[str, Dict[str, str]] = {}
+        self.hero_failed = False
+        self.pricing_failed = False
+        self.degraded: List[BackendUnavailable] = []
+        self.duration = 0.0
+
+
+def _chunk_result(future: Future) -> ChunkResult:
+    """Result of a chunk pipeline; one that raised (e.g. on a malformed payload) is left empty and degraded."""
+    try:
+        return future.result()
+    except Exception as e:
+        result = ChunkResult()
+        result.degraded.append(BackendUnavailable("enrichment", f"{type(e).__name__}: {e}"))
+        result.hero_failed = result.pricing_failed = True
+        return result
+
+
+class EnrichmentPrefetch:
+    """
+    Background hero -> product -> pricing enrichment of an execution's candidates.
+
+    `add` collects the display window of every result table, de-duplicates the
+    catalog IDs across keys and starts one pipeline per chunk of IDs on the
+    executor, so chunks and keys are enriched concurrently while results are still
+    being processed. `window` blocks on the chunks of one table and assembles its
+    product cards.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        user_id: str,
+        fetch_hero_pids: Callable[[List[Any], Deadline], Dict[Any, str]],
+        fetch_products: Callable[[List[str], Deadline], List[Dict[str, Any]]],
+        fetch_pricing: Callable[[str, List[Tuple[str, str, str]], Deadline], Dict[str, Dict[str, str]]],
+        stage_deadline: Callable[[str], Deadline],
+        max_per_key: int,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.executor = executor
+        self.user_id = user_id
+        self.fetch_hero_pids = fetch_hero_pids
+        self.fetch_products = fetch_products
+        self.fetch_pricing = fetch_pricing
+        self.stage_deadline = stage_deadline
+        self.max_per_key = max_per_key
+        self.chunk_size = chunk_size
+        self.started_at = time.perf_counter()
+        self._chunks: Dict[Any, Future] = {}
+        self._pipelines: Dict[Future, Tuple[List[Any], Dict[Any, str]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, tables: Iterable[CandidateTable], stop: Optional[int] = None) -> int:
+        """Start pipelines for the first `stop` catalog IDs of each table not requested yet; returns how many."""
+        stop = self.max_per_key if stop is None else stop
+        fresh: List[Any] = []
+        known: Dict[Any, str] = {}
+        with self._lock:
+            for table in tables:
+                for item in table.records(0, stop):
+                    if item.id is None or item.id in self._chunks:
+                        continue
+                    # Hero PIDs that came with the candidates (e.g. from the PDP feed) are not looked up again
+                    if item.hero_pid and item.hero_pid not in (MISSING_HERO, DEGRADED):
+                        known[item.id] = item.hero_pid
+                    self._chunks[item.id] = None
+                    fresh.append(item.id)
+            for start in range(0, len(fresh), self.chunk_size):
+                chunk = fresh[start:start + self.chunk_size]
+                self._submit(chunk, {cid: known[cid] for cid in chunk if cid in known})
+        return len(fresh)
+
+    def _submit(self, chunk: List[Any], known: Dict[Any, str]) -> None:
+        future = self.executor.submit(self._run, chunk, known)
+        self._pipelines[future] = (chunk, known)
+        for cid in chunk:
+            self._chunks[cid] = future
+
+    def retry_degraded(self, stage_deadline: Callable[[str], Deadline]) -> int:
+        """
+        Restart finished chunks that degraded, using the deadlines of a new page render.
+
+        A no-op when called again with the same `stage_deadline`, so failures are
+        retried at most once per render.
+
+        Returns:
+            Number of chunks restarted
+        """
+        if stage_deadline is self.stage_deadline:
+            return 0
+        self.stage_deadline = stage_deadline
+        with self._lock:
+            degraded = [
+                future for future in self._pipelines
+                if future.done() and (future.exception() is not None or future.result().degraded)
+            ]
+            for future in degraded:
+                self._submit(*self._pipelines.pop(future))
+        return len(degraded)
+
+    def _run(self, catalog_ids: List[Any], known: Dict[Any, str]) -> ChunkResult:
+        started = time.perf_counter()
+        result = ChunkResult()
+        result.hero_pids.update(known)
+        lookup = [cid for cid in catalog_ids if cid not in known]
+        if lookup:
+            try:
+                result.hero_pids.update(self.fetch_hero_pids(lookup, self.stage_deadline("hero")))
+            except BackendUnavailable as e:
+                # IDs of failed hero batches are left out of a partial result and show as DEGRADED
+                if isinstance(e, PartialFailure):
+                    result.hero_pids.update(e.result)
+                result.degraded.append(e)
+                result.hero_failed = True
+        hero_pids = list(dict.fromkeys(pid for pid in result.hero_pids.values() if pid != MISSING_HERO))
+        if hero_pids:
+            try:
+                products = self.fetch_products(hero_pids, self.stage_deadline("taxonomy"))
+            except BackendUnavailable as e:
+                result.degraded.append(e)
+                products = []
+            result.products = {str(prod.get("product_id")): prod for prod in products}
+        pdp_data = [(pid, "source", "") for pid in result.products if pid != "None"]
+        if pdp_data:
+            try:
+                result.pricing = self.fetch_pricing(self.user_id, pdp_data, self.stage_deadline("pricing"))
+            except BackendUnavailable as e:
+                result.degraded.append(e)
+                result.pricing_failed = True
+        result.duration = time.perf_counter() - started
+        return result
+
+    def window(
+        self,
+        table: CandidateTable,
+        max_display: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[BackendUnavailable]]:
+        """
+        Enriched products of the first `max_display` candidates of `table`.
+
+        Starts the pipelines first if the table was never added. Hero PIDs are
+        written back into the table.
+
+        Returns:
+            (product dicts with `pricing` attached in candidate order, degraded stage errors)
+        """
+        max_display = self.max_per_key if max_display is None else max_display
+        self.add([table], stop=max_display)
+        items = list(table.records(0, max_display))
+        futures: List[Future] = []
+        with self._lock:
+            for item in items:
+                future = self._chunks.get(item.id)
+                if future is not None and future not in futures:
+                    futures.append(future)
+        chunks = [_chunk_result(future) for future in futures]
+
+        hero_pid_map: Dict[Any, str] = {}
+        products: Dict[str, Dict[str, Any]] = {}
+        pricing: Dict[str, Dict[str, str]] = {}
+        degraded: List[BackendUnavailable] = []
+        seen_errors: Set[str] = set()
+        hero_failed = pricing_failed = False
+        for chunk in chunks:
+            hero_pid_map.update(chunk.hero_pids)
+            products.update(chunk.products)
+            pricing.update(chunk.pricing)
+            hero_failed = hero_failed or chunk.hero_failed
+            pricing_failed = pricing_failed or chunk.pricing_failed
+            for e in chunk.degraded:
+                if str(e) not in seen_errors:
+                    seen_errors.add(str(e))
+                    degraded.append(e)
+        table.set_hero_pids(hero_pid_map, stop=max_display, missing=DEGRADED if hero_failed else MISSING_HERO)
+
+        missing_pricing = {"serving_price": DEGRADED} if pricing_failed else {}
+        product_details = []
+        added: Set[str] = set()
+        for item in items:
+            pid = hero_pid_map.get(item.id)
+            product = products.get(str(pid)) if pid is not None else None
+            if product is None or str(pid) in added:
+                continue
+            added.add(str(pid))
+            product_details.append(dict(product, pricing=pricing.get(str(pid), missing_pricing)))
+        return product_details, degraded
+
+    def snapshot(self) -> Dict[str, Dict[Any, Any]]:
+        """Hero PIDs, products and pricing of the chunks enriched without degradation, for reuse."""
+        snapshot: Dict[str, Dict[Any, Any]] = {"hero_pids": {}, "products": {}, "pricing": {}}
+        with self._lock:
+            futures = [future for future in self._pipelines if future.done() and future.exception() is None]
+        for future in futures:
+            chunk = future.result()
+            if chunk.degraded:
+                continue
+            snapshot["hero_pids"].update(chunk.hero_pids)
+            snapshot["products"].update(chunk.products)
+            snapshot["pricing"].update(chunk.pricing)
+        return snapshot
+
+    def pending(self) -> int:
+        """Chunks still being enriched."""
+        with self._lock:
+            return sum(1 for future in self._pipelines if not future.done())
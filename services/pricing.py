@@ -1,10 +1,13 @@
-import grpc
 from typing import List, Dict, Any, Optional, Tuple, Union
 from pricing import pricing_service_pb2
 from pricing import pricing_service_pb2_grpc
+from services import cassette, compression, hedging
+from services.channels import get_channel
+from services.endpoints import Endpoint, get_registry
+from services.resilience import Deadline, guarded_call
 
 # Constants
-PRICING_SERVICE_HOST = 'price-aggregator-go.prd.meesho.int:80'
+REQUEST_TIMEOUT = 10
 DEFAULT_METADATA = {
     'meesho-user-context': 'logged_in',
     'meesho-user-city': 'Bangalore',
@@ -21,6 +24,7 @@ def get_pricing_features(
     pricing_features: List[str],
     *,
     return_raw: bool = False,
+    deadline: Optional[Deadline] = None,
 ) -> Union[Dict[str, Dict[str, str]], Tuple[Dict[str, Dict[str, str]], Any]]:
     """
     Fetch pricing features for a list of products.
@@ -33,33 +37,48 @@ def get_pricing_features(
         app_version_code: App version code
         pricing_features: List of pricing features to fetch
         return_raw: Flag to return raw gRPC response for debugging
+        deadline: Optional page deadline bounding the call
         
     Returns:
         Dictionary mapping product IDs to their pricing features
+
+    Raises:
+        BackendUnavailable: If the call fails on every pricing endpoint or the
+            deadline is spent
     """
-    channel = grpc.insecure_channel(PRICING_SERVICE_HOST)
     metadata = _build_metadata(user_id, client_id, user_pincode, app_version_code)
-    
-    response = None
-    try:
-        entity_ids = _build_entity_ids(user_id, pdp_data)
-        feature_group = _build_feature_group(pricing_features)
-        request = _build_request(entity_ids, feature_group)
-        
-        stub = pricing_service_pb2_grpc.PricingFeatureRetrievalServiceStub(channel)
-        response = stub.retrieveFeatures(request=request, metadata=metadata)
-        
-        parsed = _process_response(response, entity_ids, pricing_features)
-        if return_raw:
-            return parsed, response
-        return parsed
-    except grpc.RpcError as e:
-        print(f"gRPC call failed: {e}")
-        if return_raw:
-            return {}, response
-        return {}
-    finally:
-        channel.close()
+    entity_ids = _build_entity_ids(user_id, pdp_data)
+    feature_group = _build_feature_group(pricing_features)
+    request = _build_request(entity_ids, feature_group)
+    request_size = request.ByteSize()
+
+    def _retrieve(endpoint: Endpoint) -> bytes:
+        def _request(timeout: float) -> bytes:
+            stub = pricing_service_pb2_grpc.PricingFeatureRetrievalServiceStub(get_channel(endpoint.address))
+            wire = compression.WireStats()
+            wire.encoding = compression.request_algorithm(compression.TARGET_PRICING, request_size)
+            # A future, so the request can be cancelled when it loses a hedged call
+            response = hedging.cancellable(stub.retrieveFeatures.future(
+                request=request, metadata=metadata, timeout=timeout,
+                compression=compression.GRPC_COMPRESSION[wire.encoding],
+            ))
+            body = response.SerializeToString()
+            compression.record("pricing", wire, request_size, len(body))
+            return body
+
+        return guarded_call(endpoint.breaker_name, _request, REQUEST_TIMEOUT, deadline)
+
+    body = cassette.intercept(
+        "pricing",
+        request.SerializeToString(deterministic=True),
+        lambda: get_registry().pool("pricing").call(_retrieve, hedge=True),
+        context=repr(metadata),
+    )
+    response = pricing_service_pb2.EntityPayload.FromString(body)
+    parsed = _process_response(response, entity_ids, pricing_features)
+    if return_raw:
+        return parsed, response
+    return parsed
 
 def _build_metadata(
     user_id: str,
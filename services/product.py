@@ -1,24 +1,34 @@
+import json
 import requests
 from math import ceil
 from typing import List, Dict, Any, Optional
 
+from services import cassette
+from services.endpoints import Endpoint, get_registry
+from services.resilience import Deadline, guarded_call
+
 # Constants
-TAXONOMY_API_URL = "http://taxonomy-new.prd.meesho.int/api/v2/product/aggregation"
+TAXONOMY_API_PATH = "/api/v2/product/aggregation"
 BATCH_SIZE = 100
-REQUEST_TIMEOUT = 1000
+REQUEST_TIMEOUT = 30
 
-def fetch_product_details(product_id_list: List[str]) -> List[Dict[str, Any]]:
+def fetch_product_details(
+    product_id_list: List[str],
+    deadline: Optional[Deadline] = None,
+) -> List[Dict[str, Any]]:
     """
     Fetch product details from taxonomy service in batches.
     
     Args:
         product_id_list: List of product IDs to fetch details for
+        deadline: Optional page deadline bounding every batch request
         
     Returns:
         List of product details with catalog and product information
         
     Raises:
-        Exception: If the API request fails
+        BackendUnavailable: If the request fails on every taxonomy endpoint or the
+            deadline is spent
     """
     headers = {"Content-Type": "application/json"}
     combined_result = []
@@ -38,17 +48,25 @@ def fetch_product_details(product_id_list: List[str]) -> List[Dict[str, Any]]:
             }
         }
 
-        try:
-            response = requests.post(
-                TAXONOMY_API_URL,
-                headers=headers,
-                json=payload,
-                timeout=REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            data = response.json()
-        except requests.RequestException as e:
-            raise Exception(f"Failed to fetch product details: {str(e)}")
+        def _post(endpoint: Endpoint) -> bytes:
+            def _request(timeout: float) -> bytes:
+                response = requests.post(
+                    f"{endpoint.address}{TAXONOMY_API_PATH}",
+                    headers=headers,
+                    json=payload,
+                    timeout=timeout
+                )
+                response.raise_for_status()
+                return response.content
+
+            return guarded_call(endpoint.breaker_name, _request, REQUEST_TIMEOUT, deadline)
+
+        body = cassette.intercept(
+            "taxonomy",
+            json.dumps(payload, sort_keys=True).encode(),
+            lambda: get_registry().pool("taxonomy").call(_post),
+        )
+        data = json.loads(body)
 
         result = _process_catalog_data(data.get("catalogs", []))
         result = _enrich_with_product_data(result, data.get("products", []))
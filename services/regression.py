@@ -0,0 +1,520 @@
+"""
+Scheduled regression runs of a saved suite of ExecuteDAG requests.
+
+Usage:
+    python -m services.regression --suite regression/suite.jsonl [--interval 900] [--fake]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from google.protobuf.json_format import ParseDict
+
+import debug.debug_pb2 as debug_pb2
+from services.candidates import tables_from_results
+from services.dag_debug import call_execute_dag_routed
+from services.endpoints import DEFAULT_CONFIG_PATH, EndpointPool, EndpointRegistry, iop_service, load_registry
+from services.resilience import BackendUnavailable, Deadline
+from services.transport import DEFAULT_TIMEOUT, TRANSPORT_GRPC
+
+# Constants
+DEFAULT_SUITE_PATH = os.environ.get("DAG_DEBUGGER_REGRESSION_SUITE", "regression/suite.jsonl")
+DEFAULT_STORE_PATH = os.environ.get("DAG_DEBUGGER_REGRESSION_DB", "regression/history.sqlite")
+DEFAULT_INTERVAL = 900
+# Executions of every case per run; the run's p95 is taken over these
+REPEATS = 5
+TOP_K = 50
+# Earlier runs of a case that make up its baseline
+BASELINE_RUNS = 20
+MIN_BASELINE_SAMPLES = 5
+# A run's p95 may exceed the baseline p95 by this factor and by MIN_LATENCY_DELTA seconds
+LATENCY_TOLERANCE = 1.25
+MIN_LATENCY_DELTA = 0.02
+MIN_OVERLAP = 0.8
+
+KIND_LATENCY = "p95_latency"
+KIND_OVERLAP = "top_k_overlap"
+KIND_FAILURE = "failure"
+
+
+class SuiteCase:
+    """One saved ExecuteDAG request and the routing it was made with."""
+
+    def __init__(
+        self,
+        name: str,
+        feed_type: str,
+        environment: str,
+        user_id: str,
+        user_context: str,
+        config_source_type: str,
+        request: Dict[str, Any],
+        grpc_transport: str = TRANSPORT_GRPC,
+    ):
+        self.name = name
+        self.feed_type = feed_type
+        self.environment = environment
+        self.user_id = user_id
+        self.user_context = user_context
+        self.config_source_type = config_source_type
+        # ExecuteDAGRequest in its JSON mapping
+        self.request = request
+        self.grpc_transport = grpc_transport
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SuiteCase":
+        request = data.get("request", {})
+        name = data.get("name") or f"{data['feed_type']}:{_digest(request)[:8]}"
+        return cls(
+            name,
+            data["feed_type"],
+            data.get("environment", "pre-prod"),
+            str(data.get("user_id", "")),
+            data.get("user_context", "logged_in"),
+            data.get("config_source_type", "RawConfigJson"),
+            request,
+            data.get("grpc_transport", TRANSPORT_GRPC),
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "feed_type": self.feed_type,
+            "environment": self.environment,
+            "user_id": self.user_id,
+            "user_context": self.user_context,
+            "config_source_type": self.config_source_type,
+            "grpc_transport": self.grpc_transport,
+            "request": self.request,
+        }
+
+    def request_kwargs(self) -> Dict[str, Any]:
+        """ExecuteDAGRequest fields as the keyword arguments `call_execute_dag` takes."""
+        message = ParseDict(self.request, debug_pb2.ExecuteDAGRequest())
+        kwargs: Dict[str, Any] = {}
+        source = message.WhichOneof("ConfigSource")
+        if source:
+            kwargs[source] = getattr(message, source)
+        if message.ConfigKind:
+            kwargs["ConfigKind"] = message.ConfigKind
+        if message.HasField("Data"):
+            kwargs["Data"] = message.Data
+        return kwargs
+
+
+def load_suite(path: str = DEFAULT_SUITE_PATH) -> List[SuiteCase]:
+    """Cases of a JSONL suite file, one case per line; blank lines are skipped."""
+    with open(path) as f:
+        return [SuiteCase.from_dict(json.loads(line)) for line in f if line.strip()]
+
+
+def append_case(case: SuiteCase, path: str = DEFAULT_SUITE_PATH) -> None:
+    """Add `case` to the suite file, replacing a case of the same name."""
+    cases = load_suite(path) if os.path.exists(path) else []
+    cases = [existing for existing in cases if existing.name != case.name] + [case]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        for existing in cases:
+            f.write(json.dumps(existing.as_dict(), sort_keys=True) + "\n")
+
+
+def case_from_execution(execution: Dict[str, Any], name: str = "") -> SuiteCase:
+    """Suite case repeating a stored DAG execution of the debugger."""
+    return SuiteCase.from_dict({
+        "name": name,
+        "feed_type": execution["feed_type"],
+        "environment": execution["environment"],
+        "user_id": execution["user_id"],
+        "user_context": execution["user_context"],
+        "config_source_type": execution["config_source_type"],
+        "grpc_transport": execution.get("grpc_transport", TRANSPORT_GRPC),
+        "request": execution["request"],
+    })
+
+
+def top_ids(results: Dict[str, str], top_k: int = TOP_K) -> Dict[str, List[Any]]:
+    """Result key -> IDs of its first `top_k` candidates, for every candidate-list key."""
+    tables, _ = tables_from_results(results, keep_raw=False)
+    return {key: [table.id_at(row) for row in range(min(top_k, len(table)))] for key, table in tables.items()}
+
+
+def result_digest(results: Dict[str, str]) -> str:
+    """Fingerprint of the full ranked ID lists of every result key."""
+    tables, _ = tables_from_results(results, keep_raw=False)
+    return _digest({key: [table.id_at(row) for row in range(len(table))] for key, table in tables.items()})
+
+
+def top_k_overlap(current: Dict[str, List[Any]], baseline: Dict[str, List[Any]]) -> Dict[str, float]:
+    """Per baseline key, the share of its top-K IDs still in the current top-K (0 if the key vanished)."""
+    overlap = {}
+    for key, ids in baseline.items():
+        if ids:
+            overlap[key] = len(set(ids).intersection(current.get(key, []))) / len(ids)
+    return overlap
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RegressionStore:
+    """
+    Time series of regression runs in a single SQLite file.
+
+    `samples` holds one row per execution (latency, outcome, endpoint),
+    `fingerprints` one row per case and run (result digest and top-K IDs per key),
+    and `regressions` every flagged deviation from the rolling baseline.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL, cases INTEGER, regressions INTEGER);"
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " run_id TEXT NOT NULL, case_name TEXT NOT NULL, started_at REAL NOT NULL, latency REAL NOT NULL,"
+            " success INTEGER NOT NULL, error TEXT, transport TEXT, endpoint TEXT);"
+            "CREATE INDEX IF NOT EXISTS samples_case ON samples (case_name, run_id);"
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            " run_id TEXT NOT NULL, case_name TEXT NOT NULL, started_at REAL NOT NULL, digest TEXT NOT NULL,"
+            " top_ids TEXT NOT NULL, PRIMARY KEY (case_name, run_id));"
+            "CREATE TABLE IF NOT EXISTS regressions ("
+            " run_id TEXT NOT NULL, case_name TEXT NOT NULL, detected_at REAL NOT NULL, kind TEXT NOT NULL,"
+            " value REAL, baseline REAL, detail TEXT);"
+        )
+        self._conn.commit()
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def start_run(self) -> str:
+        run_id = uuid.uuid4().hex
+        self._execute("INSERT INTO runs (run_id, started_at) VALUES (?, ?)", (run_id, time.time()))
+        return run_id
+
+    def finish_run(self, run_id: str, cases: int, regressions: int) -> None:
+        self._execute(
+            "UPDATE runs SET finished_at = ?, cases = ?, regressions = ? WHERE run_id = ?",
+            (time.time(), cases, regressions, run_id),
+        )
+
+    def add_sample(self, run_id: str, case_name: str, latency: float, success: bool, error: str = "",
+                   transport: str = "", endpoint: str = "") -> None:
+        self._execute(
+            "INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, case_name, time.time(), latency, int(success), error, transport, endpoint),
+        )
+
+    def add_fingerprint(self, run_id: str, case_name: str, digest: str, ids: Dict[str, List[Any]]) -> None:
+        self._execute(
+            "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+            (run_id, case_name, time.time(), digest, json.dumps(ids, default=str)),
+        )
+
+    def add_regression(self, run_id: str, case_name: str, kind: str, value: float, baseline: float,
+                       detail: str = "") -> None:
+        self._execute(
+            "INSERT INTO regressions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, case_name, time.time(), kind, value, baseline, detail),
+        )
+
+    def baseline_latencies(self, case_name: str, run_id: str, runs: int = BASELINE_RUNS) -> List[float]:
+        """Successful latencies of the case in its last `runs` runs before `run_id`."""
+        rows = self._query(
+            "SELECT latency FROM samples WHERE case_name = ? AND success = 1 AND run_id IN ("
+            " SELECT run_id FROM samples WHERE case_name = ? AND run_id != ?"
+            " GROUP BY run_id ORDER BY MIN(started_at) DESC LIMIT ?)",
+            (case_name, case_name, run_id, runs),
+        )
+        return [row[0] for row in rows]
+
+    def baseline_fingerprints(self, case_name: str, run_id: str, runs: int = BASELINE_RUNS) -> List[Dict[str, List[Any]]]:
+        """Top-K IDs per key of the case in its last `runs` fingerprinted runs before `run_id`, newest first."""
+        rows = self._query(
+            "SELECT top_ids FROM fingerprints WHERE case_name = ? AND run_id != ? ORDER BY started_at DESC LIMIT ?",
+            (case_name, run_id, runs),
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def history(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Per case and run: executions, failures and p95 latency, newest first."""
+        rows = self._query(
+            "SELECT r.run_id, r.started_at, s.case_name, COUNT(*), SUM(1 - s.success), GROUP_CONCAT(s.latency)"
+            " FROM runs r JOIN samples s ON s.run_id = r.run_id"
+            " GROUP BY r.run_id, s.case_name ORDER BY r.started_at DESC LIMIT ?",
+            (limit,),
+        )
+        return [
+            {
+                "run": run_id[:8],
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started_at)),
+                "case": case_name,
+                "executions": count,
+                "failures": failures,
+                "p95_ms": round(percentile([float(v) for v in latencies.split(",")], 95) * 1000, 1),
+            }
+            for run_id, started_at, case_name, count, failures, latencies in rows
+        ]
+
+    def regressions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT run_id, case_name, detected_at, kind, value, baseline, detail"
+            " FROM regressions ORDER BY detected_at DESC LIMIT ?",
+            (limit,),
+        )
+        return [
+            {
+                "run": run_id[:8],
+                "detected": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(detected_at)),
+                "case": case_name,
+                "kind": kind,
+                "value": value,
+                "baseline": baseline,
+                "detail": detail,
+            }
+            for run_id, case_name, detected_at, kind, value, baseline, detail in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CaseReport:
+    """Outcome of one case in one run, compared with its rolling baseline."""
+
+    def __init__(self, case: SuiteCase, run_id: str):
+        self.case = case
+        self.run_id = run_id
+        self.latencies: List[float] = []
+        self.failures = 0
+        self.error = ""
+        self.p95 = 0.0
+        self.baseline_p95: Optional[float] = None
+        self.overlap: Optional[float] = None
+        self.changed = False
+        self.regressions: List[Dict[str, Any]] = []
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "case": self.case.name,
+            "executions": len(self.latencies) + self.failures,
+            "failures": self.failures,
+            "p95_ms": round(self.p95 * 1000, 1),
+            "baseline_p95_ms": round(self.baseline_p95 * 1000, 1) if self.baseline_p95 is not None else None,
+            f"overlap@{TOP_K}": round(self.overlap, 4) if self.overlap is not None else None,
+            "results_changed": self.changed,
+            "regressions": ", ".join(r["kind"] for r in self.regressions),
+            "error": self.error,
+        }
+
+
+def run_case(
+    case: SuiteCase,
+    pool: EndpointPool,
+    store: RegressionStore,
+    run_id: str,
+    repeats: int = REPEATS,
+    top_k: int = TOP_K,
+    baseline_runs: int = BASELINE_RUNS,
+) -> CaseReport:
+    """
+    Execute `case` `repeats` times, record the samples and flag deviations from its baseline.
+
+    The run's p95 latency is a regression when it exceeds the p95 of the baseline
+    runs by LATENCY_TOLERANCE (and MIN_LATENCY_DELTA). Result drift is measured as
+    the worst per-key top-K overlap against the most similar baseline run, so a
+    deliberate change is flagged once and then becomes part of the baseline.
+    """
+    report = CaseReport(case, run_id)
+    request_kwargs = case.request_kwargs()
+    first_results: Optional[Dict[str, str]] = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        try:
+            response = call_execute_dag_routed(
+                request_kwargs, case.config_source_type, case.user_id, case.user_context, case.feed_type,
+                pool, Deadline(DEFAULT_TIMEOUT), case.grpc_transport,
+            )
+        except BackendUnavailable as e:
+            response, error = None, str(e)
+        else:
+            error = "" if response.Success else response.Error
+        latency = time.perf_counter() - start
+        store.add_sample(
+            run_id, case.name, latency, not error, error,
+            response.transport if response else "", response.endpoint if response else "",
+        )
+        if error:
+            report.failures += 1
+            report.error = error
+            continue
+        report.latencies.append(latency)
+        if first_results is None:
+            first_results = response.Results
+
+    if first_results is None:
+        _flag(report, store, KIND_FAILURE, float(report.failures), 0.0, report.error)
+        return report
+
+    report.p95 = percentile(report.latencies, 95)
+    baseline = store.baseline_latencies(case.name, run_id, baseline_runs)
+    if len(baseline) >= MIN_BASELINE_SAMPLES:
+        report.baseline_p95 = percentile(baseline, 95)
+        if (report.p95 > report.baseline_p95 * LATENCY_TOLERANCE
+                and report.p95 - report.baseline_p95 > MIN_LATENCY_DELTA):
+            _flag(report, store, KIND_LATENCY, report.p95, report.baseline_p95,
+                  f"p95 {report.p95 * 1000:.1f} ms vs baseline {report.baseline_p95 * 1000:.1f} ms")
+
+    ids = top_ids(first_results, top_k)
+    digest = result_digest(first_results)
+    previous = store.baseline_fingerprints(case.name, run_id, baseline_runs)
+    if previous:
+        # Against the most similar baseline run, so results alternating between known states are not flagged
+        overlaps = [top_k_overlap(ids, baseline_ids) for baseline_ids in previous]
+        best = max(overlaps, key=lambda per_key: min(per_key.values(), default=1.0))
+        report.overlap = min(best.values(), default=1.0)
+        report.changed = report.overlap < 1.0
+        if report.overlap < MIN_OVERLAP:
+            worst = sorted((value, key) for key, value in best.items() if value < MIN_OVERLAP)
+            _flag(report, store, KIND_OVERLAP, report.overlap, MIN_OVERLAP,
+                  ", ".join(f"{key}: {value:.2f}" for value, key in worst))
+    store.add_fingerprint(run_id, case.name, digest, ids)
+    return report
+
+
+def _flag(report: CaseReport, store: RegressionStore, kind: str, value: float, baseline: float, detail: str) -> None:
+    store.add_regression(report.run_id, report.case.name, kind, value, baseline, detail)
+    report.regressions.append({"kind": kind, "value": value, "baseline": baseline, "detail": detail})
+
+
+def run_suite(
+    cases: List[SuiteCase],
+    store: RegressionStore,
+    registry: EndpointRegistry,
+    repeats: int = REPEATS,
+    top_k: int = TOP_K,
+    baseline_runs: int = BASELINE_RUNS,
+) -> List[CaseReport]:
+    """Run every case once through its IOP pool in `registry` and record the run."""
+    run_id = store.start_run()
+    reports = []
+    for case in cases:
+        pool = registry.pool(iop_service(case.environment, case.feed_type))
+        reports.append(run_case(case, pool, store, run_id, repeats, top_k, baseline_runs))
+    store.finish_run(run_id, len(reports), sum(len(report.regressions) for report in reports))
+    return reports
+
+
+def schedule(
+    suite_path: str,
+    store: RegressionStore,
+    registry_loader: Callable[[], EndpointRegistry],
+    interval: float = DEFAULT_INTERVAL,
+    iterations: Optional[int] = None,
+    on_report: Optional[Callable[[List[CaseReport]], None]] = None,
+    **run_options: Any,
+) -> List[CaseReport]:
+    """
+    Run the suite every `interval` seconds.
+
+    The suite file and endpoint registry are re-read before every run, so cases
+    can be added while the scheduler is running.
+
+    Returns:
+        Reports of the last run
+    """
+    reports: List[CaseReport] = []
+    iteration = 0
+    while iterations is None or iteration < iterations:
+        started = time.monotonic()
+        reports = run_suite(load_suite(suite_path), store, registry_loader(), **run_options)
+        if on_report is not None:
+            on_report(reports)
+        iteration += 1
+        if iterations is not None and iteration >= iterations:
+            break
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    return reports
+
+
+def _print_reports(reports: List[CaseReport]) -> None:
+    print(time.strftime("%Y-%m-%d %H:%M:%S"))
+    for report in reports:
+        row = report.as_dict()
+        status = "REGRESSION" if report.regressions else "ok"
+        print(f"  [{status}] {row['case']}: p95 {row['p95_ms']} ms (baseline {row['baseline_p95_ms']}),"
+              f" overlap {row[f'overlap@{TOP_K}']}, failures {row['failures']}")
+        for regression in report.regressions:
+            print(f"      {regression['kind']}: {regression['detail']}")
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", default=DEFAULT_SUITE_PATH)
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--endpoints", default=DEFAULT_CONFIG_PATH)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument("--iterations", type=int, default=None, help="Stop after this many runs (default: run forever)")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--baseline-runs", type=int, default=BASELINE_RUNS)
+    parser.add_argument("--fake", action="store_true", help="Run against in-process fake backends")
+    args = parser.parse_args()
+
+    fakes = None
+    registry_loader = lambda: load_registry(args.endpoints)  # noqa: E731
+    if args.fake:
+        from fakes.backends import FakeBackends
+
+        fakes = FakeBackends().start()
+        registry = EndpointRegistry(fakes.endpoints_config(), "fake backends")
+        registry_loader = lambda: registry  # noqa: E731
+    store = RegressionStore(args.store)
+    try:
+        reports = schedule(
+            args.suite, store, registry_loader, args.interval, args.iterations, _print_reports,
+            repeats=args.repeats, top_k=args.top_k, baseline_runs=args.baseline_runs,
+        )
+    except KeyboardInterrupt:
+        reports = []
+    finally:
+        store.close()
+        if fakes is not None:
+            fakes.stop()
+    # Non-zero exit when the last run regressed, for use as a CI gate
+    sys.exit(1 if any(report.regressions for report in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
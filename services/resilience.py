@@ -0,0 +1,263 @@
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+import grpc
+import requests
+
+from services import metrics
+from services.hedging import HedgeCancelled
+
+T = TypeVar("T")
+
+# Constants
+PAGE_BUDGET = 45.0  # seconds for one full page render (DAG + enrichment)
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30.0
+MIN_CALL_TIMEOUT = 0.2
+
+# Placed in enrichment fields whose backend was skipped or failed
+DEGRADED = "DEGRADED"
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+# gRPC status codes that indicate an unhealthy backend rather than a bad request
+BREAKER_GRPC_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.UNKNOWN,
+}
+
+
+class BackendUnavailable(Exception):
+    """Raised when a backend call is skipped or fails, so callers can degrade the result."""
+
+    def __init__(self, backend: str, reason: str):
+        super().__init__(f"{backend} unavailable: {reason}")
+        self.backend = backend
+        self.reason = reason
+
+
+class PartialFailure(BackendUnavailable):
+    """Raised when some batches of a batched lookup failed; `result` holds what the other batches returned."""
+
+    def __init__(self, backend: str, reason: str, result: Dict):
+        super().__init__(backend, reason)
+        self.result = result
+
+
+class RequestRejected(BackendUnavailable):
+    """Raised when a backend refused the request itself (4xx, INVALID_ARGUMENT, ...); no other endpoint would take it."""
+
+
+class MalformedResponse(Exception):
+    """Raised by a call whose backend answered with a body it cannot have meant, e.g. an HTML error page."""
+
+
+class DeadlineExceeded(BackendUnavailable):
+    """Raised when too little of the page budget is left to call a backend."""
+
+    def __init__(self, backend: str):
+        super().__init__(backend, "time budget exhausted")
+
+
+class Deadline:
+    """Time budget shared by every backend call made while rendering one page."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def child(self, share: float) -> "Deadline":
+        """Carve a sub-budget of `share` (0..1] of the remaining time for one stage."""
+        return Deadline(self.remaining() * share)
+
+    def timeout(self, backend: str, cap: Optional[float] = None) -> float:
+        """
+        Timeout a single call to `backend` may use.
+
+        Raises:
+            DeadlineExceeded: If too little of the budget is left to make the call
+        """
+        remaining = self.remaining()
+        if remaining < MIN_CALL_TIMEOUT:
+            raise DeadlineExceeded(backend)
+        return min(remaining, cap) if cap is not None else remaining
+
+
+class CircuitBreaker:
+    """
+    Per-backend circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail
+    fast for `reset_timeout` seconds. One trial call is then let through (half-open);
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = ""
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """
+        Let a call through unless the circuit is open.
+
+        Returns:
+            True if the call is the half-open trial: its outcome must be recorded, or
+            the trial given back with `release_trial` if the call ends without one
+
+        Raises:
+            BackendUnavailable: If the circuit is open or another trial call is in flight
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return False
+            if self.state == STATE_OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = STATE_HALF_OPEN
+                return True
+            raise BackendUnavailable(self.name, f"circuit open ({self.last_error})")
+
+    def release_trial(self) -> None:
+        """Give back a trial call that ended without an outcome (e.g. cancelled); the next call is the trial."""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                # opened_at is already past the reset timeout
+                self.state = STATE_OPEN
+
+    @property
+    def rejecting(self) -> bool:
+        """True while `before_call` would fail fast: the circuit is open or its trial call is in flight."""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                return True
+            return self.state == STATE_OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self.last_error = ""
+
+    def record_failure(self, error: str) -> None:
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = STATE_OPEN
+                self.opened_at = time.monotonic()
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for `backend`, creating it on first use."""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(backend)
+        if breaker is None:
+            breaker = _BREAKERS[backend] = CircuitBreaker(backend)
+        return breaker
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """True for errors that say the backend is unhealthy (transport errors, timeouts, 5xx, ...), not the request bad."""
+    if isinstance(error, MalformedResponse):
+        return True
+    if isinstance(error, requests.HTTPError):
+        return error.response is None or error.response.status_code >= 500
+    if isinstance(error, requests.RequestException):
+        return True
+    if isinstance(error, grpc.RpcError) and callable(getattr(error, "code", None)):
+        return error.code() in BREAKER_GRPC_CODES
+    return isinstance(error, (TimeoutError, ConnectionError, concurrent.futures.TimeoutError))
+
+
+def guarded_call(
+    backend: str,
+    call: Callable[[float], T],
+    default_timeout: float,
+    deadline: Optional[Deadline] = None,
+) -> T:
+    """
+    Run `call(timeout)` under the backend's circuit breaker and the page deadline.
+
+    Args:
+        backend: Backend name used for the circuit breaker
+        call: Callable performing the request with the given timeout in seconds
+        default_timeout: Upper bound on the timeout for this call
+        deadline: Optional page deadline the timeout is taken from
+
+    Returns:
+        Whatever `call` returns
+
+    Raises:
+        RequestRejected: If the backend rejected the request; not counted against the breaker
+        BackendUnavailable: If the circuit is open, the budget is spent or the call fails
+    """
+    # Breaker names are "<backend>:<endpoint>"
+    name, _, endpoint = backend.partition(":")
+    try:
+        timeout = deadline.timeout(backend, cap=default_timeout) if deadline else default_timeout
+        breaker = get_breaker(backend)
+        trial = breaker.before_call()
+    except DeadlineExceeded:
+        metrics.BACKEND_REQUESTS.labels(name, endpoint, "deadline").inc()
+        raise
+    except BackendUnavailable:
+        metrics.BACKEND_REQUESTS.labels(name, endpoint, "circuit_open").inc()
+        raise
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with metrics.BACKEND_INFLIGHT.track_inprogress(name):
+            result = call(timeout)
+        outcome = "ok"
+    except BackendUnavailable:
+        # Raised by `call` itself and not recorded here; a trial must not be left in flight
+        if trial:
+            breaker.release_trial()
+        raise
+    except HedgeCancelled:
+        # The other attempt of a hedged call won; says nothing about this backend's health
+        outcome = "cancelled"
+        if trial:
+            breaker.release_trial()
+        raise
+    except Exception as e:
+        if not is_backend_failure(e):
+            # A bad request says nothing about the backend's health
+            outcome = "rejected"
+            if trial:
+                breaker.release_trial()
+            raise RequestRejected(backend, str(e)) from e
+        breaker.record_failure(str(e))
+        raise BackendUnavailable(backend, str(e)) from e
+    finally:
+        metrics.BACKEND_LATENCY.labels(name).observe(time.perf_counter() - start)
+        metrics.BACKEND_REQUESTS.labels(name, endpoint, outcome).inc()
+    breaker.record_success()
+    return result
@@ -0,0 +1,255 @@
+import math
+import re
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.candidates import CandidateTable
+
+# Constants
+SORT_RANK = "rank"
+SORT_PRICE = "price"
+SORT_ID = "id"
+SORTS = [SORT_RANK, SORT_PRICE, SORT_ID]
+DEFAULT_LIMIT = 100
+PRICE_FEATURE = "serving_price"
+# Matches above this share of all candidates are sorted by walking a presorted order instead of sorting them
+WALK_SHARE = 0.1
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _as_price(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        # DEGRADED or missing pricing
+        return math.nan
+
+
+class SearchResult:
+    """One page of matches of a query, with the total match count and the time it took."""
+
+    __slots__ = ("total", "rows", "elapsed")
+
+    def __init__(self, total: int, rows: List[Dict[str, Any]], elapsed: float):
+        self.total = total
+        self.rows = rows
+        self.elapsed = elapsed
+
+
+class CandidateIndex:
+    """
+    Search index over the candidates of every result key of one execution.
+
+    Candidates are numbered across keys (documents). IDs, ranks and prices are
+    kept in typed arrays with a presorted document order each, so ID lookups and
+    price bands are binary searches. `catalog_name` and `sscat_name` tokens of
+    enriched candidates go into an inverted index; query terms match token
+    prefixes through the sorted vocabulary. Enrichment is added incrementally as
+    it is fetched, so the index never triggers backend calls.
+    """
+
+    def __init__(self, tables: Dict[str, CandidateTable]):
+        self.keys = list(tables)
+        self.tables = tables
+        self.key_of = array("H")
+        self.row_of = array("I")
+        self.ranks = array("I")
+        ids: List[Any] = []
+        for key_index, table in enumerate(tables.values()):
+            count = len(table)
+            self.key_of.extend([key_index] * count)
+            self.row_of.extend(range(count))
+            self.ranks.extend(range(1, count + 1))
+            ids.extend(table.id_at(row) for row in range(count))
+        self.ids = ids
+        self.prices = array("d", [math.nan]) * len(ids)
+        self.names: Dict[int, Tuple[str, str]] = {}
+        # Ties keep document order, so equal ranks list result keys in response order
+        self.rank_order = array("I", sorted(range(len(ids)), key=self.ranks.__getitem__))
+        self.id_order = array("I", sorted((doc for doc in range(len(ids)) if ids[doc] is not None),
+                                          key=lambda doc: _sort_key(ids[doc])))
+        self._sorted_ids = [_sort_key(ids[doc]) for doc in self.id_order]
+        self._docs_by_id: Dict[Any, List[int]] = {}
+        for doc, cid in enumerate(ids):
+            if cid is not None:
+                self._docs_by_id.setdefault(cid, []).append(doc)
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._price_order = array("I")
+        self._sorted_prices: List[float] = []
+        self._enriched: Set[Any] = set()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add_enrichment(
+        self,
+        hero_pids: Dict[Any, str],
+        products: Dict[str, Dict[str, Any]],
+        pricing: Dict[str, Dict[str, str]],
+    ) -> int:
+        """
+        Index names and prices of newly enriched catalog IDs, in every result key they occur in.
+
+        Args:
+            hero_pids: Catalog ID -> hero PID
+            products: Hero PID -> product dict with `catalog_name` and `sscat_name`
+            pricing: Hero PID -> pricing features
+
+        Returns:
+            Number of catalog IDs indexed
+        """
+        added = 0
+        for cid, pid in hero_pids.items():
+            product = products.get(str(pid))
+            if cid in self._enriched or product is None or cid not in self._docs_by_id:
+                continue
+            self._enriched.add(cid)
+            added += 1
+            catalog_name = str(product.get("catalog_name") or "")
+            sscat_name = str(product.get("sscat_name") or "")
+            price = _as_price(pricing.get(str(pid), {}).get(PRICE_FEATURE))
+            tokens = set(tokenize(catalog_name)) | set(tokenize(sscat_name))
+            for doc in self._docs_by_id[cid]:
+                self.names[doc] = (catalog_name, sscat_name)
+                self.prices[doc] = price
+                for token in tokens:
+                    self._postings.setdefault(token, set()).add(doc)
+        if added:
+            self._dirty = True
+        return added
+
+    def _refresh(self) -> None:
+        if not self._dirty:
+            return
+        self._vocabulary = sorted(self._postings)
+        priced = [doc for doc in self.names if not math.isnan(self.prices[doc])]
+        self._price_order = array("I", sorted(priced, key=lambda doc: (self.prices[doc], doc)))
+        self._sorted_prices = [self.prices[doc] for doc in self._price_order]
+        self._dirty = False
+
+    def _term_docs(self, term: str) -> Set[int]:
+        """Documents with a token starting with `term`, or whose catalog ID is `term`."""
+        docs: Set[int] = set()
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            docs |= self._postings[token]
+        # Tables whose IDs did not all parse as integers keep them as strings
+        id_keys = [(0, int(term)), (1, term)] if term.isdigit() else [(1, term)]
+        for id_key in id_keys:
+            lo = bisect_left(self._sorted_ids, id_key)
+            hi = bisect_right(self._sorted_ids, id_key)
+            docs.update(self.id_order[lo:hi])
+        return docs
+
+    def _price_docs(self, price_min: Optional[float], price_max: Optional[float]) -> Set[int]:
+        prices = self._sorted_prices
+        lo = 0 if price_min is None else bisect_left(prices, price_min)
+        hi = len(prices) if price_max is None else bisect_right(prices, price_max)
+        return set(self._price_order[lo:hi])
+
+    def search(
+        self,
+        query: str = "",
+        keys: Optional[Iterable[str]] = None,
+        price_min: Optional[float] = None,
+        price_max: Optional[float] = None,
+        sort: str = SORT_RANK,
+        descending: bool = False,
+        limit: int = DEFAULT_LIMIT,
+    ) -> SearchResult:
+        """
+        Filter, search and sort candidates across result keys.
+
+        Args:
+            query: Terms that must all match a name or SSCat token prefix or the catalog ID
+            keys: Result keys to search; all when None
+            price_min: Lowest serving price; candidates without a price are excluded when a band is set
+            price_max: Highest serving price
+            sort: SORT_RANK, SORT_PRICE or SORT_ID; candidates without a price sort last by price
+            descending: Reverse the sort order
+            limit: Rows to return
+
+        Returns:
+            The first `limit` matches as row dicts and the total match count
+
+        Raises:
+            ValueError: If the sort is unknown
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        start = time.perf_counter()
+        self._refresh()
+        matches: Optional[Set[int]] = None
+        for term in sorted(set(tokenize(query)), key=len, reverse=True):
+            docs = self._term_docs(term)
+            matches = docs if matches is None else matches & docs
+            if not matches:
+                break
+        if price_min is not None or price_max is not None:
+            docs = self._price_docs(price_min, price_max)
+            matches = docs if matches is None else matches & docs
+        selected_keys = None if keys is None else {self.keys.index(key) for key in keys if key in self.keys}
+        if selected_keys is not None and len(selected_keys) < len(self.keys):
+            key_of = self.key_of
+            if matches is None:
+                matches = {doc for doc in range(len(self)) if key_of[doc] in selected_keys}
+            else:
+                matches = {doc for doc in matches if key_of[doc] in selected_keys}
+
+        ordered = self._ordered(matches, sort, descending)
+        total = len(self) if matches is None else len(matches)
+        rows = [self.row(doc) for doc in ordered[:limit]]
+        return SearchResult(total, rows, time.perf_counter() - start)
+
+    def _ordered(self, matches: Optional[Set[int]], sort: str, descending: bool) -> List[int]:
+        if sort == SORT_PRICE:
+            priced = list(reversed(self._price_order)) if descending else list(self._price_order)
+            priced_set = set(self._price_order)
+            unpriced = [doc for doc in self.rank_order if doc not in priced_set]
+            order: Iterable[int] = priced + unpriced
+            if matches is not None:
+                order = [doc for doc in order if doc in matches]
+            return list(order)
+        if sort == SORT_RANK:
+            presorted, sort_key = self.rank_order, lambda doc: (self.ranks[doc], doc)
+        else:
+            presorted, sort_key = self.id_order, lambda doc: (_sort_key(self.ids[doc]), doc)
+        if matches is None:
+            return list(reversed(presorted)) if descending else list(presorted)
+        if len(matches) > WALK_SHARE * len(self):
+            walked = [doc for doc in presorted if doc in matches]
+            return walked[::-1] if descending else walked
+        return sorted((doc for doc in matches if sort == SORT_RANK or self.ids[doc] is not None),
+                      key=sort_key, reverse=descending)
+
+    def row(self, doc: int) -> Dict[str, Any]:
+        table = self.tables[self.keys[self.key_of[doc]]]
+        row = self.row_of[doc]
+        catalog_name, sscat_name = self.names.get(doc, (None, None))
+        price = self.prices[doc]
+        return {
+            "key": table.key,
+            "rank": self.ranks[doc],
+            "id": self.ids[doc],
+            "score": None if math.isnan(table.scores[row]) else table.scores[row],
+            "source": table.sources[row],
+            "hero_pid": table.hero_pids[row],
+            "catalog_name": catalog_name,
+            "sscat_name": sscat_name,
+            "serving_price": None if math.isnan(price) else price,
+        }
+
+
+def _sort_key(cid: Any) -> Tuple[int, Any]:
+    """Integer IDs sort numerically, before any non-integer IDs sorted as strings."""
+    return (0, cid) if isinstance(cid, int) else (1, str(cid))
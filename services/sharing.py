@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.candidates import CandidateTable
+from services.resilience import Deadline, PartialFailure
+
+# Constants
+DEFAULT_PATH = os.environ.get("DAG_DEBUGGER_SHARED_STORE", "shared/executions.sqlite")
+# Shared results go stale as the DAG's inputs change; older ones are not served
+TTL = int(os.environ.get("DAG_DEBUGGER_SHARED_TTL", str(24 * 60 * 60)))
+MAX_BYTES = int(os.environ.get("DAG_DEBUGGER_SHARED_MAX_BYTES", str(1024 * 1024 * 1024)))
+SHARE_ID_LENGTH = 20
+COMPRESSION_LEVEL = 1
+# Stored entries of another format version (or undecodable ones) are treated as unknown
+FORMAT_VERSION = 1
+# Execution fields stored next to the response and tables; the rest is per session
+EXECUTION_FIELDS = (
+    "feed_type", "environment", "user_id", "user_context", "config_source_type", "grpc_transport", "request",
+    "result_keys", "pages", "calls", "comparison", "partial_errors", "size_report",
+)
+
+
+def share_id(request_body: bytes, environment: str, variant: str = "") -> str:
+    """
+    Content address of an execution.
+
+    Args:
+        request_body: The deterministically serialized request
+        environment: Environment the request was sent to
+        variant: Anything else that changes the results (user headers, pagination)
+    """
+    digest = hashlib.sha256(f"{environment}|{variant}|".encode() + request_body).hexdigest()
+    return digest[:SHARE_ID_LENGTH]
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+
+
+def _unpack(blob: bytes) -> Any:
+    """
+    Raises:
+        ValueError: If the blob is not compressed JSON
+    """
+    try:
+        return json.loads(zlib.decompress(blob))
+    except zlib.error as e:
+        raise ValueError(str(e)) from e
+
+
+def _pairs(mapping: Dict[Any, Any]) -> List[List[Any]]:
+    """A dict as [key, value] pairs, so non-string keys (catalog IDs) survive JSON."""
+    return [[key, value] for key, value in mapping.items()]
+
+
+class SharedExecutionStore:
+    """
+    Executions shared across sessions and processes, in a single SQLite file.
+
+    Each execution is stored once under its `share_id`, with its response, candidate
+    tables and (once enriched) hero PIDs, products and pricing, as compressed JSON;
+    objects are rebuilt on load, so opening a link never runs code from the store
+    and survives changes to the app's classes. Entries expire `ttl` seconds after they were stored; beyond
+    `max_bytes` the least recently opened ones are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: int = TTL, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS executions ("
+            " share_id TEXT PRIMARY KEY, created_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+            " feed_type TEXT, environment TEXT, execution BLOB NOT NULL, enrichment BLOB,"
+            " size INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS executions_accessed ON executions (accessed_at);"
+        )
+        self._conn.commit()
+
+    def put(self, share_id: str, execution: Dict[str, Any]) -> int:
+        """Store an execution (replacing an older one under the same ID); returns its compressed size."""
+        response = execution["response"]
+        blob = _pack({
+            "version": FORMAT_VERSION,
+            "fields": {name: execution[name] for name in EXECUTION_FIELDS if name in execution},
+            "response": [response.Success, response.Results, response.Error],
+            "tables": [
+                [key, table.to_json(), table.raw_json() is not None] for key, table in execution["tables"].items()
+            ],
+        })
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?, NULL, ?)",
+                (share_id, now, now, execution.get("feed_type"), execution.get("environment"), blob, len(blob)),
+            )
+            self._evict(now)
+            self._conn.commit()
+        return len(blob)
+
+    def put_enrichment(self, share_id: str, enrichment: Dict[str, Dict[str, Any]]) -> None:
+        """Attach the enrichment snapshot of a stored execution."""
+        blob = _pack({name: _pairs(values) for name, values in enrichment.items()})
+        with self._lock:
+            self._conn.execute(
+                "UPDATE executions SET enrichment = ?, size = LENGTH(execution) + ? WHERE share_id = ?",
+                (blob, len(blob), share_id),
+            )
+            self._evict(time.time())
+            self._conn.commit()
+
+    def get(self, share_id: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]]:
+        """
+        A stored execution and its enrichment snapshot ({} if not enriched yet).
+
+        Returns:
+            (execution fields with `response`, `tables` and `shared_at`, enrichment), or None
+            if the ID is unknown, expired or stored in a format this version cannot read
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, execution, enrichment FROM executions WHERE share_id = ? AND created_at > ?",
+                (share_id, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE executions SET accessed_at = ? WHERE share_id = ?", (now, share_id))
+            self._conn.commit()
+        created_at, blob, enrichment = row
+        try:
+            stored = _unpack(blob)
+            if stored.get("version") != FORMAT_VERSION:
+                return None
+            tables: Dict[str, CandidateTable] = {}
+            for key, text, keep_raw in stored["tables"]:
+                table = CandidateTable.from_json(key, text, keep_raw=keep_raw)
+                if table is None:
+                    return None
+                tables[key] = table
+            success, results, error = stored["response"]
+            snapshot = {}
+            if enrichment:
+                snapshot = {name: dict(map(tuple, pairs)) for name, pairs in _unpack(enrichment).items()}
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+        execution = dict(stored["fields"], response=(success, results, error), tables=tables, shared_at=created_at)
+        return execution, snapshot
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM executions WHERE created_at <= ?", (now - self.ttl,))
+        total, = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM executions").fetchone()
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT share_id, size FROM executions ORDER BY accessed_at DESC").fetchall()
+        kept = 0
+        for index, (sid, size) in enumerate(rows):
+            kept += size
+            # The most recently opened execution is always kept
+            if kept > self.max_bytes and index > 0:
+                self._conn.executemany(
+                    "DELETE FROM executions WHERE share_id = ?", [(old,) for old, _ in rows[index:]]
+                )
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM executions WHERE created_at > ?",
+                (time.time() - self.ttl,),
+            ).fetchone()
+        return {"executions": count, "bytes": size, "max_bytes": self.max_bytes, "ttl_s": self.ttl}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[SharedExecutionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store(path: str = DEFAULT_PATH) -> SharedExecutionStore:
+    """Process-wide store; other processes using the same file see the same executions."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != path:
+            _store = SharedExecutionStore(path)
+        return _store
+
+
+def seeded_fetchers(
+    enrichment: Dict[str, Dict[str, Any]],
+    fetch_hero_pids: Callable[[List[Any], Deadline], Dict[Any, str]],
+    fetch_products: Callable[[List[str], Deadline], List[Dict[str, Any]]],
+    fetch_pricing: Callable[[str, List[Tuple[str, str, str]], Deadline], Dict[str, Dict[str, str]]],
+):
+    """
+    Enrichment fetchers answering from a stored snapshot first.
+
+    Only IDs missing from the snapshot reach the backends, so a shared execution
+    that was enriched before it was opened renders without any backend call.
+
+    Returns:
+        (fetch_hero_pids, fetch_products, fetch_pricing) with the signatures `EnrichmentPrefetch` takes
+    """
+    hero_pids = enrichment.get("hero_pids", {})
+    products = enrichment.get("products", {})
+    pricing = enrichment.get("pricing", {})
+
+    def _hero_pids(catalog_ids: List[Any], deadline: Deadline) -> Dict[Any, str]:
+        found = {cid: hero_pids[cid] for cid in catalog_ids if cid in hero_pids}
+        missing = [cid for cid in catalog_ids if cid not in hero_pids]
+        if missing:
+            try:
+                found.update(fetch_hero_pids(missing, deadline))
+            except PartialFailure as e:
+                found.update(e.result)
+                e.result = found
+                raise
+        return found
+
+    def _products(pids: List[str], deadline: Deadline) -> List[Dict[str, Any]]:
+        found = [products[str(pid)] for pid in pids if str(pid) in products]
+        missing = [pid for pid in pids if str(pid) not in products]
+        if missing:
+            found.extend(fetch_products(missing, deadline))
+        return found
+
+    def _pricing(user_id: str, pdp_data: List[Tuple[str, str, str]], deadline: Deadline) -> Dict[str, Dict[str, str]]:
+        found = {pid: pricing[pid] for pid, _, _ in pdp_data if pid in pricing}
+        missing = [entry for entry in pdp_data if entry[0] not in pricing]
+        if missing:
+            found.update(fetch_pricing(user_id, missing, deadline))
+        return found
+
+    return _hero_pids, _products, _pricing
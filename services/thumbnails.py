@@ -0,0 +1,263 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+import requests
+from PIL import Image
+
+from services import metrics
+from services.resilience import BackendUnavailable, guarded_call
+
+# Constants
+CACHE_DIR = os.environ.get("DAG_DEBUGGER_THUMBNAIL_DIR", "thumbnails")
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Cards show images at 150 px; thumbnails are twice that for high-DPI screens
+THUMBNAIL_WIDTH = 300
+MAX_WIDTH = 1000
+JPEG_QUALITY = 80
+REQUEST_TIMEOUT = 10
+SERVER_HOST = os.environ.get("DAG_DEBUGGER_THUMBNAIL_HOST", "127.0.0.1")
+SERVER_PORT = int(os.environ.get("DAG_DEBUGGER_THUMBNAIL_PORT", "8599"))
+# Base URL under which browsers reach the server (e.g. through the app's reverse proxy). Thumbnails
+# are off without it: a loopback URL only works for browsers on the server host
+PUBLIC_URL = os.environ.get("DAG_DEBUGGER_THUMBNAIL_URL", "")
+# Image hosts thumbnails are made for (and subdomains); any other URL is refused, so the
+# endpoint cannot be used to fetch or redirect to arbitrary URLs
+IMAGE_HOSTS = [
+    host.strip().lower()
+    for host in os.environ.get("DAG_DEBUGGER_THUMBNAIL_IMAGE_HOSTS", "images.meesho.com").split(",")
+    if host.strip()
+]
+THUMBNAIL_PATH = "/thumbnail"
+# Thumbnails of a URL never change, so browsers may keep them
+CACHE_CONTROL = "public, max-age=604800, immutable"
+
+
+class ThumbnailCache:
+    """
+    Downsized images on disk, evicted least recently used once over `max_bytes`.
+
+    Files are named by a hash of (URL, width). Recency survives restarts through
+    file modification times, which are bumped on every hit.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".jpg"):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._sizes[key] = size
+        self.total_bytes = sum(self._sizes.values())
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, key: str) -> Optional[bytes]:
+        metrics.CACHE_REQUESTS.labels("thumbnails").inc()
+        with self._lock:
+            if key not in self._sizes:
+                self.misses += 1
+                metrics.record_cache_miss("thumbnails")
+                return None
+            self._sizes.move_to_end(key)
+            self.hits += 1
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+            return data
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._sizes.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            while self.total_bytes > self.max_bytes and len(self._sizes) > 1:
+                evicted, size = self._sizes.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"thumbnails": len(self._sizes), "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses}
+
+
+def allowed_image(url: str, hosts: List[str]) -> bool:
+    """True for http(s) URLs on one of `hosts` or their subdomains."""
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    return any(host == allowed or host.endswith(f".{allowed}") for allowed in hosts)
+
+
+def thumbnail_key(url: str, width: int) -> str:
+    return hashlib.sha256(f"{width}|{url}".encode()).hexdigest()
+
+
+def make_thumbnail(data: bytes, width: int = THUMBNAIL_WIDTH) -> bytes:
+    """JPEG of the image in `data`, scaled down to `width` pixels wide (never up)."""
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert("RGB")
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return out.getvalue()
+
+
+class ThumbnailService:
+    """Fetches, downsizes and caches images; concurrent requests for one image fetch it once."""
+
+    def __init__(self, cache: ThumbnailCache):
+        self.cache = cache
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def thumbnail(self, url: str, width: int = THUMBNAIL_WIDTH) -> bytes:
+        """
+        Thumbnail of the image at `url`.
+
+        Raises:
+            BackendUnavailable: If the image cannot be fetched or decoded
+        """
+        key = thumbnail_key(url, width)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            data = make_thumbnail(self._fetch(url), width)
+            self.cache.put(key, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            error = e if isinstance(e, BackendUnavailable) else BackendUnavailable("thumbnails", str(e))
+            future.set_exception(error)
+            raise error from e
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, url: str) -> bytes:
+        def _request(timeout: float) -> bytes:
+            response = requests.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+
+        return guarded_call(f"images:{urlparse(url).netloc}", _request, REQUEST_TIMEOUT)
+
+
+def _handler(service: ThumbnailService, image_hosts: List[str]):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            url = query.get("url", [""])[0]
+            if parsed.path != THUMBNAIL_PATH or not allowed_image(url, image_hosts):
+                self.send_error(404)
+                return
+            try:
+                width = min(int(query.get("w", [THUMBNAIL_WIDTH])[0]), MAX_WIDTH)
+                data = service.thumbnail(url, width)
+            except (ValueError, BackendUnavailable):
+                # Let the browser try the original image (on an allowed host, checked above)
+                self.send_response(302)
+                self.send_header("Location", url)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Cache-Control", CACHE_CONTROL)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class ThumbnailServer:
+    """
+    Process-wide HTTP endpoint serving thumbnails, started on first use.
+
+    Only enabled with a `public_url` browsers can reach; otherwise cards keep loading the original images.
+    """
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        public_url: str = PUBLIC_URL,
+        image_hosts: Optional[List[str]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self.image_hosts = IMAGE_HOSTS if image_hosts is None else image_hosts
+        self.service: Optional[ThumbnailService] = None
+        self.error = ""
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> bool:
+        """Start the server unless it runs already; False if it is disabled or could not be started."""
+        with self._lock:
+            if self._server is not None:
+                return True
+            if self.error or not self.public_url:
+                return False
+            try:
+                self.service = ThumbnailService(ThumbnailCache())
+                server = ThreadingHTTPServer((self.host, self.port), _handler(self.service, self.image_hosts))
+            except OSError as e:
+                self.error = str(e)
+                return False
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="thumbnails", daemon=True).start()
+            self._server = server
+            return True
+
+    def serves(self, image_url: str) -> bool:
+        """True if the image is on an allowed host; other images are shown from their original URL."""
+        return allowed_image(image_url, self.image_hosts)
+
+    def url(self, image_url: str, width: int = THUMBNAIL_WIDTH) -> str:
+        return f"{self.public_url.rstrip('/')}{THUMBNAIL_PATH}?w={width}&url={quote(image_url, safe='')}"
+
+
+thumbnail_server = ThumbnailServer()
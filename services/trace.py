@@ -0,0 +1,441 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.candidates import CandidateTable
+
+# Constants
+EVENT_ENTERED = "entered"
+EVENT_KEPT = "kept"
+EVENT_RERANKED = "re-ranked"
+EVENT_FILTERED = "filtered"
+EVENT_ABSENT = ""
+# Result keys and debug_config fields that may carry per-node execution timings, in lookup order
+TIMING_KEYS = ["node_timings", "node_latencies", "node_execution_times", "execution_times", "timings", "nodes"]
+# Fields of a node's timing entry naming the node (in list-shaped timings)
+TIMING_NODE_FIELDS = ["node", "node_name", "name", "id"]
+# Duration fields of a node's timing entry and the factor converting them to milliseconds;
+# None for unit-less fields, read as milliseconds unless they are duration strings like "1.5ms"
+TIMING_DURATION_FIELDS: Dict[str, Optional[float]] = {
+    "duration_ms": 1.0,
+    "latency_ms": 1.0,
+    "elapsed_ms": 1.0,
+    "time_ms": 1.0,
+    "took_ms": 1.0,
+    "duration_us": 1e-3,
+    "latency_us": 1e-3,
+    "duration_ns": 1e-6,
+    "latency_ns": 1e-6,
+    "duration_s": 1e3,
+    "duration": None,
+    "latency": None,
+    "elapsed": None,
+    "took": None,
+}
+DURATION_UNITS = {"ns": 1e-6, "us": 1e-3, "µs": 1e-3, "ms": 1.0, "s": 1e3, "m": 6e4, "h": 3.6e6}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ns|us|µs|ms|s|m|h)")
+
+
+def parse_dag_edges(debug_config: Any) -> Dict[str, List[str]]:
+    """Node -> downstream nodes from a `debug_config` value (JSON string or dict); {} if absent."""
+    if not debug_config:
+        return {}
+    config = debug_config if isinstance(debug_config, dict) else json.loads(debug_config)
+    dag_config = config.get("dag_config") or config.get("config", {}).get("dag_config") or {}
+    return {str(src): [str(dst) for dst in dsts] for src, dsts in dag_config.items()}
+
+
+def dag_dot(
+    edges: Dict[str, List[str]],
+    tables: Dict[str, CandidateTable],
+    timings: Optional[Dict[str, float]] = None,
+) -> str:
+    """
+    Graphviz source of the DAG; nodes with an output in `tables` are labelled with their candidate count.
+
+    With `timings`, nodes are also labelled with their duration, nodes on the
+    critical path are filled and the slowest node is outlined in red.
+    """
+    timings = timings or {}
+    lines = ["digraph DAG {"]
+    critical = set(critical_path(edges, timings))
+    slowest = max(timings, key=timings.__getitem__) if timings else None
+    for node in _dag_order(edges, ()):
+        label = [node]
+        if node in tables:
+            label.append(f"{len(tables[node])} candidates")
+        if node in timings:
+            label.append(f"{timings[node]:.1f} ms")
+        if len(label) == 1:
+            continue
+        text = "\\n".join(label)
+        attrs = [f'label="{text}"']
+        if node in critical:
+            attrs.append('style=filled fillcolor="#fde2c8"')
+        if node == slowest:
+            attrs.append("color=red penwidth=2")
+        lines.append(f'  "{node}" [{" ".join(attrs)}];')
+    for src, dsts in edges.items():
+        for dst in dsts:
+            lines.append(f'  "{src}" -> "{dst}";')
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _as_ms(value: Any, factor: Optional[float]) -> Optional[float]:
+    """Milliseconds from a number or a duration string ("12.5", "1.2ms", "1m30s"); None if unreadable."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) * (factor or 1.0)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    try:
+        return float(text) * (factor or 1.0)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        return None
+    return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _entry_ms(entry: Any) -> Optional[float]:
+    """Duration of one node's timing entry: a bare number/duration string or a dict with a duration field."""
+    if not isinstance(entry, dict):
+        return _as_ms(entry, None)
+    for field, factor in TIMING_DURATION_FIELDS.items():
+        if field in entry:
+            ms = _as_ms(entry[field], factor)
+            if ms is not None:
+                return ms
+    return None
+
+
+def _timings_from(value: Any) -> Dict[str, float]:
+    """Node -> milliseconds from a timing value: {node: entry}, [{node, duration...}] or their JSON."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    timings: Dict[str, float] = {}
+    if isinstance(value, dict):
+        items: List[Tuple[Any, Any]] = list(value.items())
+    elif isinstance(value, list):
+        items = []
+        for entry in value:
+            if isinstance(entry, dict):
+                node = next((entry[field] for field in TIMING_NODE_FIELDS if field in entry), None)
+                if node is not None:
+                    items.append((node, entry))
+    else:
+        return {}
+    for node, entry in items:
+        ms = _entry_ms(entry)
+        if ms is not None:
+            timings[str(node)] = ms
+    return timings
+
+
+def parse_node_timings(
+    results: Dict[str, Any],
+    tables: Optional[Dict[str, CandidateTable]] = None,
+) -> Tuple[Dict[str, float], Optional[str]]:
+    """
+    Per-node execution time in milliseconds reported by IOP.
+
+    Timings are looked up under TIMING_KEYS in `debug_config` (top level or
+    under "config") first, then among the result keys. A list-shaped timing
+    result parses as a candidate table, so it is read back from `tables`.
+
+    Returns:
+        (node -> milliseconds, {} if the response has none; the result key the
+        timings were read from, None if they came from `debug_config` or were not found)
+    """
+    config: Any = results.get("debug_config") or {}
+    if isinstance(config, str):
+        try:
+            config = json.loads(config)
+        except ValueError:
+            config = {}
+    if isinstance(config, dict):
+        nested = config.get("config")
+        for source in (config, nested if isinstance(nested, dict) else {}):
+            for key in TIMING_KEYS:
+                if key in source:
+                    timings = _timings_from(source[key])
+                    if timings:
+                        return timings, None
+    for key in TIMING_KEYS:
+        if key in results:
+            timings = _timings_from(results[key])
+            if timings:
+                return timings, key
+    for key in TIMING_KEYS:
+        raw = tables[key].raw_json() if tables and key in tables else None
+        if raw:
+            timings = _timings_from([json.loads(row) for row in raw])
+            if timings:
+                return timings, key
+    return {}, None
+
+
+def critical_path(edges: Dict[str, List[str]], timings: Dict[str, float]) -> List[str]:
+    """
+    Nodes of the slowest source-to-sink path through the DAG, weighted by node duration.
+
+    On a DAG whose nodes run as soon as their inputs are ready, this path sets
+    the execution's latency; nodes without a timing count as 0 ms. Edges
+    closing a cycle are ignored.
+    """
+    if not timings:
+        return []
+    order = _dag_order(edges, timings)
+    parents = _parents(edges)
+    position = {node: i for i, node in enumerate(order)}
+    # Node -> (slowest path duration ending at the node, previous node on that path)
+    best: Dict[str, Tuple[float, Optional[str]]] = {}
+    for node in order:
+        previous = [parent for parent in parents.get(node, []) if position[parent] < position[node]]
+        prior = max(previous, key=lambda parent: best[parent][0], default=None)
+        best[node] = ((best[prior][0] if prior else 0.0) + timings.get(node, 0.0), prior)
+    node: Optional[str] = max(order, key=lambda n: best[n][0])
+    path = []
+    while node is not None:
+        path.append(node)
+        node = best[node][1]
+    return path[::-1]
+
+
+def node_timing_table(
+    timings: Dict[str, float],
+    edges: Dict[str, List[str]],
+    tables: Dict[str, CandidateTable],
+) -> List[Dict[str, Any]]:
+    """One row per timed node, slowest first, joined to the DAG and the node's output."""
+    parents = _parents(edges)
+    critical = set(critical_path(edges, timings))
+    total = sum(timings.values())
+    rows = []
+    for node, ms in sorted(timings.items(), key=lambda item: -item[1]):
+        table = tables.get(node)
+        rows.append({
+            "node": node,
+            "duration_ms": round(ms, 2),
+            "share": round(ms / total, 3) if total else None,
+            "critical_path": node in critical,
+            "upstream": ", ".join(parents.get(node, [])),
+            "downstream": ", ".join(edges.get(node, [])),
+            "candidates": len(table) if table is not None else None,
+            "in_dag": node in edges or node in parents,
+        })
+    return rows
+
+
+class NodeStage:
+    """Candidate-set changes at one DAG node relative to its upstream nodes."""
+
+    __slots__ = ("node", "parents", "index", "entered", "filtered", "reranked")
+
+    def __init__(self, node: str, parents: List[str], index: Dict[Any, int]):
+        self.node = node
+        self.parents = parents
+        # Candidate ID -> row in this node's output
+        self.index = index
+        self.entered: Set[Any] = set()
+        self.filtered: Set[Any] = set()
+        self.reranked: Set[Any] = set()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "node": self.node,
+            "upstream": ", ".join(self.parents),
+            "candidates": len(self.index),
+            "entered": len(self.entered),
+            "filtered": len(self.filtered),
+            "re-ranked": len(self.reranked),
+        }
+
+
+class DagTrace:
+    """
+    Stage-by-stage provenance of candidates across the per-node outputs of one execution.
+
+    Each node's output is compared with the union of its nearest upstream nodes
+    that have outputs: candidates new at the node *entered* there, candidates of
+    an upstream node missing here were *filtered* here, and candidates whose
+    relative order changed against their first upstream node were *re-ranked*.
+    Every lookup is a hash probe per node, so tracing a candidate costs
+    O(nodes) regardless of candidate-set sizes.
+    """
+
+    def __init__(self, tables: Dict[str, CandidateTable], edges: Optional[Dict[str, List[str]]] = None):
+        self.inferred = not edges
+        # Tables whose IDs did not all parse as integers keep them as strings
+        self.int_ids = all(table.int_ids for table in tables.values())
+        if self.inferred:
+            # Without debug_config, assume the result keys form a chain in response order
+            keys = list(tables)
+            edges = {src: [dst] for src, dst in zip(keys, keys[1:])}
+        self.nodes = _topological_order(edges, tables)
+        upstream = _upstream_outputs(edges, set(tables))
+        self.stages: Dict[str, NodeStage] = {}
+        for node in self.nodes:
+            # Upstream nodes placed later (only possible on a cycle) are ignored
+            parents = [parent for parent in upstream.get(node, []) if parent in self.stages]
+            stage = NodeStage(node, parents, tables[node].id_index())
+            self._diff(stage)
+            self.stages[node] = stage
+
+    def _diff(self, stage: NodeStage) -> None:
+        index = stage.index
+        if not stage.parents:
+            stage.entered = set(index)
+            return
+        parent_ids: Set[Any] = set()
+        for parent in stage.parents:
+            parent_ids.update(self.stages[parent].index)
+        stage.entered = set(index).difference(parent_ids)
+        stage.filtered = parent_ids.difference(index)
+        # Relative order among the candidates shared with the primary upstream node
+        # (indexes iterate in row order)
+        primary = self.stages[stage.parents[0]].index
+        before = [cid for cid in primary if cid in index]
+        after = sorted(before, key=index.__getitem__)
+        position = {cid: i for i, cid in enumerate(after)}
+        stage.reranked = {cid for i, cid in enumerate(before) if position[cid] != i}
+
+    def resolve_id(self, text: str) -> Optional[Any]:
+        """
+        Candidate ID typed as `text`, as stored in the node outputs.
+
+        Returns:
+            The integer or string ID some node has, else the integer or (if any
+            table has string IDs) the string; None for blank or non-integer text
+            when every table has integer IDs
+        """
+        text = text.strip()
+        if not text:
+            return None
+        try:
+            as_int: Optional[int] = int(text)
+        except ValueError:
+            as_int = None
+        for cid in (as_int, text):
+            if cid is not None and any(cid in stage.index for stage in self.stages.values()):
+                return cid
+        if as_int is not None:
+            return as_int
+        return None if self.int_ids else text
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per node: candidate-set size and how it changed."""
+        return [self.stages[node].as_dict() for node in self.nodes]
+
+    def trace(self, candidate_id: Any) -> List[Dict[str, Any]]:
+        """Rank of `candidate_id` and what happened to it at every node, in DAG order."""
+        rows = []
+        for node in self.nodes:
+            stage = self.stages[node]
+            row = stage.index.get(candidate_id)
+            if candidate_id in stage.entered:
+                event = EVENT_ENTERED
+            elif candidate_id in stage.filtered:
+                event = EVENT_FILTERED
+            elif candidate_id in stage.reranked:
+                event = EVENT_RERANKED
+            elif row is not None:
+                event = EVENT_KEPT
+            else:
+                event = EVENT_ABSENT
+            rows.append({"node": node, "rank": None if row is None else row + 1, "event": event})
+        return rows
+
+    def provenance(self, candidate_ids: List[Any]) -> List[Dict[str, Any]]:
+        """Where each candidate entered, was last seen and was filtered."""
+        rows = []
+        for cid in candidate_ids:
+            entered, last_seen, filtered_at = [], None, []
+            for node in self.nodes:
+                stage = self.stages[node]
+                if cid in stage.entered:
+                    entered.append(node)
+                if cid in stage.filtered:
+                    filtered_at.append(node)
+                if cid in stage.index:
+                    last_seen = node
+            rows.append({
+                "candidate_id": cid,
+                "entered_at": ", ".join(entered),
+                "last_seen_at": last_seen or "",
+                "filtered_at": ", ".join(filtered_at),
+            })
+        return rows
+
+    def candidate_ids(self) -> List[Any]:
+        """Every candidate ID seen at any node, in first-seen order."""
+        seen: Dict[Any, None] = {}
+        for node in self.nodes:
+            seen.update(dict.fromkeys(self.stages[node].index))
+        return list(seen)
+
+
+def _topological_order(edges: Dict[str, List[str]], tables: Dict[str, CandidateTable]) -> List[str]:
+    """Nodes with outputs in DAG order; outputs not in the DAG follow in response order."""
+    return [node for node in _dag_order(edges, tables) if node in tables]
+
+
+def _dag_order(edges: Dict[str, List[str]], extra: Iterable[str]) -> List[str]:
+    """Every node of the DAG in topological order, then the `extra` nodes not in it."""
+    indegree: Dict[str, int] = {}
+    for src, dsts in edges.items():
+        indegree.setdefault(src, 0)
+        for dst in dsts:
+            indegree[dst] = indegree.get(dst, 0) + 1
+    ready = [node for node, degree in indegree.items() if degree == 0]
+    order: List[str] = []
+    while ready:
+        node = ready.pop(0)
+        order.append(node)
+        for dst in edges.get(node, []):
+            indegree[dst] -= 1
+            if indegree[dst] == 0:
+                ready.append(dst)
+    # Nodes on a cycle keep their declaration order
+    placed = set(order)
+    order.extend(node for node in indegree if node not in placed)
+    placed.update(indegree)
+    order.extend(node for node in extra if node not in placed)
+    return order
+
+
+def _parents(edges: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Node -> upstream nodes."""
+    parents: Dict[str, List[str]] = {}
+    for src, dsts in edges.items():
+        for dst in dsts:
+            parents.setdefault(dst, []).append(src)
+    return parents
+
+
+def _upstream_outputs(edges: Dict[str, List[str]], outputs: Set[str]) -> Dict[str, List[str]]:
+    """Node -> nearest upstream nodes that have an output, skipping nodes without one."""
+    parents = _parents(edges)
+    upstream: Dict[str, List[str]] = {}
+    for node in outputs:
+        found: List[str] = []
+        stack = list(parents.get(node, []))
+        visited: Set[str] = set()
+        while stack:
+            parent = stack.pop(0)
+            if parent in visited:
+                continue
+            visited.add(parent)
+            if parent in outputs:
+                found.append(parent)
+            else:
+                stack.extend(parents.get(parent, []))
+        upstream[node] = found
+    return upstream
@@ -0,0 +1,466 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import grpc
+import requests
+import urllib3
+from google.protobuf.message import DecodeError
+
+import debug.debug_pb2 as debug_pb2
+from services import cassette, compression, hedging, offload, validation
+from services.channels import aio_loop, get_channel
+from services.conversions import message_to_snake_dict
+from services.resilience import (
+    BREAKER_GRPC_CODES,
+    BackendUnavailable,
+    CircuitBreaker,
+    Deadline,
+    DeadlineExceeded,
+    get_breaker,
+)
+
+# Constants
+TRANSPORT_HTTP = "http"
+TRANSPORT_GRPC = "grpc"
+TRANSPORT_GRPC_AIO = "grpc_aio"
+GRPC_TRANSPORTS = [TRANSPORT_GRPC, TRANSPORT_GRPC_AIO]
+HTTP_FEED_TYPES = ["catalog_listing_page", "recently_viewed_catalog_recommendation"]
+DEFAULT_TIMEOUT = 30
+DEFAULT_HEADERS = {
+    "Content-Type": "application/json",
+    "MEESHO-ISO-COUNTRY-CODE": "IN",
+}
+EXECUTE_DAG_METHOD = "/proto.DAGDebugService/ExecuteDAG"
+# Trace context sent with every call, so IOP logs and spans of one execution can be found from the debugger
+TRACE_ID_HEADER = "meesho-trace-id"
+TRACEPARENT_HEADER = "traceparent"
+
+
+class DagError(Exception):
+    """A failed ExecuteDAG call; the message is what the UI shows."""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        # True for backend failures another endpoint may not have (5xx, UNAVAILABLE, ...)
+        self.retryable = retryable
+
+
+class DagResponse:
+    """
+    Result of one ExecuteDAG call, identical whichever transport produced it.
+
+    `Success`, `Results` and `Error` keep the names of the gRPC response the UI was
+    written against; the remaining attributes describe the call itself.
+    """
+
+    def __init__(
+        self,
+        success: bool,
+        results: Optional[Dict[str, str]] = None,
+        error: Optional[str] = None,
+        transport: str = "",
+        latency: float = 0.0,
+        request_bytes: int = 0,
+        response_bytes: int = 0,
+        encode_time: float = 0.0,
+        decode_time: float = 0.0,
+        endpoint: str = "",
+        retryable: bool = False,
+        trace_id: str = "",
+    ):
+        self.Success = success
+        self.Results: Dict[str, str] = results or {}
+        self.Error = error or ""
+        self.transport = transport
+        self.latency = latency
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.encode_time = encode_time
+        self.decode_time = decode_time
+        self.endpoint = endpoint
+        self.retryable = retryable
+        self.trace_id = trace_id
+        # Filled in by the transport's `send`; empty for replayed and rejected calls
+        self.wire = compression.WireStats()
+
+    def call_stats(self) -> Dict[str, Any]:
+        return {
+            "transport": self.transport,
+            "endpoint": self.endpoint,
+            "trace_id": self.trace_id,
+            "latency_ms": round(self.latency * 1000, 1),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "encode_ms": round(self.encode_time * 1000, 2),
+            "decode_ms": round(self.decode_time * 1000, 2),
+            "compression": self.wire.encoding,
+            "wire_request_bytes": self.wire.request_bytes,
+            "wire_response_bytes": self.wire.response_bytes,
+            "compress_ms": round(self.wire.compress_time * 1000, 2),
+            "decompress_ms": round(self.wire.decompress_time * 1000, 2),
+        }
+
+
+class Transport:
+    """
+    Wire protocol for ExecuteDAG.
+
+    Subclasses implement `encode` (request kwargs -> request body), `send` (request
+    body -> response body, compressing on the wire as configured) and `decode`
+    (response body -> results map); `execute`
+    wraps them with the IOP circuit breaker, the page deadline and the cassette, so
+    every transport records, replays and degrades the same way.
+    """
+
+    name = ""
+    cassette_backend = ""
+
+    def encode(self, request_kwargs: Dict[str, Any], config_source_type: str) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, body: bytes) -> Dict[str, str]:
+        """
+        Raises:
+            DagError: If the body is malformed or reports a failed execution
+        """
+        raise NotImplementedError
+
+    def send(
+        self,
+        body: bytes,
+        user_id: str,
+        user_context: str,
+        iop_host: str,
+        timeout: float,
+        breaker: CircuitBreaker,
+        wire: compression.WireStats,
+        trace_id: str = "",
+    ) -> bytes:
+        """
+        Send an uncompressed request body and return the uncompressed response body.
+
+        Encodings, wire sizes and compression cost of the call go into `wire`;
+        `trace_id` goes out as the call's trace context (see `trace_headers`).
+
+        Raises:
+            DagError: If the call fails; backend failures are recorded on `breaker`
+        """
+        raise NotImplementedError
+
+    def cassette_context(self, user_id: str, user_context: str, iop_host: str) -> str:
+        return f"{iop_host}|{user_id}|{user_context}"
+
+    def execute(
+        self,
+        request_kwargs: Dict[str, Any],
+        config_source_type: str,
+        user_id: str,
+        user_context: str,
+        iop_host: str,
+        deadline: Optional[Deadline] = None,
+        trace_id: str = "",
+    ) -> DagResponse:
+        """
+        Execute the DAG over this transport.
+
+        The call is sent with `trace_id` (a new one if empty), which the response
+        keeps. Never raises for backend failures or invalid requests; they come back
+        as an unsuccessful response.
+        """
+        start = time.perf_counter()
+        trace_id = trace_id or new_trace_id()
+        errors = validation.request_errors(request_kwargs)
+        if errors:
+            # Rejected before dispatch: no IOP capacity spent, and no other endpoint would accept it
+            return DagResponse(
+                False, error="Invalid request:\n" + "\n".join(errors), transport=self.name, endpoint=iop_host,
+                latency=time.perf_counter() - start, trace_id=trace_id,
+            )
+        breaker = get_breaker(f"iop:{iop_host}")
+        try:
+            timeout, trial = _iop_timeout(iop_host, deadline)
+        except BackendUnavailable as e:
+            # Another endpoint can help with an open circuit, not with a spent budget
+            retryable = not isinstance(e, DeadlineExceeded)
+            return DagResponse(
+                False, error=str(e), transport=self.name, endpoint=iop_host, retryable=retryable, trace_id=trace_id
+            )
+
+        response = DagResponse(False, transport=self.name, endpoint=iop_host, trace_id=trace_id)
+        try:
+            body = self.encode(request_kwargs, config_source_type)
+            response.request_bytes = len(body)
+            response.encode_time = time.perf_counter() - start
+            response_body = cassette.intercept(
+                self.cassette_backend,
+                body,
+                lambda: self.send(body, user_id, user_context, iop_host, timeout, breaker, response.wire, trace_id),
+                # The trace ID is left out: a replay must match whatever trace the recording had
+                context=self.cassette_context(user_id, user_context, iop_host),
+            )
+            response.response_bytes = len(response_body)
+            compression.record("iop", response.wire, len(body), len(response_body))
+            received = time.perf_counter()
+            response.Results = self.decode(response_body)
+            response.decode_time = time.perf_counter() - received
+            response.Success = True
+        except DagError as e:
+            response.Error = str(e)
+            response.retryable = e.retryable
+        except cassette.CassetteMiss as e:
+            # Recordings are per host; another endpoint may have been recorded
+            response.Error = str(e)
+            response.retryable = True
+        finally:
+            # `send` records the call's outcome; a trial call that failed to encode, was replayed or was cancelled
+            # (lost a hedge) has none, and would otherwise leave the circuit half-open and rejecting every later call
+            if trial:
+                breaker.release_trial()
+        response.latency = time.perf_counter() - start
+        return response
+
+
+def new_trace_id() -> str:
+    """Random 128-bit trace ID as 32 lowercase hex digits (the W3C trace-context format)."""
+    return os.urandom(16).hex()
+
+
+def trace_headers(trace_id: str) -> List[Tuple[str, str]]:
+    """
+    Trace context of one call: the bare trace ID and a W3C `traceparent` with a new span ID.
+
+    Attempts of one logical call (failovers, hedges) share the trace ID and get their own span.
+    """
+    return [
+        (TRACE_ID_HEADER, trace_id),
+        (TRACEPARENT_HEADER, f"00-{trace_id}-{os.urandom(8).hex()}-01"),
+    ]
+
+
+def _iop_timeout(iop_host: str, deadline: Optional[Deadline]) -> Tuple[float, bool]:
+    """Check the IOP circuit breaker and return the timeout for this call and whether it is the half-open trial.
+
+    Raises:
+        BackendUnavailable: If the circuit is open or the deadline is spent
+    """
+    timeout = DEFAULT_TIMEOUT
+    if deadline is not None:
+        timeout = deadline.timeout(f"iop:{iop_host}", cap=DEFAULT_TIMEOUT)
+    return timeout, get_breaker(f"iop:{iop_host}").before_call()
+
+
+TRANSPORTS: Dict[str, Type[Transport]] = {}
+_instances: Dict[str, Transport] = {}
+
+
+def register_transport(cls: Type[Transport]) -> Type[Transport]:
+    """Class decorator making a transport available to `get_transport` by its name."""
+    TRANSPORTS[cls.name] = cls
+    _instances.pop(cls.name, None)
+    return cls
+
+
+def get_transport(name: str) -> Transport:
+    transport = _instances.get(name)
+    if transport is None:
+        if name not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {name}")
+        transport = _instances[name] = TRANSPORTS[name]()
+    return transport
+
+
+def transport_for(feed_type: str, grpc_transport: str = TRANSPORT_GRPC) -> Transport:
+    """HTTP for the feed types only served over HTTP, `grpc_transport` for the rest."""
+    if feed_type in HTTP_FEED_TYPES:
+        return get_transport(TRANSPORT_HTTP)
+    return get_transport(grpc_transport)
+
+
+@register_transport
+class HttpJsonTransport(Transport):
+    """JSON over HTTP for catalog_listing_page and recently_viewed_catalog_recommendation."""
+
+    name = TRANSPORT_HTTP
+    cassette_backend = "execute_dag_http"
+
+    def encode(self, request_kwargs: Dict[str, Any], config_source_type: str) -> bytes:
+        http_payload: Dict[str, Any] = {}
+
+        # Config kind
+        if "ConfigKind" in request_kwargs:
+            http_payload["config_kind"] = request_kwargs["ConfigKind"]
+
+        # Data
+        if "Data" in request_kwargs:
+            http_payload["Data"] = message_to_snake_dict(request_kwargs["Data"])
+
+        # Raw config or Path depending on source type
+        if config_source_type == "RawConfigJson" and "RawConfigJson" in request_kwargs:
+            # Parsed once per distinct config; `execute` has already rejected invalid ones
+            http_payload["raw_config"] = validation.check_config(request_kwargs["RawConfigJson"]).parsed
+        elif config_source_type == "Selector" and "Selector" in request_kwargs:
+            http_payload["Path"] = message_to_snake_dict(request_kwargs["Selector"])
+
+        # Meta logging
+        http_payload["Meta"] = {"IsLoggingEnabled": True}
+
+        # Sorted keys keep the body (and its cassette key) stable across runs
+        return json.dumps(http_payload, sort_keys=True).encode()
+
+    def decode(self, body: bytes) -> Dict[str, str]:
+        # Large bodies are decoded (and their results re-serialized) in a worker process when enabled
+        return offload.call_bytes(decode_http_body, body)
+
+    def url(self, iop_host: str) -> str:
+        return f"http://{iop_host}/debug/dag/execute"
+
+    def cassette_context(self, user_id: str, user_context: str, iop_host: str) -> str:
+        return f"{self.url(iop_host)}|{user_id}|{user_context}"
+
+    def send(self, body, user_id, user_context, iop_host, timeout, breaker, wire, trace_id="") -> bytes:
+        headers = {
+            **DEFAULT_HEADERS,
+            "MEESHO-USER-ID": user_id,
+            "MEESHO-USER-CONTEXT": user_context,
+            **dict(trace_headers(trace_id)),
+            "Accept-Encoding": compression.ACCEPT_ENCODING,
+        }
+        try:
+            response = self._post(self.url(iop_host), headers, body, timeout, wire)
+            if response.status_code == 415 and wire.encoding != compression.NONE:
+                # The server does not take compressed bodies; send this one as-is
+                response.close()
+                response = self._post(self.url(iop_host), headers, body, timeout, wire, compression.NONE)
+            if response.status_code < 500:
+                breaker.record_success()
+            response.raise_for_status()
+            # Read the body as sent so its size on the wire is known, then decompress it here
+            raw = response.raw.read(decode_content=False)
+            response.close()
+        except urllib3.exceptions.HTTPError as e:
+            breaker.record_failure(str(e))
+            raise DagError(f"Request failed: {str(e)}", True) from e
+        except requests.RequestException as e:
+            retryable = getattr(e, "response", None) is None or e.response.status_code >= 500
+            if retryable:
+                breaker.record_failure(str(e))
+            error_msg = f"Request failed: {str(e)}"
+            if hasattr(e, "response") and e.response is not None:
+                try:
+                    error_details = e.response.json()
+                    error_msg += f"\nDetails: {json.dumps(error_details)}"
+                except Exception:
+                    error_msg += f"\nResponse: {e.response.text}"
+            raise DagError(error_msg, retryable) from e
+        wire.response_encoding = response.headers.get("Content-Encoding", "") or compression.NONE
+        wire.response_bytes = len(raw)
+        start = time.perf_counter()
+        try:
+            content = compression.decompress(raw, wire.response_encoding)
+        except ValueError as e:
+            raise DagError(f"Invalid response body: {str(e)}") from e
+        wire.decompress_time = time.perf_counter() - start
+        return content
+
+    @staticmethod
+    def _post(url: str, headers: Dict[str, str], body: bytes, timeout: float, wire: compression.WireStats,
+              algorithm: Optional[str] = None) -> requests.Response:
+        """POST `body`, compressed with `algorithm` (default: as configured for its size), streaming the response."""
+        wire.encoding = algorithm or compression.request_algorithm(compression.TARGET_HTTP, len(body))
+        start = time.perf_counter()
+        data = compression.compress(body, wire.encoding)
+        wire.compress_time = time.perf_counter() - start
+        wire.request_bytes = len(data)
+        if wire.encoding != compression.NONE:
+            headers = {**headers, "Content-Encoding": wire.encoding}
+        return requests.post(url, headers=headers, data=data, timeout=timeout, stream=True)
+
+
+@register_transport
+class GrpcTransport(Transport):
+    """DAGDebugService.ExecuteDAG on a pooled blocking channel per host."""
+
+    name = TRANSPORT_GRPC
+    # Both gRPC transports put the same bytes on the wire and share recordings
+    cassette_backend = "execute_dag_grpc"
+
+    def encode(self, request_kwargs: Dict[str, Any], config_source_type: str) -> bytes:
+        return debug_pb2.ExecuteDAGRequest(**request_kwargs).SerializeToString(deterministic=True)
+
+    def decode(self, body: bytes) -> Dict[str, str]:
+        try:
+            response = debug_pb2.ExecuteDAGResponse.FromString(body)
+        except DecodeError as e:
+            raise DagError(f"Invalid gRPC response: {str(e)}") from e
+        results_map = dict(response.results)
+        # Extract debug_config from gRPC response if present
+        if response.debug_config:
+            results_map["debug_config"] = response.debug_config
+        return results_map
+
+    def invoke(self, body: bytes, metadata, iop_host: str, timeout: float, call_compression: grpc.Compression) -> bytes:
+        # No (de)serializers: the encoded body goes out as-is and the raw response
+        # bytes come back for the cassette and `decode`. Sent as a future, so a
+        # losing attempt of a hedged call can be cancelled
+        return hedging.cancellable(get_channel(iop_host).unary_unary(EXECUTE_DAG_METHOD).future(
+            body, metadata=metadata, timeout=timeout, compression=call_compression
+        ))
+
+    def send(self, body, user_id, user_context, iop_host, timeout, breaker, wire, trace_id="") -> bytes:
+        metadata = [
+            ("meesho-user-id", user_id),
+            ("meesho-user-context", user_context),
+            *trace_headers(trace_id),
+        ]
+        # gRPC compresses messages in its core; wire sizes are not visible from here
+        wire.encoding = compression.request_algorithm(compression.TARGET_GRPC, len(body))
+        try:
+            response_body = self.invoke(body, metadata, iop_host, timeout, compression.GRPC_COMPRESSION[wire.encoding])
+        except grpc.RpcError as e:
+            retryable = e.code() in BREAKER_GRPC_CODES
+            if retryable:
+                breaker.record_failure(str(e))
+            else:
+                breaker.record_success()
+            raise DagError(f"gRPC Error: {str(e)}", retryable) from e
+        breaker.record_success()
+        return response_body
+
+
+@register_transport
+class GrpcAioTransport(GrpcTransport):
+    """ExecuteDAG through grpc.aio; concurrent calls from any thread share one event loop."""
+
+    name = TRANSPORT_GRPC_AIO
+
+    def invoke(self, body: bytes, metadata, iop_host: str, timeout: float, call_compression: grpc.Compression) -> bytes:
+        async def _call() -> bytes:
+            call = aio_loop.channel(iop_host).unary_unary(EXECUTE_DAG_METHOD)
+            return await call(body, metadata=metadata, timeout=timeout, compression=call_compression)
+
+        return hedging.cancellable(aio_loop.submit(_call()))
+
+
+def decode_http_body(body: bytes) -> Dict[str, str]:
+    """Results map of an HTTP DAG response body; module level so worker processes can run it."""
+    try:
+        resp_json = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise DagError(f"Invalid JSON response: {str(e)}") from e
+
+    if isinstance(resp_json, dict) and resp_json.get("success") is False:
+        raise DagError(resp_json.get("error", "Unknown error from service"))
+
+    results_map = {}
+    if isinstance(resp_json, dict):
+        if "results" in resp_json:
+            results_map = {k: json.dumps(v) for k, v in resp_json["results"].items()}
+        # Surface debug_config if present for UI consumption
+        if "debug_config" in resp_json:
+            results_map["debug_config"] = resp_json["debug_config"]
+
+    if not results_map:  # Fallback – put entire response under root
+        results_map["root"] = json.dumps(resp_json)
+    return results_map
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from google.protobuf.json_format import MessageToDict
+
+from services import metrics
+
+# Constants
+# Optional JSON schema of known node types and config field types, see the README and dag_schema.example.json
+SCHEMA_PATH = os.environ.get(
+    "DAG_DEBUGGER_DAG_SCHEMA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dag_schema.json"),
+)
+# Distinct config texts whose check is kept, keyed by content hash
+CACHE_SIZE = 256
+# JSON type names as they appear in the schema
+JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None),
+}
+# Types of the config fields the debugger itself reads; the schema may add more
+CONFIG_FIELD_TYPES = {
+    "dag_config": "object",
+    "config": "object",
+    "nodes": "object",
+}
+NODE_TYPE_FIELD = "type"
+# protobuf refuses to parse Structs nested deeper than this
+MAX_STRUCT_DEPTH = 100
+
+
+class ConfigCheck:
+    """Outcome of checking one config text: the parsed value, errors and warnings."""
+
+    __slots__ = ("digest", "parsed", "errors", "warnings")
+
+    def __init__(self, digest: str, parsed: Any = None):
+        self.digest = digest
+        # Shared between callers through the cache; treat as read-only
+        self.parsed = parsed
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class Schema:
+    """Known node types and field types; an empty schema checks only what the debugger reads."""
+
+    def __init__(self, node_types: Optional[List[str]] = None, fields: Optional[Dict[str, str]] = None,
+                 feed_metadata: Optional[Dict[str, str]] = None):
+        self.node_types = set(node_types or [])
+        self.fields = {**CONFIG_FIELD_TYPES, **(fields or {})}
+        self.feed_metadata = dict(feed_metadata or {})
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "Schema":
+        """
+        Schema from a JSON file with optional `node_types`, `fields` and `feed_metadata` keys.
+
+        Raises:
+            ValueError: If the file is not a valid JSON object or names an unknown type
+        """
+        path = path or SCHEMA_PATH
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict) or not all(
+            isinstance(raw.get(key, {}), dict) for key in ("fields", "feed_metadata")
+        ) or not isinstance(raw.get("node_types", []), list):
+            raise ValueError(f"{path}: expected an object with a node_types list and fields/feed_metadata objects")
+        for name, kind in {**raw.get("fields", {}), **raw.get("feed_metadata", {})}.items():
+            if kind not in JSON_TYPES:
+                raise ValueError(f"{path}: unknown type {kind!r} for {name}")
+        return cls(raw.get("node_types"), raw.get("fields"), raw.get("feed_metadata"))
+
+
+logger = logging.getLogger(__name__)
+
+_schema: Optional[Schema] = None
+_cache: "OrderedDict[str, ConfigCheck]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def configure(schema: Optional[Schema] = None) -> None:
+    """Use `schema` (default: reload from SCHEMA_PATH) and forget cached checks."""
+    global _schema
+    with _lock:
+        _schema = schema
+        _cache.clear()
+
+
+def current_schema() -> Schema:
+    """The configured schema, loaded from SCHEMA_PATH on first use; an unreadable file leaves it empty."""
+    global _schema
+    with _lock:
+        if _schema is None:
+            try:
+                _schema = Schema.load()
+            except (OSError, ValueError) as e:
+                # Logged once; the empty schema is used until `configure` is called again
+                logger.error("Ignoring the DAG schema: %s", e)
+                _schema = Schema()
+        return _schema
+
+
+def _json_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    return next((name for name, kind in JSON_TYPES.items() if isinstance(value, kind)), type(value).__name__)
+
+
+def _matches(value: Any, kind: str) -> bool:
+    if isinstance(value, bool):
+        return kind == "boolean"
+    if kind == "integer":
+        # Struct numbers are doubles, so 3.0 counts as an integer
+        return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+    return isinstance(value, JSON_TYPES[kind])
+
+
+def _depth(value: Any) -> int:
+    depth, level = 0, [value]
+    while level:
+        depth += 1
+        level = [
+            child for item in level
+            for child in (item.values() if isinstance(item, dict) else item if isinstance(item, list) else ())
+            if isinstance(child, (dict, list))
+        ]
+    return depth
+
+
+def find_cycle(edges: Dict[str, List[str]]) -> List[str]:
+    """Nodes of one cycle in `edges` with the first node repeated at the end; [] if acyclic."""
+    state: Dict[str, int] = {}
+    for root in edges:
+        if root in state:
+            continue
+        path = [root]
+        stack = [iter(edges.get(root, []))]
+        state[root] = 1
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                state[path.pop()] = 2
+                stack.pop()
+            elif state.get(node) == 1:
+                return path[path.index(node):] + [node]
+            elif node not in state:
+                state[node] = 1
+                path.append(node)
+                stack.append(iter(edges.get(node, [])))
+    return []
+
+
+def _check_fields(config: Dict[str, Any], fields: Dict[str, str], where: str, check: ConfigCheck) -> None:
+    for name, kind in fields.items():
+        if name in config and not _matches(config[name], kind):
+            check.errors.append(f"{where}{name} must be {kind}, got {_json_type(config[name])}")
+
+
+def _check_dag(config: Dict[str, Any], schema: Schema, check: ConfigCheck) -> None:
+    scopes = [config]
+    if isinstance(config.get("config"), dict):
+        scopes.append(config["config"])
+    dag_config = next((scope["dag_config"] for scope in scopes if isinstance(scope.get("dag_config"), dict)), None)
+    nodes = next((scope["nodes"] for scope in scopes if isinstance(scope.get("nodes"), dict)), None)
+    if isinstance(config.get("config"), dict):
+        _check_fields(config["config"], CONFIG_FIELD_TYPES, "config.", check)
+
+    if nodes is not None:
+        for name, node in nodes.items():
+            if not isinstance(node, dict):
+                check.errors.append(f"Node {name} must be an object, got {_json_type(node)}")
+                continue
+            node_type = node.get(NODE_TYPE_FIELD)
+            if node_type is None:
+                check.errors.append(f"Node {name} has no {NODE_TYPE_FIELD}")
+            elif schema.node_types and node_type not in schema.node_types:
+                check.errors.append(f"Node {name} has unknown {NODE_TYPE_FIELD} {node_type!r}")
+
+    if dag_config is None:
+        return
+    edges: Dict[str, List[str]] = {}
+    for src, dsts in dag_config.items():
+        if not isinstance(dsts, list) or not all(isinstance(dst, str) for dst in dsts):
+            check.errors.append(f"dag_config.{src} must be a list of node names")
+            continue
+        edges[src] = dsts
+    if nodes is not None:
+        referenced = set(edges).union(*edges.values())
+        for missing in sorted(referenced - set(nodes)):
+            check.errors.append(f"dag_config references undefined node {missing}")
+        for unused in sorted(set(nodes) - referenced):
+            check.warnings.append(f"Node {unused} is not in dag_config")
+    cycle = find_cycle(edges)
+    if cycle:
+        check.errors.append(f"dag_config has a cycle: {' -> '.join(cycle)}")
+
+
+def _parse_object(text: str, digest: str, what: str) -> ConfigCheck:
+    try:
+        check = ConfigCheck(digest, json.loads(text))
+    except json.JSONDecodeError as e:
+        check = ConfigCheck(digest)
+        check.errors.append(f"Invalid JSON: {e}")
+        return check
+    if not isinstance(check.parsed, dict):
+        check.errors.append(f"{what} must be a JSON object, got {_json_type(check.parsed)}")
+    return check
+
+
+def _check_config(text: str, digest: str, schema: Schema) -> ConfigCheck:
+    check = _parse_object(text, digest, "Config")
+    if not check.ok:
+        return check
+    _check_fields(check.parsed, schema.fields, "", check)
+    _check_dag(check.parsed, schema, check)
+    return check
+
+
+def _check_feed_metadata(text: str, digest: str, schema: Schema) -> ConfigCheck:
+    check = _parse_object(text, digest, "FeedMetaData")
+    if not check.ok:
+        return check
+    if _depth(check.parsed) > MAX_STRUCT_DEPTH:
+        check.errors.append(f"FeedMetaData is nested deeper than {MAX_STRUCT_DEPTH} levels")
+    _check_fields(check.parsed, schema.feed_metadata, "", check)
+    return check
+
+
+def _cached(kind: str, text: str, checker) -> ConfigCheck:
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    key = f"{kind}:{digest}"
+    metrics.CACHE_REQUESTS.labels("config_validation").inc()
+    with _lock:
+        check = _cache.get(key)
+        if check is not None:
+            _cache.move_to_end(key)
+            return check
+    metrics.record_cache_miss("config_validation")
+    check = checker(text, digest, current_schema())
+    with _lock:
+        _cache[key] = check
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return check
+
+
+def check_config(text: str) -> ConfigCheck:
+    """Parse and check a RawConfigJson text; repeated texts are answered from the cache."""
+    return _cached("config", text, _check_config)
+
+
+def check_feed_metadata(text: str) -> ConfigCheck:
+    """Parse and check a FeedMetaData JSON text; repeated texts are answered from the cache."""
+    return _cached("feed_metadata", text, _check_feed_metadata)
+
+
+def request_errors(request_kwargs: Dict[str, Any]) -> List[str]:
+    """Problems in ExecuteDAGRequest kwargs that IOP would reject; [] if it is worth sending."""
+    errors = []
+    raw_config = request_kwargs.get("RawConfigJson")
+    if raw_config:
+        errors.extend(f"RawConfigJson: {error}" for error in check_config(raw_config).errors)
+    data = request_kwargs.get("Data")
+    schema = current_schema()
+    if data is not None and schema.feed_metadata and data.HasField("FeedMetaData"):
+        # Structs are valid JSON by construction; only the schema's field types need checking
+        check = ConfigCheck("")
+        _check_fields(MessageToDict(data.FeedMetaData), schema.feed_metadata, "", check)
+        errors.extend(f"FeedMetaData: {error}" for error in check.errors)
+    return errors
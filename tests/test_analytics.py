@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from services.analytics import ALL_KEYS, FIELD_PRICE, ExecutionAnalytics, candidate_columns, duplicate_stats, overlap_stats
+from services.candidates import CandidateTable
+from services.resilience import Deadline, PartialFailure
+
+
+def test_partial_hero_failure_is_degraded_and_fetched_again():
+    def hero(ids, deadline):
+        raise PartialFailure("hero", "1 of 2 chunks failed", {cid: str(cid * 10) for cid in ids if cid > 2})
+
+    tables = {"k": CandidateTable.from_items("k", [{"id": cid} for cid in range(1, 5)])}
+    analytics = ExecutionAnalytics(
+        tables,
+        "1000001",
+        fetch_hero_pids=hero,
+        fetch_products=lambda pids, deadline: [],
+        fetch_pricing=lambda uid, pdp_data, deadline: {pid: {"serving_price": "199"} for pid, _, _ in pdp_data},
+    )
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resolved = analytics.enrich(FIELD_PRICE, executor, lambda stage: Deadline(30))
+
+    assert resolved == 2
+    assert [str(e) for e in analytics.degraded[FIELD_PRICE]] == ["hero unavailable: 1 of 2 chunks failed"]
+    assert analytics.values[FIELD_PRICE] == {3: 199.0, 4: 199.0}
+    assert sorted(analytics.missing(FIELD_PRICE)) == [1, 2]
+
+
+def _columns():
+    tables = {
+        "retrieve": CandidateTable.from_items("retrieve", [{"id": cid} for cid in (1, 2, 2, 3, None)]),
+        "rank": CandidateTable.from_items("rank", [{"id": cid} for cid in (2, 3, 4)]),
+    }
+    return candidate_columns(tables)
+
+
+def test_duplicate_stats_per_key_and_overall():
+    rows = duplicate_stats(_columns()).to_pylist()
+
+    assert [(row["key"], row["candidates"], row["distinct_ids"], row["duplicates"]) for row in rows] == [
+        ("retrieve", 5, 3, 1), ("rank", 3, 3, 0), (ALL_KEYS, 8, 4, 3),
+    ]
+    # Candidates without an ID are not duplicates
+    assert [row["duplicate_rate"] for row in rows] == [0.25, 0.0, round(3 / 7, 4)]
+
+
+def test_overlap_stats_of_distinct_ids():
+    rows = overlap_stats(_columns()).to_pylist()
+
+    assert rows == [{
+        "key_a": "retrieve", "key_b": "rank", "shared": 2, "distinct_a": 3, "distinct_b": 3,
+        "jaccard": 0.5, "share_of_a": round(2 / 3, 4), "share_of_b": round(2 / 3, 4),
+    }]
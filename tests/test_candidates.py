@@ -0,0 +1,24 @@
+from services.analytics import candidate_columns
+from services.candidates import INT64_MAX, CandidateTable
+from services.export import _int_ids
+
+
+def test_catalog_id_minus_one_is_kept():
+    table = CandidateTable.from_items("k", [{"id": -1}, {"id": None}, {"id": 7}])
+
+    assert table.int_ids
+    assert [table.id_at(row) for row in range(len(table))] == [-1, None, 7]
+    assert table.id_list() == [-1, None, 7]
+    assert table.row_of(-1) == 0
+    assert candidate_columns({"k": table}).column("id").to_pylist() == [-1, None, 7]
+
+
+def test_ids_outside_int64_fall_back_to_list():
+    table = CandidateTable.from_items("k", [{"id": 1}, {"id": None}])
+    table.extend([{"id": INT64_MAX + 1}, {"id": -1}])
+
+    assert not table.int_ids
+    assert table.id_list() == [1, None, INT64_MAX + 1, -1]
+    assert table.row_of(INT64_MAX + 1) == 2
+    assert not _int_ids({"tables": {"k": table}})
+    assert candidate_columns({"k": table}).column("id").to_pylist() == ["1", None, str(INT64_MAX + 1), "-1"]
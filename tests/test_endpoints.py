@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from services import hedging
+from services.endpoints import POLICY_LEAST_OUTSTANDING, EndpointPool
+from services.hedging import MIN_SAMPLES, HedgePolicy
+from services.resilience import BackendUnavailable, RequestRejected, get_breaker
+
+
+def _pool(service, hedge=None):
+    # Breakers are per "<service prefix>:<address>", so every test uses its own prefix
+    return EndpointPool(service, ["a", "b"], POLICY_LEAST_OUTSTANDING, hedge=hedge)
+
+
+def test_fails_over_to_the_next_endpoint():
+    pool = _pool("failover:test")
+    called = []
+
+    def _fn(endpoint):
+        called.append(endpoint.address)
+        if endpoint.address == "a":
+            raise BackendUnavailable(endpoint.breaker_name, "connection refused")
+        return endpoint.address
+
+    assert pool.call(_fn) == "b"
+    assert called == ["a", "b"]
+    assert pool.endpoints[0].failures == 1
+
+
+def test_endpoint_with_open_circuit_is_tried_last():
+    pool = _pool("skip-open:test")
+    breaker = get_breaker(pool.endpoints[0].breaker_name)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure("down")
+
+    assert pool.call(lambda endpoint: endpoint.address) == "b"
+
+
+def test_rejected_request_is_not_failed_over():
+    pool = _pool("rejected:test")
+    called = []
+
+    def _fn(endpoint):
+        called.append(endpoint.address)
+        raise RequestRejected(endpoint.breaker_name, "400 Bad Request")
+
+    with pytest.raises(RequestRejected):
+        pool.call(_fn)
+    assert called == ["a"]
+
+
+def _warm(policy, seconds=0.001):
+    for _ in range(MIN_SAMPLES):
+        policy.observe_attempt(seconds)
+
+
+def test_cancelled_first_attempt_is_sampled():
+    policy = HedgePolicy(min_delay=0.001, measure_share=0)
+    _warm(policy)
+    pool = _pool("hedge-cancelled:test", hedge=policy)
+    cancelled = threading.Event()
+
+    def _fn(endpoint):
+        if endpoint.address == "a":
+            request = Future()
+            request.add_done_callback(lambda future: cancelled.set())
+            return hedging.cancellable(request)
+        return endpoint.address
+
+    assert pool.call(_fn, hedge=True) == "b"
+    assert cancelled.wait(1)
+    samples = list(policy._attempt_latencies)[MIN_SAMPLES:]
+    # The hedge that won, and the cancelled first attempt, which ran at least the hedge delay
+    assert len(samples) == 2
+    assert max(samples) >= 0.001
+
+
+def test_failed_first_attempt_is_not_an_unhedged_latency():
+    policy = HedgePolicy(min_delay=1.0)
+    _warm(policy)
+    pool = _pool("hedge-failed:test", hedge=policy)
+
+    def _fn(endpoint):
+        return endpoint.address
+
+    assert pool.call(_fn, is_failure=lambda address: address == "a", hedge=True) == "b"
+    # Only the first attempt of the failover call to b
+    assert len(policy._unhedged_latencies) == 1
@@ -0,0 +1,62 @@
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.candidates import tables_from_results
+from services.export import FORMAT_ARROW_STREAM, FORMAT_PARQUET, export_execution
+
+
+def _execution(results, enrichment=None):
+    tables, _ = tables_from_results({key: json.dumps(items) for key, items in results.items()})
+    return {
+        "id": "exec-1",
+        "environment": "staging",
+        "feed_type": "home",
+        "user_id": "42",
+        "request": {"limit": 3},
+        "tables": tables,
+        "enrichment": enrichment or {},
+    }
+
+
+def test_one_row_per_candidate_with_the_enriched_flag():
+    product = {
+        "product_id": 7,
+        "catalog_name": "Kurta",
+        "old_sub_sub_category_id": "11",
+        "sscat_name": "Kurtas",
+        "product_images": ["https://img/7.jpg"],
+        "pricing": {"serving_price": 299},
+    }
+    execution = _execution(
+        {"retrieve": [{"id": 1, "score": 0.5}, {"id": 2}], "rank": [{"id": 2}]},
+        enrichment={"retrieve": {1: product}},
+    )
+    sink = io.BytesIO()
+
+    assert export_execution(sink, execution, ["serving_price"], FORMAT_PARQUET) == 3
+    rows = pq.read_table(io.BytesIO(sink.getvalue())).to_pylist()
+
+    assert [(row["result_key"], row["rank"], row["candidate_id"]) for row in rows] == [
+        ("retrieve", 1, 1), ("retrieve", 2, 2), ("rank", 1, 2),
+    ]
+    assert [row["enriched"] for row in rows] == [True, False, False]
+    first = rows[0]
+    assert (first["product_id"], first["sscat_id"], first["image_url"], first["pricing_serving_price"]) == (
+        "7", 11, "https://img/7.jpg", "299",
+    )
+    assert first["request_json"] == '{"limit": 3}' and first["user_id"] == "42"
+    assert rows[1]["catalog_name"] is None and rows[1]["pricing_serving_price"] is None
+
+
+def test_string_candidate_ids_export_as_strings():
+    execution = _execution({"retrieve": [{"id": "sku-9"}, {"id": 5}]})
+    sink = io.BytesIO()
+
+    export_execution(sink, execution, [], FORMAT_ARROW_STREAM, batch_size=1)
+    table = pa.ipc.open_stream(sink.getvalue()).read_all()
+
+    assert table.schema.field("candidate_id").type == pa.string()
+    assert table["candidate_id"].to_pylist() == ["sku-9", "5"]
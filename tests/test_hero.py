@@ -0,0 +1,35 @@
+import pytest
+
+from services import hero
+from services.resilience import BackendUnavailable, PartialFailure
+
+
+def test_failed_chunk_is_reported_with_the_partial_result(monkeypatch):
+    def _request(catalog_ids, deadline):
+        if 1 in catalog_ids:
+            raise BackendUnavailable("hero:http://hero", "503 Service Unavailable")
+        return {cid: str(cid * 10) for cid in catalog_ids}
+
+    monkeypatch.setattr(hero, "_request", _request)
+    with pytest.raises(PartialFailure) as raised:
+        hero.get_heroPids_batch(list(range(1, 51)))
+
+    assert raised.value.result == {cid: str(cid * 10) for cid in range(26, 51)}
+    assert "1 of 2 chunks failed" in str(raised.value)
+
+
+def test_every_chunk_failing_raises_backend_unavailable(monkeypatch):
+    def _request(catalog_ids, deadline):
+        raise BackendUnavailable("hero:http://hero", "503 Service Unavailable")
+
+    monkeypatch.setattr(hero, "_request", _request)
+    with pytest.raises(BackendUnavailable) as raised:
+        hero.get_heroPids_batch(list(range(1, 51)))
+    assert not isinstance(raised.value, PartialFailure)
+
+
+def test_garbled_body_is_a_backend_failure():
+    with pytest.raises(hero.MalformedResponse):
+        hero._parse(b"<html>502 Bad Gateway</html>")
+    with pytest.raises(hero.MalformedResponse):
+        hero._parse(b"[1, 2]")
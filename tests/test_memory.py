@@ -0,0 +1,40 @@
+import pyarrow as pa
+
+from services.memory import SessionResultStore, deep_sizeof
+
+
+def test_charged_caches_count_against_the_budget():
+    store = SessionResultStore(budget_bytes=1000)
+    assert store.add("old", {}, 400) == []
+    assert store.add("new", {}, 400) == []
+
+    # Growing the newest execution's cache pushes the store over budget; only other executions are evicted
+    assert store.charge("new", "search_index", 300) == ["old"]
+    assert store.ids() == ["new"]
+    assert store.total_bytes == 700
+    assert store.size("new") == 700
+
+
+def test_charge_replaces_the_previous_size_of_a_part():
+    store = SessionResultStore(budget_bytes=1000)
+    store.add("a", {}, 100)
+    store.charge("a", "analytics", 500)
+    store.charge("a", "analytics", 200)
+    assert store.total_bytes == 300
+    assert store.charge("gone", "analytics", 500) == []
+
+
+def test_eviction_frees_charged_parts():
+    store = SessionResultStore(budget_bytes=1000)
+    store.add("a", {}, 100)
+    store.charge("a", "trace", 500)
+    assert store.add("b", {}, 600) == ["a"]
+    assert store.total_bytes == 600
+
+
+def test_deep_sizeof_counts_arrow_buffers_and_skips_excluded():
+    table = pa.table({"id": pa.array(range(100_000), pa.int64())})
+    shared = list(range(10_000))
+    cache = {"columns": table, "tables": shared}
+    assert deep_sizeof(cache) >= table.nbytes + deep_sizeof(shared)
+    assert deep_sizeof(cache, exclude=(shared,)) < table.nbytes + deep_sizeof(shared) // 2
@@ -0,0 +1,58 @@
+import json
+
+from services.pagination import extract_cursor, paginate
+from services.transport import DagResponse
+
+
+def test_cursor_from_a_cursor_key_or_an_object_result():
+    assert extract_cursor({"next_cursor": '"abc"', "nodes": "[]"}) == "abc"
+    assert extract_cursor({"nextCursor": 17}) == "17"
+    assert extract_cursor({"meta": json.dumps({"cursor": "page-2"}), "nodes": "[]"}) == "page-2"
+    assert extract_cursor({"cursor": '""', "nodes": json.dumps([{"cursor": "x"}])}) is None
+    assert extract_cursor({"debug_config": json.dumps({"cursor": "x"})}) is None
+
+
+def _page(ids, cursor=None):
+    results = {"nodes": json.dumps([{"id": cid} for cid in ids])}
+    if cursor:
+        results["cursor"] = cursor
+    return DagResponse(True, results=results)
+
+
+def test_pages_are_merged_without_duplicate_candidates():
+    pages = {None: _page([1, 2, 3], "p2"), "p2": _page([3, 4], "p3"), "p3": _page([4, 5])}
+    requested = []
+
+    def fetch_page(cursor):
+        requested.append(cursor)
+        return pages[cursor]
+
+    steps = list(paginate(fetch_page))
+    run = steps[-1][0]
+    stats = [page for _, page in steps]
+
+    assert requested == [None, "p2", "p3"]
+    assert [(page.candidates, page.duplicates, page.next_cursor) for page in stats] == [
+        (3, 0, "p2"), (1, 1, "p3"), (1, 1, None),
+    ]
+    assert run.tables["nodes"].id_list() == [1, 2, 3, 4, 5]
+    assert run.items == 5
+
+
+def test_a_repeated_cursor_stops_the_run():
+    requested = []
+
+    def fetch_page(cursor):
+        requested.append(cursor)
+        return _page([len(requested)], "same")
+
+    stats = [page for _, page in paginate(fetch_page, max_pages=10)]
+
+    assert requested == [None, "same"]
+    assert len(stats) == 2
+
+
+def test_a_failed_page_is_recorded_and_ends_the_run():
+    stats = [page for _, page in paginate(lambda cursor: DagResponse(False, error="boom"))]
+
+    assert [(page.page, page.error) for page in stats] == [(1, "boom")]
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from services.candidates import CandidateTable
+from services.prefetch import EnrichmentPrefetch
+from services.resilience import DEGRADED, Deadline, PartialFailure
+
+
+def _prefetch(executor, hero, max_per_key, chunk_size):
+    return EnrichmentPrefetch(
+        executor,
+        "1000001",
+        fetch_hero_pids=hero,
+        fetch_products=lambda pids, deadline: [{"product_id": pid} for pid in pids],
+        fetch_pricing=lambda uid, pdp_data, deadline: {pid: {"serving_price": "199"} for pid, _, _ in pdp_data},
+        stage_deadline=lambda stage: Deadline(30),
+        max_per_key=max_per_key,
+        chunk_size=chunk_size,
+    )
+
+
+def test_partial_hero_failure_is_degraded_and_retried():
+    calls = []
+
+    def hero(ids, deadline):
+        calls.append(ids)
+        found = {cid: str(cid * 10) for cid in ids}
+        if len(calls) == 1:
+            # The first hero batch (IDs 1-25) failed
+            raise PartialFailure("hero", "1 of 2 chunks failed", {cid: pid for cid, pid in found.items() if cid > 25})
+        return found
+
+    table = CandidateTable.from_items("k", [{"id": cid} for cid in range(1, 51)])
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        prefetch = _prefetch(executor, hero, max_per_key=50, chunk_size=50)
+        details, degraded = prefetch.window(table)
+
+        assert [str(e) for e in degraded] == ["hero unavailable: 1 of 2 chunks failed"]
+        assert len(details) == 25
+        assert table.hero_pids[:25] == [DEGRADED] * 25
+        assert table.hero_pids[25] == "260"
+
+        assert prefetch.retry_degraded(lambda stage: Deadline(30)) == 1
+        details, degraded = prefetch.window(table)
+
+    assert degraded == []
+    assert len(details) == 50
+    assert table.hero_pids[0] == "10"
+
+
+def test_malformed_chunk_is_degraded():
+    def hero(ids, deadline):
+        if 1 in ids:
+            raise KeyError("catalog_id")
+        return {cid: str(cid * 10) for cid in ids}
+
+    table = CandidateTable.from_items("k", [{"id": cid} for cid in range(1, 5)])
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        details, degraded = _prefetch(executor, hero, max_per_key=4, chunk_size=2).window(table)
+
+    assert [str(e) for e in degraded] == ["enrichment unavailable: KeyError: 'catalog_id'"]
+    assert [product["product_id"] for product in details] == ["30", "40"]
+    assert table.hero_pids == [DEGRADED, DEGRADED, "30", "40"]
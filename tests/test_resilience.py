@@ -0,0 +1,111 @@
+import time
+
+import pytest
+import requests
+
+import debug.debug_pb2 as debug_pb2
+from services.hedging import HedgeCancelled
+from services.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    BackendUnavailable,
+    CircuitBreaker,
+    RequestRejected,
+    get_breaker,
+    guarded_call,
+)
+from services.transport import TRANSPORT_GRPC, get_transport
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    """Trip `breaker` and let its reset timeout pass, so the next call is the half-open trial."""
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure("down")
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+
+
+def _cancelled(timeout: float):
+    raise HedgeCancelled()
+
+
+def test_cancelled_trial_is_released():
+    breaker = get_breaker("test:cancelled-trial")
+    _open(breaker)
+    with pytest.raises(HedgeCancelled):
+        guarded_call("test:cancelled-trial", _cancelled, default_timeout=1.0)
+    assert breaker.state == STATE_OPEN
+    assert not breaker.rejecting
+    # The next call is the new trial, and its success closes the circuit
+    assert guarded_call("test:cancelled-trial", lambda timeout: "ok", default_timeout=1.0) == "ok"
+    assert breaker.state == STATE_CLOSED
+
+
+def test_trial_in_flight_rejects_other_calls():
+    breaker = CircuitBreaker("test:trial-in-flight")
+    _open(breaker)
+    assert breaker.before_call()
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.rejecting
+    with pytest.raises(BackendUnavailable):
+        breaker.before_call()
+    breaker.release_trial()
+    assert breaker.before_call()
+
+
+def test_cancelled_dag_trial_is_released(monkeypatch):
+    transport = get_transport(TRANSPORT_GRPC)
+    monkeypatch.setattr(transport, "send", lambda *args: _cancelled(0.0))
+    breaker = get_breaker("iop:cancelled-trial:1")
+    _open(breaker)
+    request_kwargs = {
+        "ConfigKind": "FeedRead",
+        "Selector": debug_pb2.ConfigSelector(FeedType="for_you", TenantCtx="organic", UserCtx="logged_in"),
+        "Data": debug_pb2.DebugExecutionRequestData(UserId="1", FeedType="for_you", Limit=10),
+    }
+    with pytest.raises(HedgeCancelled):
+        transport.execute(request_kwargs, "", "1", "logged_in", "cancelled-trial:1")
+    assert breaker.state == STATE_OPEN
+    assert not breaker.rejecting
+
+
+def test_rejected_requests_do_not_open_the_circuit():
+    breaker = get_breaker("test:rejected")
+    response = requests.Response()
+    response.status_code = 404
+
+    def _rejected(timeout: float):
+        raise requests.HTTPError("404 Not Found", response=response)
+
+    for _ in range(breaker.failure_threshold + 1):
+        with pytest.raises(RequestRejected):
+            guarded_call("test:rejected", _rejected, 1.0)
+    assert breaker.state == STATE_CLOSED
+
+
+def test_rejected_trial_is_released():
+    breaker = get_breaker("test:rejected-trial")
+    _open(breaker)
+
+    def _invalid(timeout: float):
+        raise ValueError("bad request")
+
+    with pytest.raises(RequestRejected):
+        guarded_call("test:rejected-trial", _invalid, 1.0)
+    assert breaker.state == STATE_OPEN
+    assert guarded_call("test:rejected-trial", lambda timeout: "ok", 1.0) == "ok"
+    assert breaker.state == STATE_CLOSED
+
+
+def test_server_errors_open_the_circuit():
+    breaker = get_breaker("test:server-error")
+    response = requests.Response()
+    response.status_code = 503
+
+    def _unavailable(timeout: float):
+        raise requests.HTTPError("503 Service Unavailable", response=response)
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(BackendUnavailable):
+            guarded_call("test:server-error", _unavailable, 1.0)
+    assert breaker.state == STATE_OPEN
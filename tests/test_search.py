@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from services.candidates import tables_from_results
+from services.search import CandidateIndex
+
+
+def _index(results):
+    tables, _ = tables_from_results({key: json.dumps(items) for key, items in results.items()})
+    return CandidateIndex(tables)
+
+
+def test_digit_query_finds_string_ids():
+    index = _index({"retrieve": [{"id": "123"}, {"id": "sku-9"}, {"id": 123}]})
+
+    result = index.search("123")
+    assert result.total == 2
+    assert [row["id"] for row in result.rows] == ["123", 123]
+
+
+def _enriched_index():
+    index = _index({
+        "retrieve": [{"id": 30}, {"id": 10}, {"id": 20}, {"id": 40}],
+        "rank": [{"id": 20}, {"id": 30}],
+    })
+    index.add_enrichment(
+        hero_pids={10: "p10", 20: "p20", 30: "p30"},
+        products={
+            "p10": {"catalog_name": "Cotton Kurta", "sscat_name": "Kurtas"},
+            "p20": {"catalog_name": "Silk Saree", "sscat_name": "Sarees"},
+            "p30": {"catalog_name": "Cotton Saree", "sscat_name": "Sarees"},
+        },
+        pricing={"p10": {"serving_price": "199"}, "p20": {"serving_price": "899"}, "p30": {"serving_price": "DEGRADED"}},
+    )
+    return index
+
+
+def _ids(result):
+    return [(row["key"], row["id"]) for row in result.rows]
+
+
+def test_terms_match_name_prefixes_in_every_key_and_keys_filter():
+    index = _enriched_index()
+
+    assert _ids(index.search("cot sar")) == [("retrieve", 30), ("rank", 30)]
+    assert _ids(index.search("saree", keys=["rank"])) == [("rank", 20), ("rank", 30)]
+    assert index.search("saree kurta").total == 0
+    assert index.search("", keys=["retrieve"]).total == 4
+
+
+def test_price_band_excludes_unpriced_candidates():
+    index = _enriched_index()
+
+    assert _ids(index.search(price_min=100, price_max=500)) == [("retrieve", 10)]
+    assert index.search(price_min=100).total == 3
+
+
+def test_sorts_by_price_id_and_rank():
+    index = _enriched_index()
+
+    by_price = index.search(keys=["retrieve"], sort="price")
+    assert [row["serving_price"] for row in by_price.rows] == [199.0, 899.0, None, None]
+    by_price_desc = index.search(keys=["retrieve"], sort="price", descending=True)
+    assert [row["id"] for row in by_price_desc.rows][:2] == [20, 10]
+    assert [row["id"] for row in index.search(keys=["retrieve"], sort="id").rows] == [10, 20, 30, 40]
+    assert _ids(index.search(sort="rank", limit=3)) == [("retrieve", 30), ("rank", 20), ("retrieve", 10)]
+    assert len(index.search(limit=3).rows) == 3 and index.search(limit=3).total == 6
+    with pytest.raises(ValueError):
+        index.search(sort="score")
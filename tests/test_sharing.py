@@ -0,0 +1,60 @@
+import json
+from types import SimpleNamespace
+
+from services import sharing
+from services.candidates import tables_from_results
+from services.resilience import Deadline
+from services.sharing import SharedExecutionStore, seeded_fetchers
+from services.transport import DagResponse
+
+
+def _execution():
+    results = {"nodes": json.dumps([{"id": 123, "score": 0.5}, {"id": 456}])}
+    tables, _ = tables_from_results(results)
+    return {
+        "feed_type": "home",
+        "environment": "staging",
+        "user_id": "42",
+        "request": {"limit": 2},
+        "response": DagResponse(True, results=results),
+        "tables": tables,
+        "profile": object(),
+    }
+
+
+def test_roundtrip_keeps_integer_catalog_id_keys(tmp_path):
+    store = SharedExecutionStore(str(tmp_path / "shared.sqlite"))
+    store.put("abc", _execution())
+    store.put_enrichment("abc", {
+        "hero_pids": {123: "p1"},
+        "products": {"p1": {"catalog_name": "Kurta"}},
+        "pricing": {"p1": {"serving_price": "299"}},
+    })
+
+    fields, enrichment = store.get("abc")
+
+    assert fields["request"] == {"limit": 2} and "profile" not in fields
+    assert fields["response"][0] is True
+    assert fields["tables"]["nodes"].id_list() == [123, 456]
+    assert enrichment["hero_pids"] == {123: "p1"}
+
+    def backend(missing, deadline):
+        assert missing == [456]
+        return {456: "p2"}
+
+    fetch_hero_pids, _, _ = seeded_fetchers(enrichment, backend, None, None)
+    assert fetch_hero_pids([123, 456], Deadline(1)) == {123: "p1", 456: "p2"}
+    store.close()
+
+
+def test_expired_executions_are_not_served(tmp_path, monkeypatch):
+    store = SharedExecutionStore(str(tmp_path / "shared.sqlite"), ttl=60)
+    now = 1_000_000.0
+    monkeypatch.setattr(sharing, "time", SimpleNamespace(time=lambda: now))
+    store.put("abc", _execution())
+    assert store.get("abc") is not None
+
+    now += 61
+    assert store.get("abc") is None
+    assert store.stats()["executions"] == 0
+    store.close()
@@ -0,0 +1,55 @@
+import json
+
+from services.candidates import tables_from_results
+from services.trace import DagTrace, parse_node_timings
+
+
+def test_timings_from_debug_config_keep_result_keys():
+    results = {
+        "debug_config": json.dumps({"node_timings": {"retrieve": 12.5, "rank": "3ms"}}),
+        "nodes": json.dumps([{"id": 1}, {"id": 2}]),
+    }
+    tables, _ = tables_from_results(results)
+
+    assert parse_node_timings(results, tables) == ({"retrieve": 12.5, "rank": 3.0}, None)
+
+
+def test_timings_from_a_result_key_name_it():
+    results = {
+        "node_timings": json.dumps({"retrieve": 12.5}),
+        "nodes": json.dumps([{"id": 1}]),
+    }
+    tables, _ = tables_from_results(results)
+
+    assert parse_node_timings(results, tables) == ({"retrieve": 12.5}, "node_timings")
+
+
+def test_list_shaped_timings_are_read_from_their_table():
+    results = {"timings": json.dumps([{"node": "retrieve", "duration_ms": 7}])}
+    tables, _ = tables_from_results(results)
+
+    assert parse_node_timings(results, tables) == ({"retrieve": 7.0}, "timings")
+    assert parse_node_timings({}, {}) == ({}, None)
+
+
+def test_typed_ids_resolve_to_string_ids_of_a_string_table():
+    results = {
+        "retrieve": json.dumps([{"id": "123"}, {"id": "sku-9"}]),
+        "rank": json.dumps([{"id": "sku-9"}]),
+    }
+    tables, _ = tables_from_results(results)
+    trace = DagTrace(tables)
+
+    assert not trace.int_ids
+    assert trace.resolve_id(" 123 ") == "123"
+    assert trace.resolve_id("sku-9") == "sku-9"
+    assert trace.provenance([trace.resolve_id("123")])[0]["filtered_at"] == "rank"
+
+
+def test_typed_ids_of_an_integer_table_are_integers():
+    tables, _ = tables_from_results({"retrieve": json.dumps([{"id": 123}])})
+    trace = DagTrace(tables)
+
+    assert trace.resolve_id("123") == 123
+    assert trace.resolve_id("sku-9") is None
+    assert trace.resolve_id(" ") is None
@@ -0,0 +1,48 @@
+import pytest
+from google.protobuf.json_format import MessageToDict
+
+import debug.debug_pb2 as debug_pb2
+from services.conversions import convert_floats_to_ints, convert_keys_snake, message_to_snake_dict
+from services.resilience import STATE_OPEN, get_breaker
+from services.transport import TRANSPORT_GRPC, DagError, get_transport
+from tests.test_resilience import _open
+
+
+def _request_kwargs():
+    feed_metadata = debug_pb2.google_dot_protobuf_dot_struct__pb2.Struct()
+    feed_metadata.update({"pageSize": 20.0, "boostFactor": 1.5, "filterConfig": {"sscatIds": [1.0, 2.0]}})
+    return {
+        "ConfigKind": "FeedRead",
+        "Selector": debug_pb2.ConfigSelector(FeedType="for_you", TenantCtx="organic", UserCtx="logged_in"),
+        "Data": debug_pb2.DebugExecutionRequestData(
+            UserId="1", FeedType="for_you", Limit=10, CatalogSchedulingStatuses=["live", "paused"],
+            FeedMetaData=feed_metadata,
+        ),
+    }
+
+
+def test_message_to_snake_dict_matches_the_generic_conversion():
+    message = debug_pb2.ExecuteDAGRequest(**_request_kwargs())
+    expected = convert_keys_snake(convert_floats_to_ints(MessageToDict(message, preserving_proto_field_name=True)))
+
+    assert message_to_snake_dict(message) == expected
+
+
+def test_trial_is_released_when_encoding_fails(monkeypatch):
+    transport = get_transport(TRANSPORT_GRPC)
+
+    def _encode(request_kwargs, config_source_type):
+        raise ValueError("unknown field")
+
+    monkeypatch.setattr(transport, "encode", _encode)
+    breaker = get_breaker("iop:encode-trial:1")
+    _open(breaker)
+    with pytest.raises(ValueError):
+        transport.execute(_request_kwargs(), "", "1", "logged_in", "encode-trial:1")
+    assert breaker.state == STATE_OPEN
+    assert not breaker.rejecting
+
+
+def test_garbled_grpc_response_is_a_dag_error():
+    with pytest.raises(DagError, match="Invalid gRPC response"):
+        get_transport(TRANSPORT_GRPC).decode(b"\xff\xff\xff")
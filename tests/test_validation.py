@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from services import validation
+from services.validation import Schema, check_config, request_errors
+
+
+@pytest.fixture(autouse=True)
+def empty_schema():
+    validation.configure(Schema())
+    yield
+    validation.configure(None)
+
+
+def _config(dag_config, nodes):
+    return json.dumps({"dag_config": dag_config, "nodes": nodes})
+
+
+def test_valid_dag_passes():
+    check = check_config(_config({"a": ["b"]}, {"a": {"type": "retrieval"}, "b": {"type": "ranker"}}))
+
+    assert check.ok
+    assert check.parsed["dag_config"] == {"a": ["b"]}
+
+
+def test_cycle_is_an_error():
+    check = check_config(_config({"a": ["b"], "b": ["a"]}, {"a": {"type": "x"}, "b": {"type": "x"}}))
+
+    assert check.errors == ["dag_config has a cycle: a -> b -> a"]
+
+
+def test_undefined_node_and_unused_node():
+    check = check_config(_config({"a": ["b"]}, {"a": {"type": "x"}, "c": {"type": "x"}}))
+
+    assert check.errors == ["dag_config references undefined node b"]
+    assert check.warnings == ["Node c is not in dag_config"]
+
+
+def test_unknown_node_type_with_schema():
+    validation.configure(Schema(node_types=["retrieval"]))
+    check = check_config(_config({"a": []}, {"a": {"type": "ranker"}}))
+
+    assert check.errors == ["Node a has unknown type 'ranker'"]
+
+
+def test_whitespace_config_is_rejected():
+    assert request_errors({"RawConfigJson": "   "})[0].startswith("RawConfigJson: Invalid JSON")
+
+
+def test_example_schema_loads():
+    schema = Schema.load(validation.SCHEMA_PATH.replace("dag_schema.json", "dag_schema.example.json"))
+
+    assert "retrieval" in schema.node_types
+
+
+@pytest.mark.parametrize("content", ["{not json", "[]", '{"fields": {"version": "int"}}'])
+def test_bad_schema_is_ignored(tmp_path, monkeypatch, caplog, content):
+    path = tmp_path / "dag_schema.json"
+    path.write_text(content)
+    monkeypatch.setattr(validation, "SCHEMA_PATH", str(path))
+    validation.configure(None)
+
+    assert check_config(_config({"a": []}, {"a": {"type": "anything"}})).ok
+    assert check_config(_config({"b": []}, {"b": {"type": "anything"}})).ok
+    assert len([record for record in caplog.records if "Ignoring the DAG schema" in record.message]) == 1